@@ -4,7 +4,6 @@ SmartThings MCP Client
 A client for interacting with the SmartThingsMCPServer using FastMCP 2.0.
 """
 import argparse
-import json
 import sys
 import asyncio
 from typing import Dict, Any, List
@@ -12,12 +11,14 @@ from typing import Dict, Any, List
 # Import modular client components
 try:
     from modules.client.main import SmartThingsMCPClient
-    from modules.client.utils import convert_tool_to_dict, run_action
+    from modules.client.utils import dump_tool_result, format_tool_result, run_action
+    from modules.client import _json as json
 except ImportError:
     # If running from package instead of direct
     try:
         from SmartThingsMCP.modules.client.main import SmartThingsMCPClient
-        from SmartThingsMCP.modules.client.utils import convert_tool_to_dict, run_action
+        from SmartThingsMCP.modules.client.utils import dump_tool_result, format_tool_result, run_action
+        from SmartThingsMCP.modules.client import _json as json
     except ImportError:
         print("Error: Cannot import SmartThingsMCP client modules.")
         print("Make sure you are running from the correct directory.")
@@ -39,6 +40,10 @@ async def main():
                         help="Parameters for the action (JSON string)")
     parser.add_argument("--pretty", action="store_true", 
                         help="Pretty-print the JSON output")
+    parser.add_argument("--no-stream", action="store_true",
+                        help="Buffer the whole JSON output instead of streaming it")
+    parser.add_argument("--cache-dir", type=str,
+                        help="Directory for a persistent cache reused across runs")
     
     args = parser.parse_args()
     
@@ -51,23 +56,27 @@ async def main():
         sys.exit(1)
     
     # Create client
-    client = SmartThingsMCPClient(args.host, args.port, args.auth, args.transport)
+    client = SmartThingsMCPClient(args.host, args.port, args.auth, args.transport,
+                                  disk_cache_dir=args.cache_dir)
     
     # Run the action
     try:
         result = await run_action(client, args.action, params)
         
-        # Convert result to serializable format
-        result = convert_tool_to_dict(result)
-        
-        # Output result
-        if args.pretty:
-            print(json.dumps(result, indent=2))
+        # Output result, converting tool result objects while serializing
+        if args.pretty or args.no_stream:
+            print(format_tool_result(result, pretty=args.pretty))
         else:
-            print(json.dumps(result))
+            # Stream compact output so large results aren't buffered as one string
+            sys.stdout.flush()
+            dump_tool_result(result, sys.stdout.buffer)
+            sys.stdout.buffer.write(b"\n")
+            sys.stdout.buffer.flush()
     except Exception as e:
         print(f"Error executing action: {e}")
         sys.exit(1)
+    finally:
+        await client.aclose()
 
 
 if __name__ == "__main__":
@@ -5,8 +5,13 @@ A FastMCP 2.0 server that exposes SmartThings API endpoints as MCP tools.
 """
 import sys
 import argparse
+import logging
 import os
 
+# Logging is configured once here, at the entry point; the tool modules only get loggers
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
 # Import both FastMCP and fastmcp module for compatibility
 import importlib.util
 fastmcp = None
@@ -15,20 +20,22 @@ fastmcp = None
 try:
     # This is the import path expected by mcp dev
     from mcp.server.fastmcp.server import FastMCP
-    print("Imported FastMCP from mcp.server.fastmcp.server")
+    logger.debug("Imported FastMCP from mcp.server.fastmcp.server")
 except ImportError:
     try:
         # Fallback to direct fastmcp import for standalone mode
         from fastmcp.server.server import FastMCP
-        print("Imported FastMCP from fastmcp.server.server")
+        logger.debug("Imported FastMCP from fastmcp.server.server")
     except ImportError:
-        print("Error: Failed to import FastMCP from any known location")
+        print("Error: Failed to import FastMCP from any known location", file=sys.stderr)
         import sys
         sys.exit(1)
 
 # This is critical: Check for MCP_DEV environment variable which is set by mcp dev command
 IS_MCP_DEV = os.environ.get('MCP_DEV') == '1'
-print(f"Running in MCP dev mode: {IS_MCP_DEV}")
+
+# Set MCP_VERBOSE to log server diagnostics at import time
+MCP_VERBOSE = bool(os.environ.get('MCP_VERBOSE'))
 
 # Try both import paths
 try:
@@ -55,19 +62,10 @@ AUTH_TOKEN_OVERRIDE = None
 # Global server instance - REQUIRED for mcp dev to work properly
 # When running with mcp dev, this variable must be set at the module level
 # and must be named 'server'
-print("Creating global server instance at module level")
 server = FastMCP(name="SmartThingsMCP")
-print(f"Server initialized: {server}")
-print(f"Server type: {type(server)}")
-
-# Explicitly check for the expected server type
-expected_type = "mcp.server.fastmcp.server.FastMCP"
-actual_type = str(type(server))
-print(f"Expected type: <class '{expected_type}'>, Actual type: {actual_type}")
 
 # Register tools at the module level to ensure they're available
 # This is crucial for mcp dev mode
-print("Registering tools at the module level")
 register_devices_tools(server)
 register_locations_tools(server)
 register_rooms_tools(server)
@@ -76,12 +74,41 @@ register_rules_tools(server)
 register_scenes_tools(server)
 register_structure_tools(server)  # Structure generation tools for LLM
 
-# Just check if the server has tools methods
-print(f"Server has list_tools method: {hasattr(server, 'list_tools')}")
-print(f"Server has get_tools method: {hasattr(server, 'get_tools')}")
-print(f"Server has tool decorator: {hasattr(server, 'tool')}")
-print(f"Registered test tool and standard device tools")
-# Don't try to call list_tools() directly as it's a coroutine
+def _describe_server() -> None:
+    """
+    Log diagnostics about the global server instance.
+    
+    Kept off the import path unless MCP_VERBOSE is set, since every stdio
+    session spawned by mcp dev imports this module.
+    """
+    # Explicitly check for the expected server type
+    expected_type = "mcp.server.fastmcp.server.FastMCP"
+    logger.info("Running in MCP dev mode: %s", IS_MCP_DEV)
+    logger.info("Server initialized: %s", server)
+    logger.info("Expected type: <class '%s'>, Actual type: %s", expected_type, type(server))
+    
+    # Just check if the server has tools methods
+    # Don't try to call list_tools() directly as it's a coroutine
+    logger.info("Server has list_tools method: %s", hasattr(server, 'list_tools'))
+    logger.info("Server has get_tools method: %s", hasattr(server, 'get_tools'))
+    logger.info("Server has tool decorator: %s", hasattr(server, 'tool'))
+
+if MCP_VERBOSE:
+    _describe_server()
+
+def _uvicorn_speedups() -> dict:
+    """
+    Pick faster uvicorn event loop and HTTP parser implementations when installed.
+    
+    Returns:
+        Keyword arguments for uvicorn.run (empty if neither uvloop nor httptools is available)
+    """
+    options = {}
+    if importlib.util.find_spec("uvloop") is not None:
+        options["loop"] = "uvloop"
+    if importlib.util.find_spec("httptools") is not None:
+        options["http"] = "httptools"
+    return options
 
 class SmartThingsMCPServer:
     """
@@ -103,15 +130,15 @@ class SmartThingsMCPServer:
         # Note: No need to recreate the server or register tools here
         # Tools are already registered at the module level
         # This is necessary for mcp dev compatibility
-        print(f"SmartThingsMCPServer initialized with port {port}")
-        print(f"Global server: {server}")
+        logger.debug("SmartThingsMCPServer initialized with port %s", port)
+        logger.debug("Global server: %s", server)
         
         # List existing tools
         try:
             tools = server.list_tools()
-            print(f"Current registered tools: {tools}")
+            logger.debug("Current registered tools: %s", tools)
         except Exception as e:
-            print(f"Error listing tools: {e}")
+            logger.debug("Error listing tools: %s", e)
         
     def start_server(self, transport: str = "http"):
         """
@@ -121,7 +148,7 @@ class SmartThingsMCPServer:
             transport: Transport to use (stdio, http, or sse)
         """
         global server
-        print(f"Starting server (type: {type(server)}) with transport {transport}")
+        logger.info("Starting server (type: %s) with transport %s", type(server), transport)
         
         # When running with mcp dev, the environment is already set up
         # We just need to keep the process alive
@@ -132,13 +159,13 @@ class SmartThingsMCPServer:
                 import fastmcp as fastmcp_module
                 fastmcp = fastmcp_module
             except ImportError:
-                print("fastmcp module not found, running in standalone mode")
+                logger.info("fastmcp module not found, running in standalone mode")
                 
         # Check if we're in MCP Inspector environment
         if fastmcp and hasattr(fastmcp, 'current'):
-            print("Running in MCP Inspector environment")
-            print(f"MCP current server: {fastmcp.current}")
-            print(f"Our server instance: {server}")
+            logger.info("Running in MCP Inspector environment")
+            logger.debug("MCP current server: %s", fastmcp.current)
+            logger.debug("Our server instance: %s", server)
             
             # Just keep the process alive - don't run the server
             try:
@@ -146,24 +173,24 @@ class SmartThingsMCPServer:
                 while True:
                     time.sleep(1)
             except KeyboardInterrupt:
-                print("Exiting due to keyboard interrupt")
+                logger.info("Exiting due to keyboard interrupt")
         else:
             # For standalone mode
             if transport == "stdio":
-                print("Running server with stdio transport")
+                logger.info("Running server with stdio transport")
                 server.run(transport="stdio")
             elif transport == "sse":
-                print(f"Running server with sse transport on port {self.port}")
+                logger.info("Running server with sse transport on port %s", self.port)
                 server.run(transport="sse")
             elif transport == "http":
-                print(f"Running server with http transport on port {self.port}")
+                logger.info("Running server with http transport on port %s", self.port)
                 # The FastMCP.run() method doesn't take a port parameter directly
                 # For http transport we need to configure it to use the specified port
                 import uvicorn
                 app = server.streamable_http_app
-                uvicorn.run(app, host="0.0.0.0", port=self.port)
+                uvicorn.run(app, host="0.0.0.0", port=self.port, **_uvicorn_speedups())
             else:
-                print(f"Unknown transport: {transport}")
+                logger.error("Unknown transport: %s", transport)
                 sys.exit(1)
 
 def parse_args():
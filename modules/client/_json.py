@@ -0,0 +1,127 @@
+"""
+JSON helpers for SmartThingsMCP Client
+Uses orjson when it is installed and falls back to the standard library
+"""
+import json
+from typing import Any, BinaryIO, Callable, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so one name covers both
+JSONDecodeError = json.JSONDecodeError
+
+# Types written natively; anything else goes through the default hook
+_JSON_TYPES = (dict, list, tuple, str, int, float, bool, type(None))
+
+
+def _orjson_option(default: Optional[Callable[[Any], Any]]) -> int:
+    """Base orjson options; with a default hook, dataclasses are routed through it too"""
+    option = orjson.OPT_NON_STR_KEYS
+    if default is not None:
+        option |= orjson.OPT_PASSTHROUGH_DATACLASS
+    return option
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """
+    Parse a JSON document.
+    
+    Args:
+        data: JSON text or UTF-8 bytes
+        
+    Returns:
+        Parsed Python object
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any, pretty: bool = False,
+          default: Optional[Callable[[Any], Any]] = None) -> str:
+    """
+    Serialize an object to a JSON string.
+    
+    Args:
+        obj: JSON serializable object
+        pretty: Indent the output with two spaces
+        default: Hook converting unsupported objects to serializable ones
+        
+    Returns:
+        JSON string
+    """
+    if orjson is not None:
+        option = _orjson_option(default)
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=default, option=option).decode()
+        except TypeError:
+            # e.g. integers wider than 64 bits; let the stdlib handle them
+            pass
+    return json.dumps(obj, indent=2 if pretty else None, default=default)
+
+
+def dumps_bytes(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """
+    Serialize an object to compact UTF-8 JSON bytes.
+    
+    Args:
+        obj: JSON serializable object
+        default: Hook converting unsupported objects to serializable ones
+        
+    Returns:
+        JSON bytes
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=default, option=_orjson_option(default))
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=default).encode()
+
+
+def stream_json(obj: Any, out: BinaryIO, depth: int = 2,
+                default: Optional[Callable[[Any], Any]] = None) -> None:
+    """
+    Write an object as compact JSON to a binary stream, one element at a time.
+    
+    Containers down to the given depth are written piece by piece, and
+    anything below that is serialized in a single call. Objects converted
+    by the default hook (e.g. a CallToolResult) don't count as a level, so
+    with the default depth a response like {"items": [...]} is written one
+    item at a time, whether or not it is wrapped in a result object, and
+    the full document is never held in memory as a single string.
+    
+    Args:
+        obj: JSON serializable object
+        out: Binary stream to write to (e.g. sys.stdout.buffer)
+        depth: Number of container levels to stream before serializing whole
+        default: Hook converting unsupported objects to serializable ones
+    """
+    child_depth = depth - 1
+    if default is not None and depth > 0 and not isinstance(obj, _JSON_TYPES):
+        obj = default(obj)
+        child_depth = depth
+    
+    if depth > 0 and isinstance(obj, dict):
+        out.write(b"{")
+        for index, (key, value) in enumerate(obj.items()):
+            if index:
+                out.write(b",")
+            out.write(dumps_bytes(str(key)))
+            out.write(b":")
+            stream_json(value, out, child_depth, default)
+        out.write(b"}")
+    elif depth > 0 and isinstance(obj, (list, tuple)):
+        out.write(b"[")
+        for index, item in enumerate(obj):
+            if index:
+                out.write(b",")
+            stream_json(item, out, depth - 1, default)
+        out.write(b"]")
+    else:
+        out.write(dumps_bytes(obj, default))
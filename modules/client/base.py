@@ -2,16 +2,67 @@
 Base client module for SmartThingsMCP
 """
 import sys
-from typing import Dict, Any, Optional, List, Union
+import asyncio
+import logging
+import importlib.util
+from contextlib import AsyncExitStack
+from typing import Dict, Any, Optional, List, Tuple, Union, AsyncIterator
 
 # Import FastMCP client
 try:
     from fastmcp.client import Client as FastMCPClient
+    from fastmcp.exceptions import McpError, ToolError
 except ImportError:
-    print("Error: fastmcp package not found.")
-    print("Please install it with: pip install fastmcp>=2.0.0")
+    print("Error: fastmcp package not found.", file=sys.stderr)
+    print("Please install it with: pip install fastmcp>=2.0.0", file=sys.stderr)
     sys.exit(1)
 
+# Optional: tuned HTTP connection pooling for the http/sse transports
+try:
+    import httpx
+    from fastmcp.client.transports import StreamableHttpTransport, SSETransport
+except ImportError:
+    httpx = StreamableHttpTransport = SSETransport = None
+
+from .utils import convert_tool_to_dict
+
+logger = logging.getLogger(__name__)
+
+# Errors the server reported over a working session; any other failure drops the session
+_SERVER_ERRORS = (ToolError, McpError)
+
+# Keep idle connections to the MCP server open between calls
+HTTP_POOL_LIMITS = dict(max_keepalive_connections=32, keepalive_expiry=60.0)
+
+
+def _pooled_http_client(headers=None, timeout=None, auth=None, **kwargs):
+    """
+    Build the httpx client for an HTTP/SSE session with keep-alive pooling.
+    
+    Matches the httpx_client_factory signature FastMCP transports expect.
+    HTTP/2 is enabled when the h2 package is installed.
+    
+    Args:
+        headers: Headers to send with every request
+        timeout: Request timeout (default: 30s, 5s connect, 300s read for streams)
+        auth: httpx authentication
+        **kwargs: Additional httpx.AsyncClient arguments (e.g. follow_redirects)
+        
+    Returns:
+        httpx.AsyncClient instance
+    """
+    if timeout is None:
+        timeout = httpx.Timeout(30.0, connect=5.0, read=300.0)
+    kwargs.setdefault("follow_redirects", True)
+    return httpx.AsyncClient(
+        headers=headers,
+        timeout=timeout,
+        auth=auth,
+        limits=httpx.Limits(**HTTP_POOL_LIMITS),
+        http2=importlib.util.find_spec("h2") is not None,
+        **kwargs,
+    )
+
 
 class BaseClient:
     """
@@ -19,6 +70,30 @@ class BaseClient:
     Handles connection and common operations.
     """
     
+    __slots__ = ('auth_token', 'host', 'port', 'transport', 'client',
+                 '_session', '_stack', '_session_lock')
+    
+    # Per-tool cache behaviour: tool_name -> (is_cacheable, is_write_op, invalidation_patterns)
+    # Built for each subclass from the cache mixin's operation tables, if present
+    _CACHE_META: Dict[str, Tuple[bool, bool, Tuple[str, ...]]] = {}
+    
+    def __init_subclass__(cls, **kwargs):
+        """Precompute the per-tool cache table for the new client class"""
+        super().__init_subclass__(**kwargs)
+        
+        cacheable = getattr(cls, 'CACHEABLE_OPERATIONS', ())
+        invalidating = getattr(cls, 'CACHE_INVALIDATING_OPERATIONS', ())
+        patterns = getattr(cls, 'INVALIDATION_PATTERNS', {})
+        
+        cls._CACHE_META = {
+            tool_name: (
+                tool_name in cacheable,
+                tool_name in invalidating,
+                tuple(patterns.get(tool_name, ())),
+            )
+            for tool_name in set(cacheable) | set(invalidating)
+        }
+    
     def __init__(self, host: str = "127.0.0.1", port: int = 8000, 
                  auth_token: str = None, transport: str = "stdio", **kwargs):
         """
@@ -37,6 +112,13 @@ class BaseClient:
         self.transport = transport
         self.client = None
         
+        # Live FastMCP session, opened on first use and reused across calls
+        self._session = None
+        self._stack: Optional[AsyncExitStack] = None
+        
+        # Created lazily so it binds to the running event loop
+        self._session_lock: Optional[asyncio.Lock] = None
+        
         # Don't call super().__init__() here as other mixins don't have __init__
         # and it would eventually reach object.__init__() which doesn't accept kwargs
         
@@ -50,27 +132,100 @@ class BaseClient:
                 transport="stdio",
                 auth=f"Bearer {self.auth_token}" if self.auth_token else None
             )
-            print(f"Initialized FastMCP 2.0 client with stdio transport")
+            logger.debug("Initialized FastMCP 2.0 client with stdio transport")
         elif self.transport == "http":
             # Use HTTP transport
             # For FastMCP HTTP transport, need to include the '/mcp' path
             server_url = f"http://{self.host}:{self.port}/mcp"
             self.client = FastMCPClient(
-                server_url,
+                self._http_transport(StreamableHttpTransport, server_url),
                 auth=f"Bearer {self.auth_token}" if self.auth_token else None
             )
-            print(f"Initialized FastMCP 2.0 client with HTTP transport at {server_url}")
+            logger.debug("Initialized FastMCP 2.0 client with HTTP transport at %s", server_url)
         elif self.transport == "sse":
             # Use SSE transport
             server_url = f"http://{self.host}:{self.port}/sse"
             self.client = FastMCPClient(
-                server_url,
+                self._http_transport(SSETransport, server_url),
                 auth=f"Bearer {self.auth_token}" if self.auth_token else None
             )
-            print(f"Initialized FastMCP 2.0 client with SSE transport at {server_url}")
+            logger.debug("Initialized FastMCP 2.0 client with SSE transport at %s", server_url)
         else:
             raise ValueError(f"Unsupported transport: {self.transport}. Must be one of: stdio, http, sse")
     
+    @staticmethod
+    def _http_transport(transport_cls, server_url: str):
+        """
+        Build an HTTP/SSE transport that uses the pooled httpx client.
+        
+        Args:
+            transport_cls: FastMCP transport class for the server URL
+            server_url: MCP server endpoint URL
+            
+        Returns:
+            Transport instance, or the plain URL if httpx is not available
+        """
+        if httpx is None:
+            return server_url
+        return transport_cls(server_url, httpx_client_factory=_pooled_http_client)
+    
+    async def _ensure_session(self):
+        """
+        Return the persistent FastMCP session, connecting on first use.
+        
+        Concurrent first calls share a single connection attempt.
+        
+        Returns:
+            Connected FastMCP client
+        """
+        if self._session is not None:
+            return self._session
+        
+        if self._session_lock is None:
+            self._session_lock = asyncio.Lock()
+        
+        async with self._session_lock:
+            if self._session is None:
+                stack = AsyncExitStack()
+                self._session = await stack.enter_async_context(self.client)
+                self._stack = stack
+        
+        return self._session
+    
+    async def connect(self) -> None:
+        """Open the persistent FastMCP session if it is not already open"""
+        await self._ensure_session()
+    
+    async def aclose(self) -> None:
+        """Close the persistent FastMCP session if one is open"""
+        if self._stack is not None:
+            stack = self._stack
+            self._stack = None
+            self._session = None
+            await stack.aclose()
+    
+    async def _drop_session(self, session) -> None:
+        """
+        Close a session after a failed call so the next call reconnects.
+        
+        Args:
+            session: Session the failed call used, or None if connecting failed
+        """
+        # Leave a session that another call has already replaced alone
+        if session is None or session is not self._session:
+            return
+        try:
+            await self.aclose()
+        except Exception as e:
+            logger.debug("Error closing failed session: %s", e)
+    
+    async def __aenter__(self):
+        await self.connect()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+    
     async def list_tools(self) -> List[Dict[str, Any]]:
         """
         List all available tools from the MCP server.
@@ -78,15 +233,17 @@ class BaseClient:
         Returns:
             List of tools as dictionaries
         """
+        session = None
         try:
-            async with self.client as client:
-                tools = await client.list_tools()
-                
-                # Convert Tool objects to dictionaries
-                from .utils import convert_tool_to_dict
-                return [convert_tool_to_dict(tool) for tool in tools]
+            session = await self._ensure_session()
+            tools = await session.list_tools()
+            
+            # Convert Tool objects to dictionaries
+            return convert_tool_to_dict(list(tools))
         except Exception as e:
-            print(f"Error listing tools: {e}")
+            logger.error("Error listing tools: %s", e)
+            if not isinstance(e, _SERVER_ERRORS):
+                await self._drop_session(session)
             return []
     
     async def call_tool(self, tool_name: str, **kwargs) -> Any:
@@ -112,35 +269,89 @@ class BaseClient:
         else:
             params = kwargs
         
-        # Check if operation is cacheable
-        is_cacheable = tool_name in getattr(self, 'CACHEABLE_OPERATIONS', set())
-        is_write_op = tool_name in getattr(self, 'CACHE_INVALIDATING_OPERATIONS', set())
+        # Look up how this tool interacts with the cache
+        is_cacheable, is_write_op, invalidation_patterns = self._CACHE_META.get(
+            tool_name, (False, False, ()))
         
         # Try to get from cache if cacheable
-        if is_cacheable and hasattr(self, '_get_from_cache'):
+        if is_cacheable:
             cache_key = self._generate_cache_key(tool_name, params)
             cached_result = self._get_from_cache(cache_key)
             
             if cached_result is not None:
-                # Display cache hit in green
-                print(f"\033[92m✓ Cache hit: {tool_name}\033[0m")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("✓ Cache hit: %s", tool_name)
                 return cached_result
         
         # Call the actual tool
+        session = None
         try:
-            async with self.client as client:
-                result = await client.call_tool(tool_name, params)
-                
-                # Cache the result if cacheable
-                if is_cacheable and hasattr(self, '_put_in_cache'):
-                    cache_key = self._generate_cache_key(tool_name, params)
-                    self._put_in_cache(cache_key, result)
-                
-                # Invalidate cache if this is a write operation
-                if is_write_op and hasattr(self, '_invalidate_cache_for_operation'):
-                    self._invalidate_cache_for_operation(tool_name)
-                
-                return result
+            session = await self._ensure_session()
+            result = await session.call_tool(tool_name, params)
+            
+            # Cache the result if cacheable
+            if is_cacheable:
+                self._put_in_cache(cache_key, result)
+            
+            # Invalidate cache if this is a write operation
+            if is_write_op:
+                for pattern in invalidation_patterns:
+                    self._invalidate_cache_pattern(pattern)
+            
+            return result
         except Exception as e:
-            print(f"Error calling tool {tool_name}: {e}")
+            logger.error("Error calling tool %s: %s", tool_name, e)
+            if not isinstance(e, _SERVER_ERRORS):
+                await self._drop_session(session)
             return {"error": str(e)}
+    
+    async def call_tools_batch(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+        """
+        Call several tools concurrently over the shared session.
+        
+        Each call goes through call_tool, so caching and cache invalidation
+        apply exactly as they would for individual calls.
+        
+        Args:
+            calls: List of (tool_name, params) pairs
+            
+        Returns:
+            List of tool responses in the same order as calls
+        """
+        return await asyncio.gather(
+            *(self.call_tool(tool_name, **params) for tool_name, params in calls)
+        )
+    
+    async def iter_tool_pages(self, tool_name: str, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate over the items of a paged list tool (e.g. list_locations_page).
+        
+        The next page is requested as soon as a page arrives, so it is in
+        flight while the caller processes the current page's items.
+        
+        Args:
+            tool_name: Name of the paged tool
+            **kwargs: Arguments to pass to the tool on every page
+            
+        Yields:
+            Each item of each page, in order
+        """
+        kwargs = {key: value for key, value in kwargs.items() if value is not None}
+        next_call = asyncio.ensure_future(self.call_tool(tool_name, **kwargs))
+        try:
+            while next_call is not None:
+                result = await next_call
+                next_call = None
+                page = getattr(result, "data", result)
+                if not isinstance(page, dict) or "items" not in page:
+                    raise RuntimeError(f"Paged call {tool_name} failed: {page}")
+                
+                cursor = page.get("cursor")
+                if cursor:
+                    next_call = asyncio.ensure_future(self.call_tool(tool_name, cursor=cursor, **kwargs))
+                for item in page["items"]:
+                    yield item
+        finally:
+            # Don't leave the prefetch running if the caller stops early
+            if next_call is not None and not next_call.done():
+                next_call.cancel()
@@ -0,0 +1,225 @@
+"""
+Batching module for SmartThingsMCP Client
+Coalesces tool calls issued close together into a single concurrent batch
+"""
+import asyncio
+from typing import Dict, Any, List, Tuple, Hashable, Callable, Awaitable
+
+
+class BatchingProxy:
+    """
+    Queues tool calls for a short window and flushes them together
+    through the client's call_tools_batch.
+
+    A batch is flushed once max_batch calls are pending or max_wait_ms
+    has elapsed since the first pending call, whichever comes first.
+    """
+    
+    __slots__ = ('_client', '_max_batch', '_max_wait', '_pending', '_flush_handle', '_flush_tasks')
+
+    def __init__(self, client, max_batch: int = 16, max_wait_ms: float = 5.0):
+        """
+        Initialize the batching proxy.
+
+        Args:
+            client: SmartThingsMCPClient instance to dispatch batches through
+            max_batch: Maximum number of calls per batch
+            max_wait_ms: Maximum time in milliseconds a call waits before flushing
+        """
+        self._client = client
+        self._max_batch = max_batch
+        self._max_wait = max_wait_ms / 1000.0
+
+        # Pending calls: [(tool_name, params, future)]
+        self._pending: List[Tuple[str, Dict[str, Any], asyncio.Future]] = []
+        self._flush_handle = None
+
+        # Keep references to in-flight flushes so they aren't garbage collected
+        self._flush_tasks = set()
+
+    async def call_tool(self, tool_name: str, **kwargs) -> Any:
+        """
+        Queue a tool call and wait for its batch to complete.
+
+        Args:
+            tool_name: Name of the tool to call
+            **kwargs: Arguments to pass to the tool
+
+        Returns:
+            Tool response
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((tool_name, kwargs, future))
+
+        if len(self._pending) >= self._max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self._max_wait, self._flush)
+
+        return await future
+
+    async def flush(self) -> None:
+        """Flush pending calls immediately and wait for them to complete"""
+        self._flush()
+        if self._flush_tasks:
+            await asyncio.gather(*self._flush_tasks, return_exceptions=True)
+
+    def _flush(self) -> None:
+        """Hand the pending calls off to a background batch dispatch"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._dispatch(batch))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _dispatch(self, batch: List[Tuple[str, Dict[str, Any], asyncio.Future]]) -> None:
+        """
+        Send one batch and resolve the futures of its callers.
+
+        Args:
+            batch: Calls to send
+        """
+        try:
+            results = await self._client.call_tools_batch(
+                [(tool_name, params) for tool_name, params, _ in batch]
+            )
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+def _bulk_items(result: Any) -> List[Any]:
+    """
+    Extract the per-item results from a bulk tool response.
+    
+    Args:
+        result: Value returned by a bulk client method
+        
+    Returns:
+        The response's 'items' list
+    """
+    data = getattr(result, "data", result)
+    if isinstance(data, dict) and "items" in data:
+        return data["items"]
+    raise RuntimeError(f"Bulk call failed: {data}")
+
+
+class CoalescingLoader:
+    """
+    Collects single-item calls made in the same event-loop tick and sends
+    them through one bulk call per group, DataLoader style.
+
+    Each caller gets back its own slice of the bulk response; an item the
+    bulk call reports as {"error": ...} raises RuntimeError for its caller.
+    """
+    
+    __slots__ = ('_load_many', '_pending', '_scheduled', '_flush_tasks')
+
+    def __init__(self, load_many: Callable[[Hashable, List[Any]], Awaitable[List[Any]]]):
+        """
+        Initialize the loader.
+
+        Args:
+            load_many: Coroutine function taking (group_key, items) and returning
+                one result per item, in order
+        """
+        self._load_many = load_many
+
+        # Pending items per group: {group_key: [(item, future)]}
+        self._pending: Dict[Hashable, List[Tuple[Any, asyncio.Future]]] = {}
+        self._scheduled = False
+
+        # Keep references to in-flight flushes so they aren't garbage collected
+        self._flush_tasks = set()
+
+    async def load(self, group_key: Hashable, item: Any) -> Any:
+        """
+        Queue one item and wait for the bulk call that carries it.
+
+        Args:
+            group_key: Items sharing a key go in the same bulk call (e.g. location ID)
+            item: Item to send
+
+        Returns:
+            This item's result from the bulk call
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(group_key, []).append((item, future))
+
+        # Flush once every caller scheduled in this tick has queued its item
+        if not self._scheduled:
+            self._scheduled = True
+            loop.call_soon(self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """Start one bulk call per pending group"""
+        self._scheduled = False
+        pending, self._pending = self._pending, {}
+        for group_key, batch in pending.items():
+            task = asyncio.ensure_future(self._dispatch(group_key, batch))
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+
+    async def _dispatch(self, group_key: Hashable, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        """
+        Send one group and resolve the futures of its callers.
+
+        Args:
+            group_key: Group the batch belongs to
+            batch: Queued items and their futures
+        """
+        try:
+            results = await self._load_many(group_key, [item for item, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"Bulk call returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            # Bulk tools report a failed item as {"error": ...}; fail that caller only
+            if isinstance(result, dict) and "error" in result:
+                future.set_exception(RuntimeError(result["error"]))
+            else:
+                future.set_result(result)
+
+
+def rule_creation_loader(client) -> CoalescingLoader:
+    """
+    Build a loader that coalesces rule creations into bulk_create_rules calls.
+
+    Rules for the same location created in one tick are sent together:
+
+        loader = rule_creation_loader(client)
+        rule = await loader.load(location_id, {"name": "...", "actions": [...]})
+
+    Args:
+        client: SmartThingsMCPClient instance
+
+    Returns:
+        CoalescingLoader keyed by location ID
+    """
+    async def create_many(location_id, rules):
+        return _bulk_items(await client.bulk_create_rules(rules, location_id=location_id))
+
+    return CoalescingLoader(create_many)
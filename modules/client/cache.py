@@ -3,10 +3,31 @@ Caching module for SmartThingsMCP Client
 Implements TTL-based caching for read-only API operations
 """
 import time
-import json
-import hashlib
-from typing import Dict, Any, Optional, Tuple
-from collections import OrderedDict
+from typing import Dict, Any, Optional, Set, Tuple, Hashable
+
+
+def _canon(obj: Any) -> Hashable:
+    """
+    Convert a parameter value into a hashable, order-independent form.
+    
+    Dicts become sorted tuples of items and lists become tuples, so that
+    equal parameters always produce equal keys.
+    
+    Args:
+        obj: Value to canonicalize
+        
+    Returns:
+        Hashable equivalent of the value
+    """
+    if isinstance(obj, dict):
+        return tuple(sorted((key, _canon(value)) for key, value in obj.items()))
+    if isinstance(obj, (list, tuple)):
+        return tuple(_canon(item) for item in obj)
+    return obj
+
+
+# Parameter value types that need recursive canonicalization
+_NESTED_TYPES = (dict, list, tuple)
 
 
 class CacheMixin:
@@ -15,31 +36,44 @@ class CacheMixin:
     Uses TTL-based caching with automatic invalidation for write operations.
     """
     
+    # Only one base of a class may add slot storage, so the cache attributes
+    # (CACHE_SLOTS) are declared on the concrete client alongside BaseClient
+    __slots__ = ()
+    CACHE_SLOTS = ('_cache', '_cache_by_tool', '_cache_ttl', '_cache_enabled',
+                   '_max_cache_size', '_cache_hits', '_cache_misses', '_disk_cache')
+    
     # Default cache TTL in seconds (5 minutes)
     DEFAULT_CACHE_TTL = 300
     
     # Operations that should be cached (read-only operations)
-    CACHEABLE_OPERATIONS = {
+    CACHEABLE_OPERATIONS = frozenset({
         'list_locations',
+        'list_locations_page',
         'get_location',
         'list_devices',
         'get_device',
+        'list_rooms',
         'get_location_rooms',
+        'get_location_rooms_page',
         'get_room',
         'list_modes',
         'get_current_mode',
         'list_scenes',
+        'list_scenes_page',
         'get_scene',
         'list_rules',
+        'list_rules_page',
         'get_rule',
         'get_device_components',
         'get_device_capabilities',
         'get_device_health',
-    }
+    })
     
     # Operations that invalidate cache (write operations)
-    CACHE_INVALIDATING_OPERATIONS = {
+    CACHE_INVALIDATING_OPERATIONS = frozenset({
         'execute_command',
+        'execute_commands',
+        'bulk_execute_commands',
         'create_location',
         'update_location',
         'delete_location',
@@ -54,24 +88,38 @@ class CacheMixin:
         'update_rule',
         'delete_rule',
         'execute_rule',
-    }
+        'bulk_create_rules',
+        'bulk_update_rules',
+        'bulk_delete_rules',
+        'bulk_create_scenes',
+        'bulk_update_scenes',
+        'bulk_delete_scenes',
+    })
     
     # Cache invalidation patterns: which operations invalidate which cached data
     INVALIDATION_PATTERNS = {
         'execute_command': ['get_device_status', 'get_device'],
+        'execute_commands': ['get_device_status', 'get_device'],
+        'bulk_execute_commands': ['get_device_status', 'get_device'],
         'update_device': ['list_devices', 'get_device'],
         'delete_device': ['list_devices'],
-        'create_location': ['list_locations'],
-        'update_location': ['list_locations', 'get_location'],
-        'delete_location': ['list_locations'],
-        'create_room': ['get_location_rooms'],
-        'update_room': ['get_location_rooms', 'get_room'],
-        'delete_room': ['get_location_rooms'],
+        'create_location': ['list_locations', 'list_locations_page'],
+        'update_location': ['list_locations', 'list_locations_page', 'get_location'],
+        'delete_location': ['list_locations', 'list_locations_page'],
+        'create_room': ['list_rooms', 'get_location_rooms', 'get_location_rooms_page'],
+        'update_room': ['list_rooms', 'get_location_rooms', 'get_location_rooms_page', 'get_room'],
+        'delete_room': ['list_rooms', 'get_location_rooms', 'get_location_rooms_page'],
         'set_mode': ['get_current_mode'],
-        'create_rule': ['list_rules'],
-        'update_rule': ['list_rules', 'get_rule'],
-        'delete_rule': ['list_rules', 'get_rule'],
+        'create_rule': ['list_rules', 'list_rules_page'],
+        'update_rule': ['list_rules', 'list_rules_page', 'get_rule'],
+        'delete_rule': ['list_rules', 'list_rules_page', 'get_rule'],
         'execute_rule': [],  # Executing a rule doesn't change rule list
+        'bulk_create_rules': ['list_rules', 'list_rules_page'],
+        'bulk_update_rules': ['list_rules', 'list_rules_page', 'get_rule'],
+        'bulk_delete_rules': ['list_rules', 'list_rules_page', 'get_rule'],
+        'bulk_create_scenes': ['list_scenes', 'list_scenes_page'],
+        'bulk_update_scenes': ['list_scenes', 'list_scenes_page', 'get_scene'],
+        'bulk_delete_scenes': ['list_scenes', 'list_scenes_page', 'get_scene'],
     }
     
     def __init__(self, *args, **kwargs):
@@ -80,12 +128,17 @@ class CacheMixin:
         cache_ttl = kwargs.pop('cache_ttl', self.DEFAULT_CACHE_TTL)
         enable_cache = kwargs.pop('enable_cache', True)
         max_cache_size = kwargs.pop('max_cache_size', 1000)
+        disk_cache_dir = kwargs.pop('disk_cache_dir', None)
         
         # Call parent __init__ with remaining args/kwargs
         super().__init__(*args, **kwargs)
         
-        # Cache storage: {cache_key: (result, timestamp)}
-        self._cache: OrderedDict[str, Tuple[Any, float]] = OrderedDict()
+        # Cache storage: {cache_key: (result, deadline)}
+        # Plain dicts keep insertion order, so the first key is the least recently used
+        self._cache: Dict[Tuple[str, Hashable], Tuple[Any, float]] = {}
+        
+        # Index of cached keys by tool name, so invalidation doesn't scan the whole cache
+        self._cache_by_tool: Dict[str, Set[Tuple[str, Hashable]]] = {}
         
         # Cache TTL in seconds
         self._cache_ttl = cache_ttl
@@ -99,39 +152,47 @@ class CacheMixin:
         # Cache statistics
         self._cache_hits = 0
         self._cache_misses = 0
+        
+        # Optional persistent tier, so one-shot CLI runs can reuse earlier results
+        self._disk_cache = None
+        if disk_cache_dir:
+            from .disk_cache import DiskCache
+            self._disk_cache = DiskCache(disk_cache_dir)
     
-    def _generate_cache_key(self, tool_name: str, params: Dict[str, Any]) -> str:
+    def _generate_cache_key(self, tool_name: str, params: Dict[str, Any]) -> Tuple[str, Hashable]:
         """
         Generate a unique cache key for a tool call.
         
+        The key is a plain tuple, so dictionary lookups hash it natively
+        without serializing the parameters. Flat parameters (the usual
+        device_id/location_id calls) skip the recursive canonicalization.
+        
         Args:
             tool_name: Name of the tool
             params: Parameters passed to the tool
             
         Returns:
-            Cache key string
+            Cache key tuple of (tool_name, canonical params)
         """
-        # Sort params for consistent key generation
-        sorted_params = json.dumps(params, sort_keys=True)
-        
-        # Create hash of params for shorter key
-        params_hash = hashlib.md5(sorted_params.encode()).hexdigest()[:8]
-        
-        return f"{tool_name}:{params_hash}"
+        items = tuple(sorted(params.items()))
+        for _, value in items:
+            if isinstance(value, _NESTED_TYPES):
+                return (tool_name, _canon(params))
+        return (tool_name, items)
     
-    def _is_cache_valid(self, timestamp: float) -> bool:
+    def _is_cache_valid(self, deadline: float) -> bool:
         """
         Check if cached entry is still valid based on TTL.
         
         Args:
-            timestamp: Timestamp when entry was cached
+            deadline: time.monotonic() value at which the entry expires
             
         Returns:
             True if cache entry is still valid
         """
-        return (time.time() - timestamp) < self._cache_ttl
+        return deadline > time.monotonic()
     
-    def _get_from_cache(self, cache_key: str) -> Optional[Any]:
+    def _get_from_cache(self, cache_key: Tuple[str, Hashable]) -> Optional[Any]:
         """
         Get value from cache if valid.
         
@@ -144,22 +205,33 @@ class CacheMixin:
         if not self._cache_enabled:
             return None
         
-        if cache_key in self._cache:
-            result, timestamp = self._cache[cache_key]
+        entry = self._cache.pop(cache_key, None)
+        if entry is not None:
+            result, deadline = entry
             
-            if self._is_cache_valid(timestamp):
-                # Move to end (LRU)
-                self._cache.move_to_end(cache_key)
+            if self._is_cache_valid(deadline):
+                # Re-insert to move to end (LRU)
+                self._cache[cache_key] = entry
+                self._cache_hits += 1
+                return result
+            
+            # Expired - leave it out of the cache
+            self._unindex_cache_key(cache_key)
+        
+        # Fall through to the disk tier and promote hits into memory, keeping
+        # the time they had left on disk
+        if self._disk_cache is not None:
+            entry = self._disk_cache.get(cache_key)
+            if entry is not None:
+                result, remaining = entry
+                self._store_in_memory(cache_key, result, remaining)
                 self._cache_hits += 1
                 return result
-            else:
-                # Expired - remove from cache
-                del self._cache[cache_key]
         
         self._cache_misses += 1
         return None
     
-    def _put_in_cache(self, cache_key: str, result: Any) -> None:
+    def _put_in_cache(self, cache_key: Tuple[str, Hashable], result: Any) -> None:
         """
         Store value in cache.
         
@@ -170,15 +242,45 @@ class CacheMixin:
         if not self._cache_enabled:
             return
         
-        # Add to cache with current timestamp
-        self._cache[cache_key] = (result, time.time())
+        self._store_in_memory(cache_key, result)
+        if self._disk_cache is not None:
+            self._disk_cache.set(cache_key, result, self._cache_ttl)
+    
+    def _store_in_memory(self, cache_key: Tuple[str, Hashable], result: Any,
+                         ttl: Optional[float] = None) -> None:
+        """
+        Store value in the in-memory tier only.
         
-        # Move to end (most recently used)
-        self._cache.move_to_end(cache_key)
+        Args:
+            cache_key: Cache key
+            result: Result to cache
+            ttl: Seconds until the entry expires (default: the cache TTL)
+        """
+        # New keys are inserted at the end already; a refreshed key is popped so it moves there
+        if self._cache.pop(cache_key, None) is None:
+            self._cache_by_tool.setdefault(cache_key[0], set()).add(cache_key)
         
-        # Evict oldest entries if cache is full (LRU)
-        while len(self._cache) > self._max_cache_size:
-            self._cache.popitem(last=False)
+        # Add to cache with its expiry deadline (monotonic, immune to clock changes)
+        self._cache[cache_key] = (result, time.monotonic() + (self._cache_ttl if ttl is None else ttl))
+        
+        # Evict the oldest entry if cache is full (LRU); one insert adds at most one entry
+        if len(self._cache) > self._max_cache_size:
+            evicted_key = next(iter(self._cache))
+            del self._cache[evicted_key]
+            self._unindex_cache_key(evicted_key)
+    
+    def _unindex_cache_key(self, cache_key: Tuple[str, Hashable]) -> None:
+        """
+        Remove a key from the per-tool index.
+        
+        Args:
+            cache_key: Cache key that was removed from the cache
+        """
+        keys = self._cache_by_tool.get(cache_key[0])
+        if keys is not None:
+            keys.discard(cache_key)
+            if not keys:
+                del self._cache_by_tool[cache_key[0]]
     
     def _invalidate_cache_pattern(self, pattern: str) -> None:
         """
@@ -190,14 +292,12 @@ class CacheMixin:
         if not self._cache_enabled:
             return
         
-        # Find and remove all matching cache entries
-        keys_to_remove = [
-            key for key in self._cache.keys()
-            if key.startswith(f"{pattern}:")
-        ]
+        # Remove only the entries indexed under this tool name
+        for key in self._cache_by_tool.pop(pattern, ()):
+            self._cache.pop(key, None)
         
-        for key in keys_to_remove:
-            del self._cache[key]
+        if self._disk_cache is not None:
+            self._disk_cache.invalidate(pattern)
     
     def _invalidate_cache_for_operation(self, tool_name: str) -> None:
         """
@@ -206,14 +306,22 @@ class CacheMixin:
         Args:
             tool_name: Name of the write operation
         """
-        if tool_name in self.INVALIDATION_PATTERNS:
-            patterns = self.INVALIDATION_PATTERNS[tool_name]
-            for pattern in patterns:
-                self._invalidate_cache_pattern(pattern)
+        for pattern in self.INVALIDATION_PATTERNS.get(tool_name, ()):
+            self._invalidate_cache_pattern(pattern)
+    
+    async def aclose(self) -> None:
+        """Close the session and the disk cache, if one is open"""
+        await super().aclose()
+        if self._disk_cache is not None:
+            self._disk_cache.close()
+            self._disk_cache = None
     
     def clear_cache(self) -> None:
         """Clear all cached entries"""
         self._cache.clear()
+        self._cache_by_tool.clear()
+        if self._disk_cache is not None:
+            self._disk_cache.clear()
         self._cache_hits = 0
         self._cache_misses = 0
     
@@ -253,6 +361,8 @@ class CacheMixin:
         """
         Set cache TTL.
         
+        The new TTL applies to entries cached from now on.
+        
         Args:
             ttl_seconds: Time-to-live in seconds
         """
@@ -1,7 +1,13 @@
 """
 Devices module for SmartThingsMCP Client
 """
-from typing import Dict, Any, Optional, List
+import asyncio
+from typing import Dict, Any, Optional, List, Tuple, Callable, Awaitable, Iterable
+
+from .utils import tool_method
+
+# Default number of device calls allowed in flight at once for the batch helpers
+DEFAULT_DEVICE_CONCURRENCY = 16
 
 
 class DevicesMixin:
@@ -9,9 +15,13 @@ class DevicesMixin:
     Mixin class for device-related endpoints.
     To be used with the SmartThingsMCPClient class.
     """
+    
+    __slots__ = ()
 
+    @tool_method("list_devices")
     async def list_devices(self, capability: Optional[str] = None, device_id: Optional[str] = None,
-                    location_id: Optional[str] = None, room_id: Optional[str] = None) -> Dict[str, Any]:
+                    location_id: Optional[str] = None, room_id: Optional[str] = None,
+                    summary: Optional[bool] = None) -> Dict[str, Any]:
         """
         Get a list of devices.
         
@@ -20,22 +30,13 @@ class DevicesMixin:
             device_id: Filter by device ID
             location_id: Filter by location ID
             room_id: Filter by room ID
+            summary: Return only each device's identifying fields and capability IDs
             
         Returns:
             List of devices matching the filters
         """
-        args = {}
-        if capability:
-            args["capability"] = capability
-        if device_id:
-            args["device_id"] = device_id
-        if location_id:
-            args["location_id"] = location_id
-        if room_id:
-            args["room_id"] = room_id
-            
-        return await self.call_tool("list_devices", **args)
     
+    @tool_method("get_device")
     async def get_device(self, device_id: str) -> Dict[str, Any]:
         """
         Get a specific device by ID.
@@ -46,8 +47,20 @@ class DevicesMixin:
         Returns:
             Device details
         """
-        return await self.call_tool("get_device", device_id=device_id)
     
+    @tool_method("get_devices_many")
+    async def get_devices_many(self, device_ids: List[str]) -> Dict[str, Any]:
+        """
+        Get several devices in one tool call, fanned out on the server.
+        
+        Args:
+            device_ids: Device IDs to retrieve
+            
+        Returns:
+            Dictionary with an 'items' list of device details (or {"error": ...}), in request order
+        """
+    
+    @tool_method("delete_device")
     async def delete_device(self, device_id: str) -> Dict[str, Any]:
         """
         Delete a device.
@@ -58,8 +71,8 @@ class DevicesMixin:
         Returns:
             Delete operation result
         """
-        return await self.call_tool("delete_device", device_id=device_id)
     
+    @tool_method("update_device")
     async def update_device(self, device_id: str, label: str) -> Dict[str, Any]:
         """
         Update a device.
@@ -71,8 +84,8 @@ class DevicesMixin:
         Returns:
             Updated device details
         """
-        return await self.call_tool("update_device", device_id=device_id, label=label)
     
+    @tool_method("execute_command", fill={"arguments": []})
     async def execute_command(self, device_id: str, component: str, capability: str, 
                      command: str, arguments: Optional[List[Any]] = None) -> Dict[str, Any]:
         """
@@ -88,9 +101,35 @@ class DevicesMixin:
         Returns:
             Command execution result
         """
-        return await self.call_tool("execute_command", device_id=device_id, component=component,
-                            capability=capability, command=command, arguments=arguments or [])
     
+    @tool_method("execute_commands")
+    async def execute_commands(self, device_id: str, commands: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Execute several commands on one device in a single API request.
+        
+        Args:
+            device_id: Device ID to execute the commands on
+            commands: Commands to send, each with capability, command and
+                optional component (default 'main') and arguments
+            
+        Returns:
+            Command execution result, with one entry per command
+        """
+    
+    @tool_method("bulk_execute_commands")
+    async def bulk_execute_commands(self, commands: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Execute commands on several devices in one tool call.
+        
+        Args:
+            commands: Commands to send, each with device_id, capability, command and
+                optional component (default 'main') and arguments
+            
+        Returns:
+            Dictionary with an 'items' list of command results (or {"error": ...}), in request order
+        """
+    
+    @tool_method("get_device_status")
     async def get_device_status(self, device_id: str, component_id: Optional[str] = None,
                        capability_id: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -104,14 +143,8 @@ class DevicesMixin:
         Returns:
             Device status
         """
-        args = {"device_id": device_id}
-        if component_id:
-            args["component_id"] = component_id
-        if capability_id:
-            args["capability_id"] = capability_id
-            
-        return await self.call_tool("get_device_status", **args)
     
+    @tool_method("get_device_components")
     async def get_device_components(self, device_id: str) -> Dict[str, Any]:
         """
         Get the components of a device.
@@ -122,8 +155,8 @@ class DevicesMixin:
         Returns:
             Device components
         """
-        return await self.call_tool("get_device_components", device_id=device_id)
     
+    @tool_method("get_device_capabilities")
     async def get_device_capabilities(self, device_id: str, component_id: str) -> Dict[str, Any]:
         """
         Get the capabilities of a device component.
@@ -135,8 +168,8 @@ class DevicesMixin:
         Returns:
             Component capabilities
         """
-        return await self.call_tool("get_device_capabilities", device_id=device_id, component_id=component_id)
     
+    @tool_method("get_device_health")
     async def get_device_health(self, device_id: str) -> Dict[str, Any]:
         """
         Get the health status of a device.
@@ -147,4 +180,94 @@ class DevicesMixin:
         Returns:
             Device health status
         """
-        return await self.call_tool("get_device_health", device_id=device_id)
+    
+    @tool_method("get_device_status_many")
+    async def get_device_status_many(self, device_ids: List[str]) -> Dict[str, Any]:
+        """
+        Get the status of several devices in one tool call, fanned out on the server.
+        
+        Args:
+            device_ids: Device IDs to get status for
+            
+        Returns:
+            Dictionary with an 'items' list of device statuses (or {"error": ...}), in request order
+        """
+    
+    @tool_method("get_device_health_many")
+    async def get_device_health_many(self, device_ids: List[str]) -> Dict[str, Any]:
+        """
+        Get the health status of several devices in one tool call, fanned out on the server.
+        
+        Args:
+            device_ids: Device IDs to get health status for
+            
+        Returns:
+            Dictionary with an 'items' list of health statuses (or {"error": ...}), in request order
+        """
+    
+    async def _gather_limited(self, call: Callable[[Any], Awaitable[Any]],
+                              items: Iterable[Any], concurrency: int) -> List[Any]:
+        """
+        Run call(item) for every item concurrently, with at most concurrency in flight.
+        
+        Args:
+            call: Coroutine function to run for each item
+            items: Items to pass to call
+            concurrency: Maximum number of concurrent calls
+            
+        Returns:
+            Results in the same order as items
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def run_one(item):
+            async with semaphore:
+                return await call(item)
+        
+        return await asyncio.gather(*(run_one(item) for item in items))
+    
+    async def get_devices(self, device_ids: List[str],
+                          concurrency: int = DEFAULT_DEVICE_CONCURRENCY) -> List[Dict[str, Any]]:
+        """
+        Get several devices concurrently.
+        
+        Calls share the client's persistent session, so this does not open
+        a connection per device.
+        
+        Args:
+            device_ids: Device IDs to retrieve
+            concurrency: Maximum number of requests in flight at once
+            
+        Returns:
+            Device details in the same order as device_ids
+        """
+        return await self._gather_limited(self.get_device, device_ids, concurrency)
+    
+    async def get_device_statuses(self, device_ids: List[str],
+                                  concurrency: int = DEFAULT_DEVICE_CONCURRENCY) -> List[Dict[str, Any]]:
+        """
+        Get the status of several devices concurrently.
+        
+        Args:
+            device_ids: Device IDs to get status for
+            concurrency: Maximum number of requests in flight at once
+            
+        Returns:
+            Device statuses in the same order as device_ids
+        """
+        return await self._gather_limited(self.get_device_status, device_ids, concurrency)
+    
+    async def get_components_capabilities(self, components: List[Tuple[str, str]],
+                                          concurrency: int = DEFAULT_DEVICE_CONCURRENCY) -> List[Dict[str, Any]]:
+        """
+        Get the capabilities of several device components concurrently.
+        
+        Args:
+            components: (device_id, component_id) pairs
+            concurrency: Maximum number of requests in flight at once
+            
+        Returns:
+            Component capabilities in the same order as components
+        """
+        return await self._gather_limited(
+            lambda component: self.get_device_capabilities(*component), components, concurrency)
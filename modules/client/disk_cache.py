@@ -0,0 +1,214 @@
+"""
+Disk cache module for SmartThingsMCP Client
+Persists cached tool results across processes in a compressed SQLite store
+"""
+import os
+import time
+import hashlib
+import zlib
+import sqlite3
+import logging
+from typing import Any, Hashable, Optional, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+from mcp.types import ContentBlock
+from fastmcp.client.client import CallToolResult
+
+from . import _json
+from .utils import _tool_object_to_dict
+
+logger = logging.getLogger(__name__)
+
+# Errors that make an entry unstorable or unreadable; the disk tier skips it.
+# Undecodable JSON and invalid content blocks raise ValueError subclasses
+_DISK_ERRORS = (sqlite3.Error, zlib.error, TypeError, ValueError, KeyError, ValidationError)
+
+_CONTENT_BLOCKS = TypeAdapter(list[ContentBlock])
+
+# Hex length of a row key; older rows keyed by the plain cache key are purged
+_KEY_SIZE = 16
+
+
+def _disk_key(cache_key: Tuple[str, Hashable]) -> str:
+    """
+    Build the row key for a cache key.
+
+    Cache keys include the auth token, so only a digest is stored.
+
+    Args:
+        cache_key: Client cache key
+
+    Returns:
+        Hex digest of the cache key
+    """
+    return hashlib.blake2b(repr(cache_key).encode(), digest_size=_KEY_SIZE).hexdigest()
+
+
+def _encode(value: Any) -> bytes:
+    """
+    Serialize a tool result to compressed JSON.
+
+    CallToolResult objects are tagged so they are rebuilt as such on read;
+    anything else is stored as its JSON equivalent.
+
+    Args:
+        value: Result to store
+
+    Returns:
+        zlib-compressed JSON bytes
+    """
+    if isinstance(value, CallToolResult):
+        value = {"tool_result": {
+            "content": value.content,
+            "structured_content": value.structured_content,
+            "meta": value.meta,
+            "data": value.data,
+            "is_error": value.is_error,
+        }}
+    else:
+        value = {"value": value}
+    return zlib.compress(_json.dumps_bytes(value, default=_tool_object_to_dict))
+
+
+def _decode(blob: bytes) -> Any:
+    """
+    Rebuild a tool result stored by _encode.
+
+    Args:
+        blob: Stored bytes
+
+    Returns:
+        The stored result
+    """
+    stored = _json.loads(zlib.decompress(blob))
+    if "tool_result" not in stored:
+        return stored["value"]
+
+    result = stored["tool_result"]
+    return CallToolResult(
+        content=_CONTENT_BLOCKS.validate_python(result["content"]),
+        structured_content=result["structured_content"],
+        meta=result["meta"],
+        data=result["data"],
+        is_error=result["is_error"],
+    )
+
+
+class DiskCache:
+    """
+    Persistent cache tier for tool results.
+
+    Entries are stored as zlib-compressed JSON in a SQLite database under
+    the cache directory, with a wall-clock expiry so they stay valid across
+    processes. Rows are keyed by a digest of the client's cache key, so the
+    auth token in it is never written. Stored data is only ever parsed,
+    never executed, and a new directory and database are readable by their
+    owner only.
+    """
+
+    __slots__ = ('path', '_db')
+
+    FILENAME = "smartthings_mcp_cache.sqlite3"
+
+    def __init__(self, directory: str):
+        """
+        Open (or create) the disk cache.
+
+        Args:
+            directory: Directory holding the cache database
+        """
+        directory = os.path.expanduser(directory)
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        self.path = os.path.join(directory, self.FILENAME)
+
+        # Create the database owner-only before SQLite opens it; SQLite gives
+        # its WAL and shared-memory files the same permissions
+        os.close(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600))
+
+        self._db = sqlite3.connect(self.path, isolation_level=None)
+        # WAL lets concurrent CLI runs read while another one writes
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, tool TEXT NOT NULL, "
+            "expires REAL NOT NULL, value BLOB NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS cache_tool ON cache (tool)")
+
+        # Drop entries that expired since the last run, and rows written with
+        # the plain cache key, which held the auth token
+        self._db.execute(
+            "DELETE FROM cache WHERE expires <= ? OR length(key) != ?",
+            (time.time(), _KEY_SIZE * 2),
+        )
+
+    def get(self, cache_key: Tuple[str, Hashable]) -> Optional[Tuple[Any, float]]:
+        """
+        Get a value from the disk cache if present and not expired.
+
+        Args:
+            cache_key: Cache key to lookup
+
+        Returns:
+            Tuple of (cached value, seconds until it expires) if valid, None otherwise
+        """
+        key = _disk_key(cache_key)
+        try:
+            row = self._db.execute(
+                "SELECT expires, value FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            expires, value = row
+            remaining = expires - time.time()
+            if remaining <= 0:
+                self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+
+            return _decode(value), remaining
+        except _DISK_ERRORS as e:
+            logger.debug("Disk cache read failed for %s: %s", cache_key[0], e)
+            return None
+
+    def set(self, cache_key: Tuple[str, Hashable], value: Any, ttl: float) -> None:
+        """
+        Store a value in the disk cache.
+
+        Args:
+            cache_key: Cache key
+            value: Result to cache
+            ttl: Time-to-live in seconds
+        """
+        try:
+            blob = _encode(value)
+            self._db.execute(
+                "INSERT OR REPLACE INTO cache (key, tool, expires, value) VALUES (?, ?, ?, ?)",
+                (_disk_key(cache_key), cache_key[0], time.time() + ttl, blob),
+            )
+        except _DISK_ERRORS as e:
+            logger.debug("Disk cache write failed for %s: %s", cache_key[0], e)
+
+    def invalidate(self, tool_name: str) -> None:
+        """
+        Remove all entries cached for a tool.
+
+        Args:
+            tool_name: Tool whose entries should be removed
+        """
+        try:
+            self._db.execute("DELETE FROM cache WHERE tool = ?", (tool_name,))
+        except sqlite3.Error as e:
+            logger.debug("Disk cache invalidation failed for %s: %s", tool_name, e)
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        try:
+            self._db.execute("DELETE FROM cache")
+        except sqlite3.Error as e:
+            logger.debug("Disk cache clear failed: %s", e)
+
+    def close(self) -> None:
+        """Close the database connection"""
+        self._db.close()
@@ -1,7 +1,9 @@
 """
 Locations module for SmartThingsMCP Client
 """
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, AsyncIterator
+
+from .utils import tool_method
 
 
 class LocationsMixin:
@@ -9,7 +11,10 @@ class LocationsMixin:
     Mixin class for location-related endpoints.
     To be used with the SmartThingsMCPClient class.
     """
+    
+    __slots__ = ()
 
+    @tool_method("list_locations")
     async def list_locations(self) -> Dict[str, Any]:
         """
         Get a list of all locations.
@@ -17,8 +22,42 @@ class LocationsMixin:
         Returns:
             List of locations
         """
-        return await self.call_tool("list_locations")
     
+    @tool_method("list_locations_page")
+    async def list_locations_page(self, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get one page of locations.
+        
+        Args:
+            cursor: Cursor returned with the previous page; omit for the first page
+            
+        Returns:
+            Dictionary with the page's 'items' and the 'cursor' of the next page
+        """
+    
+    def iter_locations(self) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate over all locations, fetching the next page while the current one is consumed.
+        
+        Returns:
+            Async iterator over locations
+        """
+        return self.iter_tool_pages("list_locations_page")
+    
+    @tool_method("list_location_overview")
+    async def list_location_overview(self, location_id: str) -> Dict[str, Any]:
+        """
+        Get the devices, rules and scenes of a location in one tool call.
+        
+        Args:
+            location_id: Location ID to get the overview for
+            
+        Returns:
+            Dictionary with 'devices', 'rules' and 'scenes' (each the list response,
+            or {"error": ...} if that part failed)
+        """
+    
+    @tool_method("get_location")
     async def get_location(self, location_id: str) -> Dict[str, Any]:
         """
         Get a specific location by ID.
@@ -29,8 +68,8 @@ class LocationsMixin:
         Returns:
             Location details
         """
-        return await self.call_tool("get_location", location_id=location_id)
     
+    @tool_method("create_location")
     async def create_location(self, name: str, country_code: str, 
                            latitude: Optional[float] = None, 
                            longitude: Optional[float] = None, 
@@ -52,26 +91,8 @@ class LocationsMixin:
         Returns:
             Created location details
         """
-        args = {
-            "name": name,
-            "country_code": country_code
-        }
-        
-        if latitude is not None and longitude is not None:
-            args["latitude"] = latitude
-            args["longitude"] = longitude
-            
-        if region_code:
-            args["region_code"] = region_code
-            
-        if locality:
-            args["locality"] = locality
-            
-        if address_lines:
-            args["address_lines"] = address_lines
-            
-        return await self.call_tool("create_location", **args)
     
+    @tool_method("update_location")
     async def update_location(self, location_id: str, name: str, 
                            country_code: Optional[str] = None, 
                            latitude: Optional[float] = None, 
@@ -95,29 +116,8 @@ class LocationsMixin:
         Returns:
             Updated location details
         """
-        args = {
-            "location_id": location_id,
-            "name": name
-        }
-        
-        if country_code:
-            args["country_code"] = country_code
-            
-        if latitude is not None and longitude is not None:
-            args["latitude"] = latitude
-            args["longitude"] = longitude
-            
-        if region_code:
-            args["region_code"] = region_code
-            
-        if locality:
-            args["locality"] = locality
-            
-        if address_lines:
-            args["address_lines"] = address_lines
-            
-        return await self.call_tool("update_location", **args)
     
+    @tool_method("delete_location")
     async def delete_location(self, location_id: str) -> Dict[str, Any]:
         """
         Delete a location.
@@ -128,4 +128,3 @@ class LocationsMixin:
         Returns:
             Delete operation result
         """
-        return await self.call_tool("delete_location", location_id=location_id)
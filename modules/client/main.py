@@ -34,10 +34,12 @@ class SmartThingsMCPClient(
     - Cache statistics tracking
     """
     
+    __slots__ = CacheMixin.CACHE_SLOTS
+    
     def __init__(self, host: str = "127.0.0.1", port: int = 8000, 
                 auth_token: str = None, transport: str = "stdio",
                 enable_cache: bool = True, cache_ttl: int = 300,
-                max_cache_size: int = 1000):
+                max_cache_size: int = 1000, disk_cache_dir: str = None):
         """
         Initialize the SmartThings MCP Client with caching.
         
@@ -49,9 +51,11 @@ class SmartThingsMCPClient(
             enable_cache: Enable caching (default: True)
             cache_ttl: Cache time-to-live in seconds (default: 300 = 5 min)
             max_cache_size: Maximum cache size (default: 1000 entries)
+            disk_cache_dir: Directory for a persistent cache tier shared across runs (default: disabled)
         """
         # Initialize the base client with cache settings
         super().__init__(host, port, auth_token, transport,
                         enable_cache=enable_cache,
                         cache_ttl=cache_ttl,
-                        max_cache_size=max_cache_size)
+                        max_cache_size=max_cache_size,
+                        disk_cache_dir=disk_cache_dir)
@@ -3,13 +3,18 @@ Modes module for SmartThingsMCP Client
 """
 from typing import Dict, Any
 
+from .utils import tool_method
+
 
 class ModesMixin:
     """
     Mixin class for mode-related endpoints.
     To be used with the SmartThingsMCPClient class.
     """
+    
+    __slots__ = ()
 
+    @tool_method("list_modes")
     async def list_modes(self, location_id: str) -> Dict[str, Any]:
         """
         List all modes for a location.
@@ -20,8 +25,8 @@ class ModesMixin:
         Returns:
             List of modes for the location
         """
-        return await self.call_tool("list_modes", location_id=location_id)
     
+    @tool_method("get_mode")
     async def get_mode(self, location_id: str, mode_id: str) -> Dict[str, Any]:
         """
         Get a specific mode by ID.
@@ -33,8 +38,8 @@ class ModesMixin:
         Returns:
             Mode details
         """
-        return await self.call_tool("get_mode", location_id=location_id, mode_id=mode_id)
     
+    @tool_method("get_current_mode")
     async def get_current_mode(self, location_id: str) -> Dict[str, Any]:
         """
         Get the current mode for a location.
@@ -45,8 +50,8 @@ class ModesMixin:
         Returns:
             Current mode details
         """
-        return await self.call_tool("get_current_mode", location_id=location_id)
     
+    @tool_method("set_mode")
     async def set_mode(self, location_id: str, mode_id: str) -> Dict[str, Any]:
         """
         Set the current mode for a location.
@@ -58,4 +63,3 @@ class ModesMixin:
         Returns:
             Mode change result
         """
-        return await self.call_tool("set_mode", location_id=location_id, mode_id=mode_id)
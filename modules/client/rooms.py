@@ -1,7 +1,9 @@
 """
 Rooms module for SmartThingsMCP Client
 """
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, AsyncIterator
+
+from .utils import tool_method
 
 
 class RoomsMixin:
@@ -9,7 +11,10 @@ class RoomsMixin:
     Mixin class for room-related endpoints.
     To be used with the SmartThingsMCPClient class.
     """
+    
+    __slots__ = ()
 
+    @tool_method("get_location_rooms")
     async def get_location_rooms(self, location_id: str) -> Dict[str, Any]:
         """
         Get rooms in a location.
@@ -20,8 +25,45 @@ class RoomsMixin:
         Returns:
             List of rooms in the location
         """
-        return await self.call_tool("get_location_rooms", location_id=location_id)
+    
+    @tool_method("get_location_rooms_many")
+    async def get_location_rooms_many(self, location_ids: List[str]) -> Dict[str, Any]:
+        """
+        Get the rooms of several locations in one tool call.
         
+        Args:
+            location_ids: Location IDs to get rooms for
+            
+        Returns:
+            Dictionary with an 'items' list holding each location's rooms (or {"error": ...}), in request order
+        """
+    
+    @tool_method("get_location_rooms_page")
+    async def get_location_rooms_page(self, location_id: str, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get one page of rooms in a location.
+        
+        Args:
+            location_id: Location ID to get rooms for
+            cursor: Cursor returned with the previous page; omit for the first page
+            
+        Returns:
+            Dictionary with the page's 'items' and the 'cursor' of the next page
+        """
+    
+    def iter_rooms(self, location_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate over the rooms in a location, fetching the next page while the current one is consumed.
+        
+        Args:
+            location_id: Location ID to get rooms for
+            
+        Returns:
+            Async iterator over rooms
+        """
+        return self.iter_tool_pages("get_location_rooms_page", location_id=location_id)
+    
+    @tool_method("get_room")
     async def get_room(self, location_id: str, room_id: str) -> Dict[str, Any]:
         """
         Get a specific room by ID.
@@ -33,8 +75,8 @@ class RoomsMixin:
         Returns:
             Room details
         """
-        return await self.call_tool("get_room", location_id=location_id, room_id=room_id)
     
+    @tool_method("create_room")
     async def create_room(self, location_id: str, name: str) -> Dict[str, Any]:
         """
         Create a room in a location.
@@ -46,8 +88,8 @@ class RoomsMixin:
         Returns:
             Created room details
         """
-        return await self.call_tool("create_room", location_id=location_id, name=name)
     
+    @tool_method("update_room")
     async def update_room(self, location_id: str, room_id: str, name: str) -> Dict[str, Any]:
         """
         Update a room in a location.
@@ -60,8 +102,8 @@ class RoomsMixin:
         Returns:
             Updated room details
         """
-        return await self.call_tool("update_room", location_id=location_id, room_id=room_id, name=name)
     
+    @tool_method("delete_room")
     async def delete_room(self, location_id: str, room_id: str) -> Dict[str, Any]:
         """
         Delete a room from a location.
@@ -73,4 +115,3 @@ class RoomsMixin:
         Returns:
             Delete operation result
         """
-        return await self.call_tool("delete_room", location_id=location_id, room_id=room_id)
@@ -1,7 +1,9 @@
 """
 Rules module for SmartThingsMCP Client
 """
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, AsyncIterator
+
+from .utils import tool_method
 
 
 class RulesMixin:
@@ -9,7 +11,10 @@ class RulesMixin:
     Mixin class for rule-related endpoints.
     To be used with the SmartThingsMCPClient class.
     """
+    
+    __slots__ = ()
 
+    @tool_method("list_rules")
     async def list_rules(self, location_id: Optional[str] = None) -> Dict[str, Any]:
         """
         List all rules.
@@ -20,12 +25,34 @@ class RulesMixin:
         Returns:
             List of rules matching the filters
         """
-        params = {}
-        if location_id:
-            params["location_id"] = location_id
+    
+    @tool_method("list_rules_page")
+    async def list_rules_page(self, location_id: Optional[str] = None,
+                         cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get one page of rules.
+        
+        Args:
+            location_id: Optional location ID to filter rules
+            cursor: Cursor returned with the previous page; omit for the first page
+            
+        Returns:
+            Dictionary with the page's 'items' and the 'cursor' of the next page
+        """
+    
+    def iter_rules(self, location_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate over all rules, fetching the next page while the current one is consumed.
+        
+        Args:
+            location_id: Optional location ID to filter rules
             
-        return await self.call_tool("list_rules", **params)
+        Returns:
+            Async iterator over rules
+        """
+        return self.iter_tool_pages("list_rules_page", location_id=location_id)
     
+    @tool_method("get_rule")
     async def get_rule(self, rule_id: str) -> Dict[str, Any]:
         """
         Get a specific rule by ID.
@@ -36,8 +63,8 @@ class RulesMixin:
         Returns:
             Rule details
         """
-        return await self.call_tool("get_rule", rule_id=rule_id)
     
+    @tool_method("create_rule")
     async def create_rule(self, name: str, actions: List[Dict[str, Any]], 
                       triggers: List[Dict[str, Any]], 
                       location_id: Optional[str] = None) -> Dict[str, Any]:
@@ -53,17 +80,8 @@ class RulesMixin:
         Returns:
             Created rule details
         """
-        params = {
-            "name": name,
-            "actions": actions,
-            "triggers": triggers
-        }
-        
-        if location_id:
-            params["location_id"] = location_id
-            
-        return await self.call_tool("create_rule", **params)
     
+    @tool_method("update_rule")
     async def update_rule(self, rule_id: str, name: Optional[str] = None, 
                       actions: Optional[List[Dict[str, Any]]] = None, 
                       triggers: Optional[List[Dict[str, Any]]] = None,
@@ -81,19 +99,8 @@ class RulesMixin:
         Returns:
             Updated rule details
         """
-        params = {"rule_id": rule_id}
-        
-        if name:
-            params["name"] = name
-        if actions:
-            params["actions"] = actions
-        if triggers:
-            params["triggers"] = triggers
-        if enabled is not None:
-            params["enabled"] = enabled
-            
-        return await self.call_tool("update_rule", **params)
     
+    @tool_method("delete_rule")
     async def delete_rule(self, rule_id: str, location_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Delete a rule.
@@ -105,12 +112,8 @@ class RulesMixin:
         Returns:
             Delete operation result
         """
-        params = {"rule_id": rule_id}
-        if location_id:
-            params["location_id"] = location_id
-            
-        return await self.call_tool("delete_rule", **params)
     
+    @tool_method("execute_rule")
     async def execute_rule(self, rule_id: str) -> Dict[str, Any]:
         """
         Execute a rule.
@@ -121,4 +124,43 @@ class RulesMixin:
         Returns:
             Rule execution result
         """
-        return await self.call_tool("execute_rule", rule_id=rule_id)
+    
+    @tool_method("bulk_create_rules")
+    async def bulk_create_rules(self, rules: List[Dict[str, Any]], 
+                                location_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Create several rules in one tool call.
+        
+        Args:
+            rules: Rules to create, each with name, actions and optional triggers
+            location_id: Optional location ID for the rules
+            
+        Returns:
+            Dictionary with an 'items' list of created rules (or {"error": ...}), in request order
+        """
+    
+    @tool_method("bulk_update_rules")
+    async def bulk_update_rules(self, rules: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Update several rules in one tool call.
+        
+        Args:
+            rules: Rule updates, each with rule_id and any of name, actions, triggers and enabled
+            
+        Returns:
+            Dictionary with an 'items' list of updated rules (or {"error": ...}), in request order
+        """
+    
+    @tool_method("bulk_delete_rules")
+    async def bulk_delete_rules(self, rule_ids: List[str], 
+                                location_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Delete several rules in one tool call.
+        
+        Args:
+            rule_ids: Rule IDs to delete
+            location_id: Optional location ID (required by SmartThings API)
+            
+        Returns:
+            Dictionary with an 'items' list of delete results (or {"error": ...}), in request order
+        """
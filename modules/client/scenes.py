@@ -1,7 +1,9 @@
 """
 Scenes module for SmartThingsMCP Client
 """
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, AsyncIterator
+
+from .utils import tool_method
 
 
 class ScenesMixin:
@@ -9,7 +11,10 @@ class ScenesMixin:
     Mixin class for scene-related endpoints.
     To be used with the SmartThingsMCPClient class.
     """
+    
+    __slots__ = ()
 
+    @tool_method("list_scenes")
     async def list_scenes(self, location_id: Optional[str] = None) -> Dict[str, Any]:
         """
         List all scenes.
@@ -20,12 +25,34 @@ class ScenesMixin:
         Returns:
             List of scenes matching the filters
         """
-        params = {}
-        if location_id:
-            params["location_id"] = location_id
+    
+    @tool_method("list_scenes_page")
+    async def list_scenes_page(self, location_id: Optional[str] = None,
+                         cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get one page of scenes.
+        
+        Args:
+            location_id: Optional location ID to filter scenes
+            cursor: Cursor returned with the previous page; omit for the first page
+            
+        Returns:
+            Dictionary with the page's 'items' and the 'cursor' of the next page
+        """
+    
+    def iter_scenes(self, location_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate over all scenes, fetching the next page while the current one is consumed.
+        
+        Args:
+            location_id: Optional location ID to filter scenes
             
-        return await self.call_tool("list_scenes", **params)
+        Returns:
+            Async iterator over scenes
+        """
+        return self.iter_tool_pages("list_scenes_page", location_id=location_id)
     
+    @tool_method("get_scene")
     async def get_scene(self, scene_id: str) -> Dict[str, Any]:
         """
         Get a specific scene by ID.
@@ -36,8 +63,8 @@ class ScenesMixin:
         Returns:
             Scene details
         """
-        return await self.call_tool("get_scene", scene_id=scene_id)
     
+    @tool_method("execute_scene")
     async def execute_scene(self, scene_id: str) -> Dict[str, Any]:
         """
         Execute a scene.
@@ -48,8 +75,8 @@ class ScenesMixin:
         Returns:
             Scene execution result
         """
-        return await self.call_tool("execute_scene", scene_id=scene_id)
     
+    @tool_method("create_scene")
     async def create_scene(self, location_id: str, name: str, 
                         icon: Optional[str] = None, 
                         colors: Optional[Dict[str, Any]] = None, 
@@ -67,22 +94,8 @@ class ScenesMixin:
         Returns:
             Created scene details
         """
-        params = {
-            "location_id": location_id,
-            "name": name
-        }
-        
-        if icon:
-            params["icon"] = icon
-        
-        if colors:
-            params["colors"] = colors
-            
-        if actions:
-            params["actions"] = actions
-            
-        return await self.call_tool("create_scene", **params)
     
+    @tool_method("update_scene")
     async def update_scene(self, scene_id: str, name: Optional[str] = None, 
                         icon: Optional[str] = None, 
                         colors: Optional[Dict[str, Any]] = None, 
@@ -100,22 +113,8 @@ class ScenesMixin:
         Returns:
             Updated scene details
         """
-        params = {"scene_id": scene_id}
-        
-        if name:
-            params["name"] = name
-            
-        if icon:
-            params["icon"] = icon
-            
-        if colors:
-            params["colors"] = colors
-            
-        if actions:
-            params["actions"] = actions
-            
-        return await self.call_tool("update_scene", **params)
     
+    @tool_method("delete_scene")
     async def delete_scene(self, scene_id: str) -> Dict[str, Any]:
         """
         Delete a scene.
@@ -126,4 +125,41 @@ class ScenesMixin:
         Returns:
             Delete operation result
         """
-        return await self.call_tool("delete_scene", scene_id=scene_id)
+    
+    @tool_method("bulk_create_scenes")
+    async def bulk_create_scenes(self, location_id: str, 
+                                 scenes: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Create several scenes in one tool call.
+        
+        Args:
+            location_id: Location ID where the scenes will be created
+            scenes: Scenes to create, each with name and optional icon, colors and actions
+            
+        Returns:
+            Dictionary with an 'items' list of created scenes (or {"error": ...}), in request order
+        """
+    
+    @tool_method("bulk_update_scenes")
+    async def bulk_update_scenes(self, scenes: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Update several scenes in one tool call.
+        
+        Args:
+            scenes: Scene updates, each with scene_id and any of name, icon, colors and actions
+            
+        Returns:
+            Dictionary with an 'items' list of updated scenes (or {"error": ...}), in request order
+        """
+    
+    @tool_method("bulk_delete_scenes")
+    async def bulk_delete_scenes(self, scene_ids: List[str]) -> Dict[str, Any]:
+        """
+        Delete several scenes in one tool call.
+        
+        Args:
+            scene_ids: Scene IDs to delete
+            
+        Returns:
+            Dictionary with an 'items' list of delete results (or {"error": ...}), in request order
+        """
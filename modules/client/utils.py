@@ -1,37 +1,164 @@
 """
 Utility functions for SmartThingsMCP client
 """
-import json
-from typing import Dict, Any, List
+import uuid
+import inspect
+import datetime
+import functools
+from enum import Enum
+from typing import Dict, Any, List, BinaryIO, Callable, Optional, Tuple, Awaitable
+
+from . import _json
+
+# Registry of client tool methods: tool_name -> parameter names
+TOOL_PARAMS: Dict[str, Tuple[str, ...]] = {}
+
+# Conversions for non-JSON types, looked up by exact type. They match what orjson
+# writes natively, so output is the same whichever JSON backend is installed
+_JSON_CONVERTERS: Dict[type, Callable[[Any], Any]] = {
+    datetime.datetime: datetime.datetime.isoformat,
+    datetime.date: datetime.date.isoformat,
+    datetime.time: datetime.time.isoformat,
+    uuid.UUID: str,
+    set: list,
+    frozenset: list,
+}
+
+
+def _is_unset(value: Any) -> bool:
+    """
+    Check whether an optional tool argument should be left out of the call.
+    
+    Args:
+        value: Argument value
+        
+    Returns:
+        True for None and empty strings or collections; False and 0 are sent
+    """
+    return value is None or (not value and not isinstance(value, (int, float)))
+
+
+def tool_method(tool_name: str, fill: Optional[Dict[str, Any]] = None) -> Callable:
+    """
+    Turn a stub method into a call to the named MCP tool.
+    
+    The stub only supplies the signature and docstring. A specialized
+    function is generated once, at class creation time, that forwards the
+    arguments to self.call_tool(tool_name, ...). Required parameters are
+    always sent; optional ones are left out when _is_unset.
+    
+    Args:
+        tool_name: Name of the MCP tool the method calls
+        fill: Literal values sent in place of None for the named optional
+              parameters, which are then always sent
+        
+    Returns:
+        Decorator that replaces the stub with the generated method
+    """
+    fill = fill or {}
+    
+    def decorator(stub: Callable) -> Callable:
+        params = tuple(inspect.signature(stub).parameters.values())[1:]
+        
+        positional, keyword_only, always_sent, lines = [], [], [], []
+        for param in params:
+            name = param.name
+            (keyword_only if param.kind is param.KEYWORD_ONLY else positional).append(name)
+            if name in fill:
+                always_sent.append(f"{name!r}: {fill[name]!r} if {name} is None else {name}")
+            elif param.default is param.empty:
+                always_sent.append(f"{name!r}: {name}")
+            else:
+                lines.append(f"    if not _is_unset({name}):\n        args[{name!r}] = {name}\n")
+        
+        arg_list = ["self", *positional] + (["*", *keyword_only] if keyword_only else [])
+        source = (
+            f"async def {stub.__name__}({', '.join(arg_list)}):\n"
+            f"    args = {{{', '.join(always_sent)}}}\n"
+            + "".join(lines)
+            + f"    return await self.call_tool({tool_name!r}, **args)\n"
+        )
+        namespace: Dict[str, Any] = {"_is_unset": _is_unset}
+        exec(compile(source, f"<tool_method {tool_name}>", "exec"), namespace)
+        method = namespace[stub.__name__]
+        method.__defaults__ = stub.__defaults__
+        method.__kwdefaults__ = stub.__kwdefaults__
+        functools.update_wrapper(method, stub)
+        TOOL_PARAMS[tool_name] = tuple(param.name for param in params)
+        return method
+    return decorator
+
+
+def _tool_object_to_dict(obj: Any) -> Any:
+    """
+    JSON default hook converting one non-serializable object.
+    
+    Args:
+        obj: Object the JSON encoder cannot serialize natively
+        
+    Returns:
+        Public attributes as a dictionary, or the string representation
+    """
+    convert = _JSON_CONVERTERS.get(type(obj))
+    if convert is not None:
+        return convert(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    if hasattr(obj, '__dict__'):
+        return {key: value for key, value in obj.__dict__.items()
+                if not key.startswith('_') and not callable(value)}
+    return str(obj)
 
 
 def convert_tool_to_dict(obj: Any) -> Any:
     """
     Convert Tool objects and other non-serializable objects to dictionaries.
     
+    The object is encoded in one pass with the default hook and decoded
+    back, so the traversal runs inside the JSON encoder.
+    
     Args:
         obj: Object to convert
         
     Returns:
         JSON serializable version of the object
     """
-    if hasattr(obj, '__dict__'):
-        # For custom objects with __dict__
-        return {key: convert_tool_to_dict(value) for key, value in obj.__dict__.items() 
-                if not key.startswith('_') and not callable(value)}
-    elif isinstance(obj, list):
-        return [convert_tool_to_dict(item) for item in obj]
-    elif isinstance(obj, dict):
-        return {key: convert_tool_to_dict(value) for key, value in obj.items()}
-    else:
-        # Try to use the object as is, let JSON handle basic types
-        try:
-            # Test if it's JSON serializable
-            json.dumps(obj)
-            return obj
-        except (TypeError, OverflowError):
-            # If not serializable, convert to string representation
-            return str(obj)
+    return _json.loads(_json.dumps_bytes(obj, default=_tool_object_to_dict))
+
+
+def dump_tool_result(result: Any, out: BinaryIO) -> None:
+    """
+    Write a tool result to a binary stream as compact JSON.
+    
+    Produces the same document as serializing convert_tool_to_dict(result),
+    but converts objects while writing instead of building an intermediate
+    copy of the whole tree first.
+    
+    Args:
+        result: Tool result (FastMCP result objects, dicts, lists, etc.)
+        out: Binary stream to write to
+    """
+    _json.stream_json(result, out, default=_tool_object_to_dict)
+
+
+def format_tool_result(result: Any, pretty: bool = False) -> str:
+    """
+    Serialize a tool result to a JSON string in a single pass.
+    
+    Args:
+        result: Tool result (FastMCP result objects, dicts, lists, etc.)
+        pretty: Indent the output with two spaces
+        
+    Returns:
+        JSON string
+    """
+    return _json.dumps(result, pretty=pretty, default=_tool_object_to_dict)
+
+
+# Actions handled by a client method instead of a tool call: action -> handler(client, params)
+_SPECIAL_ACTIONS: Dict[str, Callable[[Any, Dict[str, Any]], Awaitable[Any]]] = {
+    "list_tools": lambda client, params: client.list_tools(),
+}
 
 
 async def run_action(client, action: str, params: Dict[str, Any]) -> Any:
@@ -41,18 +168,18 @@ async def run_action(client, action: str, params: Dict[str, Any]) -> Any:
     Args:
         client: SmartThingsMCPClient instance
         action: Action name to run
-        params: Parameters for the action
+        params: Parameters for the action (not modified)
         
     Returns:
         Action result
     """
-    # Ensure auth token is included in all calls
-    if hasattr(client, 'auth_token') and client.auth_token and 'auth' not in params:
-        params['auth'] = client.auth_token
+    # Ensure auth token is included in all calls, without mutating the caller's dict
+    auth_token = getattr(client, 'auth_token', None)
+    if auth_token and 'auth' not in params:
+        params = {**params, 'auth': auth_token}
     
-    # Handle list_tools action specially
-    if action == "list_tools":
-        return await client.list_tools()
+    handler = _SPECIAL_ACTIONS.get(action)
+    if handler is not None:
+        return await handler(client, params)
     
-    # For all other actions, use call_tool
     return await client.call_tool(action, **params)
@@ -2,94 +2,434 @@
 Common module for SmartThings MCP server.
 Contains utility functions used across the server modules.
 """
+import os
+import json
+import atexit
+import asyncio
+import hashlib
+import inspect
+import threading
+import weakref
+from functools import lru_cache
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.util.request import ACCEPT_ENCODING
 import logging
 import time
-import hashlib
-import json
-from typing import Dict, Any, Optional, List
-from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Mapping, Tuple, Set, Iterable, Awaitable, AsyncIterator
+
+# Optional: faster encoding of request bodies and decoding of API responses
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional: HTTP/2 transport (httpx[http2]), enabled with SMARTTHINGS_HTTP2
+try:
+    import httpx
+except ImportError:
+    httpx = None
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Base URL for SmartThings API
 BASE_URL = "https://api.smartthings.com/v1"
+_DEVICES_URL = f"{BASE_URL}/devices"
+_LOCATIONS_URL = f"{BASE_URL}/locations"
+
+# Headers sent with every API request; the bearer token is added per call.
+# Accept-Encoding lists every encoding urllib3 can decode here (br/zstd when
+# brotli/zstandard are installed), so large JSON bodies come back compressed.
+_BASE_HEADERS = {"Content-Type": "application/json", "Accept": "application/json",
+                 "Accept-Encoding": ACCEPT_ENCODING}
+
+# Connections kept alive per HTTP session; raise it (with the concurrency cap) for
+# servers that fan out more calls at once
+HTTP_POOL_MAXSIZE = int(os.getenv("SMARTTHINGS_HTTP_POOL_MAXSIZE", "20"))
+
+class _RateLimitRetry(Retry):
+    """Retry policy that also resends writes rejected with 429, since the API didn't process them."""
+    
+    # Backoff cap for urllib3 1.26, whose Retry takes no backoff_max argument
+    DEFAULT_BACKOFF_MAX = 30
+    
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if status_code == 429 and self.total:
+            return True
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+# Retry rate limiting and transient gateway errors with exponential backoff plus jitter,
+# capped at 30s, so concurrent callers don't retry in lockstep (a 429's Retry-After is
+# honoured instead when present). Gateway errors are only retried for idempotent methods
+# (urllib3's default), so a POST the API may have processed is never sent twice
+# (urllib3 1.26 has no backoff_max/backoff_jitter arguments; it retries without jitter)
+_BACKOFF_KWARGS = ({"backoff_max": 30, "backoff_jitter": 0.5}
+                   if "backoff_jitter" in inspect.signature(Retry.__init__).parameters else {})
+HTTP_RETRY = _RateLimitRetry(total=3, backoff_factor=1.0, status_forcelist=(429, 502, 503, 504),
+                             raise_on_status=False, **_BACKOFF_KWARGS)
+
+# (connect, read) timeout in seconds, so a stalled connection can't hold a worker forever
+HTTP_TIMEOUT = (3.05, 30)
+
+
+def _new_http_session() -> requests.Session:
+    """Create a session with a pooled, retrying adapter for the SmartThings API."""
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_MAXSIZE,
+                                          max_retries=HTTP_RETRY))
+    return session
+
+
+# Shared HTTP session: connections to the SmartThings API are kept alive and reused
+# instead of paying a TCP/TLS handshake on every request
+_http_session = _new_http_session()
+atexit.register(_http_session.close)
+
+# Optional per-token sessions for multi-tenant deployments: each token gets its own
+# keep-alive pool, so one account's slow requests or handshakes don't hold up another's.
+# {token digest: (session, last used time.monotonic())}, least recently used first
+SESSION_PER_TOKEN = os.getenv("SMARTTHINGS_SESSION_PER_TOKEN", "").lower() in ("1", "true", "yes")
+MAX_TENANT_SESSIONS = 16
+TENANT_SESSION_IDLE = 300.0
+_tenant_sessions: Dict[str, Tuple[requests.Session, float]] = {}
+_tenant_lock = threading.Lock()
+
+
+# Opt-in HTTP/2 client: concurrent calls multiplex over one connection instead of
+# taking one pooled HTTP/1.1 connection each. Only connection failures are retried
+# on this transport; 429 and gateway errors are not.
+HTTP2_ENABLED = os.getenv("SMARTTHINGS_HTTP2", "").lower() in ("1", "true", "yes")
+
+
+def _new_http2_client() -> Optional["httpx.Client"]:
+    """Create the HTTP/2 client, or None when it is disabled or httpx[http2] is not installed."""
+    if not HTTP2_ENABLED:
+        return None
+    if httpx is None:
+        logger.warning("SMARTTHINGS_HTTP2 is set but httpx is not installed; using HTTP/1.1")
+        return None
+    # The pool cap matters only if the server refuses multiplexing; otherwise
+    # every request shares one connection
+    limits = httpx.Limits(max_connections=HTTP_POOL_MAXSIZE, max_keepalive_connections=HTTP_POOL_MAXSIZE)
+    try:
+        transport = httpx.HTTPTransport(http2=True, retries=HTTP_RETRY.total, limits=limits)
+    except ImportError:
+        logger.warning("SMARTTHINGS_HTTP2 is set but h2 is not installed; using HTTP/1.1")
+        return None
+    client = httpx.Client(transport=transport,
+                          timeout=httpx.Timeout(HTTP_TIMEOUT[1], connect=HTTP_TIMEOUT[0]))
+    atexit.register(client.close)
+    return client
+
+
+_http2_client = _new_http2_client()
+
+# Transport errors to report as API failures, from whichever client sent the request
+_REQUEST_ERRORS = (requests.exceptions.RequestException,) + ((httpx.HTTPError,) if httpx else ())
+
+
+def _session_for(auth: str) -> requests.Session:
+    """
+    Get the HTTP session to use for a token.
+    
+    Returns the shared session unless per-token sessions are enabled. Called
+    from worker threads, so the tenant table is guarded by a lock.
+    
+    Args:
+        auth: OAuth 2.0 bearer token
+        
+    Returns:
+        requests.Session for the token
+    """
+    if not SESSION_PER_TOKEN:
+        return _http_session
+    
+    key = hashlib.blake2b(auth.encode(), digest_size=8).hexdigest()
+    now = time.monotonic()
+    stale = []
+    with _tenant_lock:
+        entry = _tenant_sessions.pop(key, None)
+        session = entry[0] if entry is not None else _new_http_session()
+        
+        # Drop sessions idle too long, then the least recently used beyond the cap
+        for tenant, (other, last_used) in list(_tenant_sessions.items()):
+            if now - last_used > TENANT_SESSION_IDLE or len(_tenant_sessions) >= MAX_TENANT_SESSIONS:
+                del _tenant_sessions[tenant]
+                stale.append(other)
+        _tenant_sessions[key] = (session, now)
+    
+    for other in stale:
+        other.close()
+    return session
+
+
+# Tokens whose request headers are kept built; far more than the session cap, since a
+# header mapping is tiny and multi-tenant servers see many tokens
+AUTH_HEADERS_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=AUTH_HEADERS_CACHE_SIZE)
+def _auth_headers(auth: str) -> MappingProxyType:
+    """
+    Get the request headers for a token, built once per token.
+    
+    Returned read-only since the same mapping is shared by every call with
+    that token; requests copies it when preparing the request. lru_cache is
+    thread-safe, so worker threads can call this directly.
+    
+    Args:
+        auth: OAuth 2.0 bearer token
+        
+    Returns:
+        Read-only mapping of the base headers plus Authorization
+    """
+    return MappingProxyType({**_BASE_HEADERS, "Authorization": f"Bearer {auth}"})
+
+
+@lru_cache(maxsize=AUTH_HEADERS_CACHE_SIZE)
+def _token_key(auth: Optional[str]) -> Optional[str]:
+    """
+    Get a short digest of a token for cache keys, so cached responses are per account.
+    
+    Args:
+        auth: OAuth 2.0 bearer token
+        
+    Returns:
+        Hex digest of the token, or None without a token
+    """
+    if auth is None:
+        return None
+    return hashlib.blake2b(auth.encode(), digest_size=8).hexdigest()
+
+
+def _close_tenant_sessions() -> None:
+    """Close all per-token sessions."""
+    with _tenant_lock:
+        sessions = [session for session, _ in _tenant_sessions.values()]
+        _tenant_sessions.clear()
+    for session in sessions:
+        session.close()
+
+
+atexit.register(_close_tenant_sessions)
+
+
+# Cap on in-flight SmartThings API calls from make_request_async. Keep it at or below
+# HTTP_POOL_MAXSIZE so bursts reuse pooled connections instead of opening throwaway ones
+_max_concurrency = int(os.getenv("SMARTTHINGS_MAX_CONCURRENCY", str(HTTP_POOL_MAXSIZE)))
+
+# Cap on in-flight calls per token, below the global cap, so one account's fan-out
+# can't trigger rate limiting for itself or starve other tokens sharing the server
+MAX_CONCURRENCY_PER_TOKEN = int(os.getenv("SMARTTHINGS_MAX_CONCURRENCY_PER_TOKEN", "16"))
+
+
+class _LoopLimits:
+    """Concurrency semaphores of one event loop; a semaphore can only be waited on from one loop."""
+    
+    __slots__ = ('api', 'tokens')
+    
+    def __init__(self, limit: int):
+        self.api = asyncio.Semaphore(limit)
+        # {token digest: [semaphore, callers holding or waiting on it]}; an entry is
+        # removed once its count drops to zero, never while it is held
+        self.tokens: Dict[str, list] = {}
+
+
+# Created lazily for each running loop; weak keys, so a closed loop's semaphores go with it
+_loop_limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopLimits]" = weakref.WeakKeyDictionary()
+
+# Dedicated worker threads for blocking API calls, one per allowed in-flight request,
+# so they neither grow the loop's default executor nor queue behind other to_thread work
+_api_executor = ThreadPoolExecutor(max_workers=_max_concurrency, thread_name_prefix="smartthings-api")
 
 # Server-side cache
-_server_cache: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+# {cache_key: (result, deadline)}; plain dicts keep insertion order, so the first key is
+# the least recently used and deadlines are time.monotonic() values
+_server_cache: Dict[tuple, Tuple[Any, float]] = {}
 _cache_ttl = 300  # 5 minutes default
+
+# TTL overrides in seconds by resource (last URL path segment): live device state goes
+# stale within seconds, while component and presentation metadata rarely changes
+CACHE_TTL_BY_RESOURCE: Dict[str, float] = {
+    "status": 5,
+    "health": 5,
+    "current": 30,
+    "devices": 30,
+    "rooms": 30,
+    "rules": 15,
+    "scenes": 15,
+    "components": 300,
+    "capabilities": 300,
+    "presentation": 300,
+}
 _cache_max_size = 1000
 _cache_enabled = True
 _cache_hits = 0
 _cache_misses = 0
 
+# Cached keys indexed by resource namespace (first path segment, e.g. 'devices'),
+# so a write only invalidates reads of the resource it touches
+_ns_index: Dict[str, Set[tuple]] = {}
 
-def _generate_cache_key(method: str, url: str, params: Optional[Dict[str, Any]]) -> str:
-    """Generate cache key for a request."""
-    cache_data = {
-        'method': method,
-        'url': url,
-        'params': params or {}
-    }
-    cache_string = json.dumps(cache_data, sort_keys=True)
-    cache_hash = hashlib.md5(cache_string.encode()).hexdigest()[:12]
-    return f"{method}:{cache_hash}"
+# GET requests currently in flight, by cache key, so identical concurrent calls share one
+_inflight: Dict[tuple, "asyncio.Task"] = {}
 
+# Invalidation count per namespace; a GET only caches its response if no write
+# invalidated its namespace while the request was in flight
+_ns_generation: Dict[str, int] = {}
 
-def _is_cache_valid(timestamp: float) -> bool:
-    """Check if cached entry is still valid."""
-    return (time.time() - timestamp) < _cache_ttl
+# Slow-changing resources (last URL path segment) whose responses are revalidated with
+# If-None-Match/If-Modified-Since once their TTL runs out, instead of re-downloaded.
+# Validators outlive the cache entry: {cache_key: (etag, last_modified, result)}
+CONDITIONAL_RESOURCES = frozenset({"components", "capabilities", "presentation", "health", "locations"})
+_validators: Dict[tuple, Tuple[Optional[str], Optional[str], Any]] = {}
 
 
-def _get_from_cache(cache_key: str) -> Optional[Dict[str, Any]]:
+def _cache_namespace(url: str) -> str:
+    """
+    Get the resource namespace of a SmartThings API URL.
+    
+    Args:
+        url: The endpoint URL
+        
+    Returns:
+        First path segment after BASE_URL (e.g. 'devices', 'locations', 'rules')
+    """
+    if url.startswith(BASE_URL):
+        url = url[len(BASE_URL):]
+    return url.lstrip('/').split('/', 1)[0].split('?', 1)[0]
+
+
+def _canon_param(value: Any) -> Any:
+    """Convert a nested (dict/list) parameter value into an equivalent hashable tuple."""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _canon_param(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_canon_param(item) for item in value)
+    return value
+
+
+def _generate_cache_key(method: str, url: str, params: Optional[Dict[str, Any]],
+                        auth: Optional[str] = None) -> Tuple[str, str, tuple, Optional[str]]:
+    """
+    Generate cache key for a request.
+    
+    The key is a plain tuple that the cache dict hashes natively; nothing is
+    serialized, and nested (dict/list) values become tuples. It ends with a
+    digest of the token, so accounts never see each other's cached responses.
+    """
+    token = _token_key(auth)
+    if not params:
+        return (method, url, (), token)
+    return (method, url, tuple(sorted(
+        (key, _canon_param(value) if isinstance(value, (dict, list)) else value)
+        for key, value in params.items()
+    )), token)
+
+
+def _ttl_for(url: str) -> float:
+    """
+    Get the cache TTL for a GET URL.
+    
+    Args:
+        url: The endpoint URL
+        
+    Returns:
+        TTL in seconds from CACHE_TTL_BY_RESOURCE, or the default TTL
+    """
+    resource = url.split('?', 1)[0].rstrip('/').rsplit('/', 1)[-1]
+    return CACHE_TTL_BY_RESOURCE.get(resource, _cache_ttl)
+
+
+def _unindex_cache_key(cache_key: tuple) -> None:
+    """Remove a key that left the cache from the namespace index."""
+    keys = _ns_index.get(_cache_namespace(cache_key[1]))
+    if keys is not None:
+        keys.discard(cache_key)
+
+
+def _get_from_cache(cache_key: tuple) -> Optional[Dict[str, Any]]:
     """Get value from cache if valid."""
     global _cache_hits, _cache_misses
     
     if not _cache_enabled:
         return None
     
-    if cache_key in _server_cache:
-        result, timestamp = _server_cache[cache_key]
-        
-        if _is_cache_valid(timestamp):
-            # Move to end (LRU)
-            _server_cache.move_to_end(cache_key)
+    entry = _server_cache.pop(cache_key, None)
+    if entry is not None:
+        if entry[1] > time.monotonic():
+            # Re-insert to move to end (LRU)
+            _server_cache[cache_key] = entry
             _cache_hits += 1
-            return result
-        else:
-            # Expired - remove from cache
-            del _server_cache[cache_key]
+            return entry[0]
+        
+        # Expired - leave it out of the cache
+        _unindex_cache_key(cache_key)
     
     _cache_misses += 1
     return None
 
 
-def _put_in_cache(cache_key: str, result: Dict[str, Any]) -> None:
+def _put_in_cache(cache_key: tuple, result: Dict[str, Any]) -> None:
     """Store value in cache."""
     if not _cache_enabled:
         return
     
-    # Add to cache with current timestamp
-    _server_cache[cache_key] = (result, time.time())
+    # Pop first so a refreshed key moves to the end (most recently used)
+    if _server_cache.pop(cache_key, None) is None:
+        _ns_index.setdefault(_cache_namespace(cache_key[1]), set()).add(cache_key)
+    _server_cache[cache_key] = (result, time.monotonic() + _ttl_for(cache_key[1]))
+    
+    # Evict the oldest entry if cache is full (LRU); one insert adds at most one entry
+    if len(_server_cache) > _cache_max_size:
+        evicted_key = next(iter(_server_cache))
+        del _server_cache[evicted_key]
+        _unindex_cache_key(evicted_key)
+
+
+def _invalidate_namespace(namespace: str) -> int:
+    """
+    Remove all cached entries under a resource namespace.
+    
+    GETs of the namespace already in flight are detached, so later calls send
+    a fresh request instead of joining them, and their responses are not cached.
     
-    # Move to end (most recently used)
-    _server_cache.move_to_end(cache_key)
+    Args:
+        namespace: Resource namespace (e.g. 'devices')
+        
+    Returns:
+        Number of entries removed
+    """
+    _ns_generation[namespace] = _ns_generation.get(namespace, 0) + 1
+    for key in [key for key in _inflight if _cache_namespace(key[1]) == namespace]:
+        del _inflight[key]
     
-    # Evict oldest entries if cache is full (LRU)
-    while len(_server_cache) > _cache_max_size:
-        _server_cache.popitem(last=False)
+    removed = 0
+    for key in _ns_index.pop(namespace, ()):
+        if _server_cache.pop(key, None) is not None:
+            removed += 1
+    return removed
 
 
 def _clear_cache() -> None:
     """Clear all cache entries."""
     global _cache_hits, _cache_misses
     _server_cache.clear()
+    _ns_index.clear()
+    _validators.clear()
     _cache_hits = 0
     _cache_misses = 0
 
 
+def cache_size() -> int:
+    """Get the number of cached responses without building the full statistics."""
+    return len(_server_cache)
+
+
 def get_cache_stats() -> Dict[str, Any]:
     """Get cache statistics."""
     total = _cache_hits + _cache_misses
@@ -107,69 +447,197 @@ def get_cache_stats() -> Dict[str, Any]:
     }
 
 
-def make_request(auth: str, method: str, url: str, params: Optional[Dict[str, Any]] = None, 
-                 data: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+def _cached_response(method: str, url: str, params: Optional[Dict[str, Any]],
+                     invalidates: Optional[Iterable[str]] = None, auth: Optional[str] = None) -> tuple:
     """
-    Make a request to SmartThings API endpoints with caching.
+    Look up a cached response and apply write-operation invalidation.
     
     Args:
-        auth: OAuth 2.0 bearer token for authentication
         method: HTTP method (GET, POST, PUT, DELETE, etc.)
         url: The endpoint URL
         params: Query parameters
-        data: Request body data
-        headers: Additional headers
+        invalidates: Extra namespaces a write affects beyond its own URL
+        auth: OAuth 2.0 bearer token the response is cached for
         
     Returns:
-        API response as dictionary
+        Tuple of (cache_key, cached_result); cache_key is None for non-GET requests
+        and cached_result is None on a cache miss
     """
+    method = method.upper()
+    
     # Check cache for GET requests
-    if method.upper() == 'GET':
-        cache_key = _generate_cache_key(method, url, params)
+    if method == 'GET':
+        cache_key = _generate_cache_key(method, url, params, auth)
         cached_result = _get_from_cache(cache_key)
         
-        if cached_result is not None:
-            # Display cache hit in green
+        if logger.isEnabledFor(logging.DEBUG):
             endpoint = url.replace(BASE_URL + '/', '')
-            print(f"\033[92m✓ Server cache hit: {method} {endpoint}\033[0m")
-            logger.info(f"Cache hit for {method} {url}")
-            return cached_result
+            if cached_result is not None:
+                logger.debug("✓ Server cache hit: %s %s", method, endpoint)
+            else:
+                logger.debug("Server cache miss: %s %s", method, endpoint)
+        return cache_key, cached_result
     
-    # Clear cache on write operations
-    if method.upper() in ['POST', 'PUT', 'DELETE', 'PATCH']:
-        # Invalidate cache on write operations
-        cache_size_before = len(_server_cache)
-        _clear_cache()
-        logger.info(f"Cache cleared due to {method} operation (cleared {cache_size_before} cached entries)")
+    # Invalidate the written resource's namespace (plus any the caller names) on writes
+    if method in ['POST', 'PUT', 'DELETE', 'PATCH']:
+        namespaces = {_cache_namespace(url)}
+        if invalidates:
+            namespaces.update(invalidates)
+        removed = sum(_invalidate_namespace(namespace) for namespace in namespaces)
+        logger.debug("Cache invalidated for %s due to %s operation (cleared %d cached entries)",
+                     sorted(namespaces), method, removed)
     
-    if headers is None:
-        headers = {}
+    return None, None
+
+
+def _body_kwargs(data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build the request body argument, pre-encoded with orjson when it is installed.
     
-    # Add authorization header with bearer token
-    auth_header = f"Bearer {auth}"
-    headers["Authorization"] = auth_header
-    headers["Content-Type"] = "application/json"
-    headers["Accept"] = "application/json"
+    Bodies are encoded once per call; 429/5xx retries happen inside urllib3
+    (or httpx) and resend the same bytes, so a retried write is never re-encoded.
     
-    logger.info(f"Making {method} request to: {url}")
-    logger.info(f"Auth header: {auth_header[:15]}...")
+    Args:
+        data: Request body data
+        
+    Returns:
+        Keyword arguments for Session.request carrying the body
+    """
+    if data is None or orjson is None:
+        return {"json": data}
+    # Content-Type is already application/json from _BASE_HEADERS
+    return {"data": orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)}
+
+
+def format_json(data: Any) -> str:
+    """
+    Pretty-print a JSON value for debug logging, with orjson when it is installed.
+    
+    Args:
+        data: JSON-serializable value
+        
+    Returns:
+        Indented JSON string
+        
+    Raises:
+        TypeError: If the value is not JSON serializable
+    """
+    if orjson is None:
+        return json.dumps(data, indent=2)
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+
+
+def _decode_json(response: requests.Response) -> Any:
+    """
+    Decode a JSON response body, with orjson when it is installed.
+    
+    Args:
+        response: Response with a non-empty body
+        
+    Returns:
+        Parsed response
+    """
+    if orjson is None:
+        return response.json()
+    try:
+        return orjson.loads(response.content)
+    except orjson.JSONDecodeError as e:
+        # Surface it the same way response.json() would
+        raise requests.exceptions.JSONDecodeError(e.msg, e.doc, e.pos)
+
+
+def _is_conditional(url: str) -> bool:
+    """Check whether GETs of a URL are revalidated with conditional requests."""
+    return url.split('?', 1)[0].rstrip('/').rsplit('/', 1)[-1] in CONDITIONAL_RESOURCES
+
+
+def _validator_for(cache_key: Optional[tuple]) -> Optional[Tuple[Optional[str], Optional[str], Any]]:
+    """
+    Get the stored validator for a GET, to send a conditional request.
+    
+    Args:
+        cache_key: Key returned by _cached_response (None for non-GET requests)
+        
+    Returns:
+        (etag, last_modified, result) tuple, or None if there is none
+    """
+    if cache_key is None:
+        return None
+    return _validators.get(cache_key)
+
+
+def _http_send(auth: str, method: str, url: str, params: Optional[Dict[str, Any]],
+               headers: Mapping[str, str], data: Optional[Dict[str, Any]]) -> Any:
+    """
+    Send one HTTP request on the HTTP/2 client when enabled, else on the token's session.
     
+    Args:
+        auth: OAuth 2.0 bearer token, used to pick the session
+        method: HTTP method
+        url: The endpoint URL
+        params: Query parameters
+        headers: Complete request headers
+        data: Request body data
+        
+    Returns:
+        requests.Response or httpx.Response
+    """
+    body = _body_kwargs(data)
+    if _http2_client is not None:
+        if "data" in body:
+            body = {"content": body["data"]}
+        return _http2_client.request(method, url, params=params, headers=headers, **body)
+    return _session_for(auth).request(
+        method=method,
+        url=url,
+        params=params,
+        headers=headers,
+        timeout=HTTP_TIMEOUT,
+        **body
+    )
+
+
+def _send_request(auth: str, method: str, url: str, params: Optional[Dict[str, Any]] = None, 
+                  data: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, Any]] = None,
+                  validator: Optional[Tuple[Optional[str], Optional[str], Any]] = None) -> tuple:
+    """
+    Send a request to the SmartThings API over the shared HTTP session.
+    
+    Does not touch the cache, so it is safe to run in a worker thread.
+    
+    Args:
+        auth: OAuth 2.0 bearer token for authentication
+        method: HTTP method (GET, POST, PUT, DELETE, etc.)
+        url: The endpoint URL
+        params: Query parameters
+        data: Request body data
+        headers: Additional headers
+        validator: Stored (etag, last_modified, result) to revalidate; a 304 returns its result
+        
+    Returns:
+        Tuple of (API response as dictionary, validator to store or None)
+    """
+    # Merge into a fresh dict so the caller's headers are never modified
+    headers = {**headers, **_auth_headers(auth)} if headers else _auth_headers(auth)
+    if validator is not None:
+        etag, last_modified, _ = validator
+        headers = dict(headers)
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+    
+    logger.debug("Making %s request to: %s", method, url)
     if params:
-        logger.info(f"Request params: {params}")
+        logger.debug("Request params: %s", params)
     if data:
-        logger.info(f"Request data: {data}")
+        logger.debug("Request data: %s", data)
     
     try:
-        logger.info("Sending request to SmartThings API...")
-        response = requests.request(
-            method=method,
-            url=url,
-            params=params,
-            json=data,
-            headers=headers
-        )
+        logger.debug("Sending request to SmartThings API...")
+        response = _http_send(auth, method, url, params, headers, data)
         
-        logger.info(f"Response status code: {response.status_code}")
+        logger.debug("Response status code: %s", response.status_code)
         
         # Add extra logging for authentication issues
         if response.status_code == 401:
@@ -181,41 +649,313 @@ def make_request(auth: str, method: str, url: str, params: Optional[Dict[str, An
             if hasattr(response, 'text'):
                 logger.error(f"Response body: {response.text}")
         
+        if response.status_code == 304 and validator is not None:
+            logger.debug("Not modified, reusing cached body: %s", url)
+            return validator[2], validator
+        
         # Raise exception for HTTP errors
         response.raise_for_status()
         
+        result = {}
         if response.content:
-            result = response.json()
-            logger.info("Successfully processed API response")
-            
-            # Cache GET responses
-            if method.upper() == 'GET':
-                cache_key = _generate_cache_key(method, url, params)
-                _put_in_cache(cache_key, result)
-                logger.info(f"Cached response for {method} {url}")
-            
-            return result
-        return {}
+            result = _decode_json(response)
+            logger.debug("Successfully processed API response")
+        
+        if method.upper() == "GET" and _is_conditional(url):
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            if etag or last_modified:
+                return result, (etag, last_modified, result)
+        return result, None
     
-    except requests.exceptions.RequestException as e:
+    except _REQUEST_ERRORS as e:
         # Handle request exceptions
         error_message = str(e)
         logger.error(f"Request exception: {error_message}")
+        error_response = getattr(e, 'response', None)
         
         try:
-            if hasattr(e.response, 'json'):
-                error_data = e.response.json()
+            if hasattr(error_response, 'json'):
+                error_data = error_response.json()
                 if 'message' in error_data:
                     error_message = error_data['message']
                     logger.error(f"API error message: {error_message}")
         except Exception as json_error:
             logger.error(f"Error parsing error response: {str(json_error)}")
-            if hasattr(e.response, 'text'):
-                logger.error(f"Raw error response: {e.response.text}")
+            if hasattr(error_response, 'text'):
+                logger.error(f"Raw error response: {error_response.text}")
             
         raise Exception(f"SmartThings API request failed: {error_message}")
 
 
+def _store_response(cache_key, method: str, url: str, result: Dict[str, Any],
+                    validator: Optional[Tuple[Optional[str], Optional[str], Any]] = None,
+                    generation: Optional[int] = None) -> None:
+    """
+    Cache a GET response.
+    
+    Args:
+        cache_key: Key returned by _cached_response (None for non-GET requests)
+        method: HTTP method
+        url: The endpoint URL
+        result: API response to cache
+        validator: (etag, last_modified, result) returned by _send_request, if any
+        generation: Namespace generation when the request was sent; the response
+            is not cached if a write has invalidated the namespace since
+    """
+    if cache_key is not None:
+        if generation is not None and _ns_generation.get(_cache_namespace(url), 0) != generation:
+            logger.debug("Not caching %s %s: invalidated while in flight", method, url)
+            return
+        _put_in_cache(cache_key, result)
+        logger.debug("Cached response for %s %s", method, url)
+        
+        if validator is not None and _cache_enabled:
+            # Pop first so a refreshed key moves to the end, then evict the oldest
+            _validators.pop(cache_key, None)
+            _validators[cache_key] = validator
+            if len(_validators) > _cache_max_size:
+                del _validators[next(iter(_validators))]
+
+
+def make_request(auth: str, method: str, url: str, params: Optional[Dict[str, Any]] = None, 
+                 data: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, Any]] = None,
+                 invalidates: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    Make a request to SmartThings API endpoints with caching.
+    
+    Args:
+        auth: OAuth 2.0 bearer token for authentication
+        method: HTTP method (GET, POST, PUT, DELETE, etc.)
+        url: The endpoint URL
+        params: Query parameters
+        data: Request body data
+        headers: Additional headers
+        invalidates: Extra cache namespaces a write affects beyond its own URL
+            (e.g. ['devices'] for scene execution)
+        
+    Returns:
+        API response as dictionary
+    """
+    cache_key, cached_result = _cached_response(method, url, params, invalidates, auth)
+    if cached_result is not None:
+        return cached_result
+    
+    generation = _ns_generation.get(_cache_namespace(url), 0)
+    result, validator = _send_request(auth, method, url, params, data, headers, _validator_for(cache_key))
+    _store_response(cache_key, method, url, result, validator, generation)
+    return result
+
+
+def set_max_concurrency(limit: int) -> None:
+    """
+    Set the maximum number of concurrent SmartThings API calls.
+    
+    Calls already waiting on the previous limit are not affected.
+    
+    Args:
+        limit: Maximum number of in-flight requests (at least 1)
+    """
+    global _max_concurrency, _api_executor
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    _max_concurrency = limit
+    for limits in list(_loop_limits.values()):
+        limits.api = asyncio.Semaphore(limit)
+    
+    # Size the worker pool to match; requests already running finish on the old one
+    previous, _api_executor = _api_executor, ThreadPoolExecutor(
+        max_workers=limit, thread_name_prefix="smartthings-api")
+    previous.shutdown(wait=False)
+
+
+async def make_request_async(auth: str, method: str, url: str, params: Optional[Dict[str, Any]] = None, 
+                             data: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, Any]] = None,
+                             invalidates: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    Make a request to SmartThings API endpoints with caching, without blocking the event loop.
+    
+    Cache lookups and updates run on the event loop; only the blocking HTTP
+    call is handed to a worker thread, so concurrent tool calls overlap their
+    network waits. In-flight calls are capped by the concurrency limit
+    (see set_max_concurrency); cache hits don't count against it. Concurrent
+    identical GETs share one upstream request.
+    
+    Args:
+        auth: OAuth 2.0 bearer token for authentication
+        method: HTTP method (GET, POST, PUT, DELETE, etc.)
+        url: The endpoint URL
+        params: Query parameters
+        data: Request body data
+        headers: Additional headers
+        invalidates: Extra cache namespaces a write affects beyond its own URL
+            (e.g. ['devices'] for scene execution)
+        
+    Returns:
+        API response as dictionary
+    """
+    cache_key, cached_result = _cached_response(method, url, params, invalidates, auth)
+    if cached_result is not None:
+        return cached_result
+    
+    if cache_key is None:
+        return await _fetch(cache_key, auth, method, url, params, data, headers)
+    
+    # Join an identical GET that is already in flight instead of sending a duplicate
+    loop = asyncio.get_running_loop()
+    task = _inflight.get(cache_key)
+    if task is None or task.get_loop() is not loop:
+        task = loop.create_task(_fetch(cache_key, auth, method, url, params, data, headers))
+        _inflight[cache_key] = task
+        task.add_done_callback(lambda done: _forget_inflight(cache_key, done))
+    
+    # Shielded so one caller giving up doesn't cancel the request for the others
+    return await asyncio.shield(task)
+
+
+async def _fetch(cache_key, auth: str, method: str, url: str, params: Optional[Dict[str, Any]],
+                 data: Optional[Dict[str, Any]], headers: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Send a request on the API worker pool under the concurrency limits and cache the response."""
+    validator = _validator_for(cache_key)
+    generation = _ns_generation.get(_cache_namespace(url), 0)
+    loop = asyncio.get_running_loop()
+    limits = _loop_limits.get(loop)
+    if limits is None:
+        limits = _loop_limits[loop] = _LoopLimits(_max_concurrency)
+    
+    token = _token_key(auth)
+    entry = limits.tokens.get(token)
+    if entry is None:
+        entry = limits.tokens[token] = [asyncio.Semaphore(MAX_CONCURRENCY_PER_TOKEN), 0]
+    entry[1] += 1
+    try:
+        async with entry[0], limits.api:
+            result, validator = await loop.run_in_executor(
+                _api_executor, _send_request, auth, method, url, params, data, headers, validator)
+    finally:
+        entry[1] -= 1
+        if not entry[1]:
+            del limits.tokens[token]
+    _store_response(cache_key, method, url, result, validator, generation)
+    return result
+
+
+def _forget_inflight(cache_key: tuple, task: asyncio.Task) -> None:
+    """Drop a finished request from the in-flight table."""
+    if _inflight.get(cache_key) is task:
+        del _inflight[cache_key]
+    # Mark the outcome as retrieved even if every caller was cancelled
+    if not task.cancelled():
+        task.exception()
+
+
+async def gather_requests(requests: Iterable[Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Run several API requests concurrently for a bulk tool.
+    
+    Requests still go through make_request_async, so they share the cache,
+    invalidation and concurrency limit of single calls.
+    
+    Args:
+        requests: Awaitables returned by make_request_async
+        
+    Returns:
+        Dictionary with an 'items' list holding one entry per request, in order;
+        a failed request is reported as {"error": message} without failing the others
+    """
+    results = await asyncio.gather(*requests, return_exceptions=True)
+    return {
+        "items": [{"error": str(result)} if isinstance(result, Exception) else result
+                  for result in results]
+    }
+
+
+def next_page_url(page: Dict[str, Any]) -> Optional[str]:
+    """
+    Get the URL of the next page of a SmartThings list response.
+    
+    Args:
+        page: List response with an optional _links.next.href
+        
+    Returns:
+        Absolute URL of the next page, or None on the last page
+    """
+    href = ((page.get("_links") or {}).get("next") or {}).get("href")
+    if href and href.startswith("/"):
+        href = BASE_URL.rsplit("/", 1)[0] + href
+    return href or None
+
+
+async def iter_pages(auth: str, url: str, params: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Iterate over the pages of a SmartThings list endpoint.
+    
+    The next page is requested as soon as a page arrives, so it is in flight
+    while the caller processes the current one.
+    
+    Args:
+        auth: OAuth 2.0 bearer token for authentication
+        url: The list endpoint URL
+        params: Query parameters for the first page
+        
+    Yields:
+        Each page response in order
+    """
+    prefetch = asyncio.ensure_future(make_request_async(auth, "GET", url, params=params))
+    try:
+        while prefetch is not None:
+            page = await prefetch
+            next_url = next_page_url(page)
+            prefetch = asyncio.ensure_future(make_request_async(auth, "GET", next_url)) if next_url else None
+            yield page
+    finally:
+        # Don't leave the prefetch running if the caller stops early
+        if prefetch is not None and not prefetch.done():
+            prefetch.cancel()
+
+
+async def fetch_all_pages(auth: str, url: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Fetch every page of a SmartThings list endpoint.
+    
+    Args:
+        auth: OAuth 2.0 bearer token for authentication
+        url: The list endpoint URL
+        params: Query parameters for the first page
+        
+    Returns:
+        Dictionary with an 'items' list holding the items of all pages
+    """
+    items = []
+    async for page in iter_pages(auth, url, params):
+        items.extend(page.get("items", []))
+    return {"items": items}
+
+
+async def fetch_page(auth: str, url: str, params: Optional[Dict[str, Any]] = None,
+                     cursor: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Fetch one page of a SmartThings list endpoint for a paged tool.
+    
+    Args:
+        auth: OAuth 2.0 bearer token for authentication
+        url: The list endpoint URL, used for the first page
+        params: Query parameters for the first page
+        cursor: Cursor returned with the previous page, if any
+        
+    Returns:
+        Dictionary with the page's 'items' and the 'cursor' of the next page
+        (None on the last page)
+    """
+    if cursor:
+        # The cursor is the API's next-page URL; never send the token elsewhere
+        if not cursor.startswith(BASE_URL + "/"):
+            raise ValueError(f"Invalid page cursor: {cursor}")
+        url, params = cursor, None
+    page = await make_request_async(auth, "GET", url, params=params)
+    return {"items": page.get("items", []), "cursor": next_page_url(page)}
+
+
 def build_url(endpoint: str, *path_params) -> str:
     """
     Build a SmartThings API URL.
@@ -227,6 +967,12 @@ def build_url(endpoint: str, *path_params) -> str:
     Returns:
         Complete URL string
     """
+    # Fast paths for the common arities; the general join handles None parts
+    if not path_params:
+        return f"{BASE_URL}/{endpoint}"
+    if len(path_params) == 1 and path_params[0] is not None:
+        return f"{BASE_URL}/{endpoint}/{path_params[0]}"
+    
     url_parts = [BASE_URL, endpoint]
     url_parts.extend([str(param) for param in path_params if param is not None])
     return '/'.join(url_parts)
@@ -243,9 +989,28 @@ def build_device_url(device_id: str, *path_params) -> str:
     Returns:
         Complete device URL string
     """
+    if device_id is not None:
+        if not path_params:
+            return f"{_DEVICES_URL}/{device_id}"
+        if len(path_params) == 1 and path_params[0] is not None:
+            return f"{_DEVICES_URL}/{device_id}/{path_params[0]}"
     return build_url('devices', device_id, *path_params)
 
 
+@lru_cache(maxsize=256)
+def location_url_prefix(location_id: str) -> str:
+    """
+    Get the URL of a location, memoized since location IDs are few and reused.
+    
+    Args:
+        location_id: The location ID
+        
+    Returns:
+        Location URL string without a trailing slash
+    """
+    return f"{_LOCATIONS_URL}/{location_id}"
+
+
 def filter_none_params(**kwargs) -> Dict[str, Any]:
     """
     Build a parameter dictionary filtering out None values.
@@ -259,6 +1024,23 @@ def filter_none_params(**kwargs) -> Dict[str, Any]:
     return {k: v for k, v in kwargs.items() if v is not None}
 
 
+def filter_empty_params(**kwargs) -> Dict[str, Any]:
+    """
+    Build a request body dictionary filtering out None and empty values.
+    
+    Empty strings, lists and dicts are dropped so optional body fields are only
+    sent when they carry a value; False and 0 are kept.
+    
+    Args:
+        **kwargs: Key-value pairs where values can be None or empty
+        
+    Returns:
+        Dictionary with only the fields that are set
+    """
+    return {k: v for k, v in kwargs.items()
+            if v is not None and (v or not isinstance(v, (str, list, dict)))}
+
+
 def build_command_payload(component: str, capability: str, command: str, 
                          arguments: Optional[List[Any]] = None) -> Dict[str, Any]:
     """
@@ -283,3 +1065,21 @@ def build_command_payload(component: str, capability: str, command: str,
             }
         ]
     }
+
+
+def build_commands_payload(items: Iterable[Tuple[str, str, str, Optional[List[Any]]]]) -> Dict[str, Any]:
+    """
+    Build one command payload carrying several commands for the same device.
+    
+    Args:
+        items: (component, capability, command, arguments) tuples
+        
+    Returns:
+        Command payload dictionary
+    """
+    return {
+        "commands": [
+            {"component": component, "capability": capability, "command": command, "arguments": arguments or []}
+            for component, capability, command, arguments in items
+        ]
+    }
@@ -2,16 +2,44 @@
 Devices module for SmartThings MCP server.
 Exposes SmartThings device endpoints as MCP tools.
 """
+import logging
 from typing import Dict, List, Optional, Any
 from .common import (
-    make_request, 
+    make_request_async, 
     build_url, 
     build_device_url, 
-    filter_none_params, 
     build_command_payload,
+    build_commands_payload,
+    gather_requests,
     BASE_URL
 )
 
+logger = logging.getLogger(__name__)
+
+_LIST_DEVICES_URL = build_url("devices")
+
+# Top-level device fields kept by list_devices(summary=True)
+DEVICE_SUMMARY_FIELDS = ("deviceId", "name", "label", "manufacturerName", "locationId", "roomId", "type")
+
+def summarize_device(device: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reduce a device to its identifying fields and capability IDs.
+    
+    Args:
+        device: Device object from the SmartThings API
+        
+    Returns:
+        Dictionary with the DEVICE_SUMMARY_FIELDS present on the device and a
+        'capabilities' list of capability IDs across all components
+    """
+    summary = {field: device[field] for field in DEVICE_SUMMARY_FIELDS if field in device}
+    capabilities = {}
+    for component in device.get("components", ()):
+        for capability in component.get("capabilities", ()):
+            capabilities.setdefault(capability.get("id"), None)
+    summary["capabilities"] = [cap for cap in capabilities if cap is not None]
+    return summary
+
 def register_tools(server_instance):
     """
     Register all device tools with the MCP server.
@@ -19,45 +47,14 @@ def register_tools(server_instance):
     Args:
         server_instance: FastMCP instance to register tools with
     """
-    print(f"Registering SmartThings tools with server: {server_instance}")
-    print(f"Server type: {type(server_instance)}")
-    print(f"Server dir: {dir(server_instance)}")
-    
-    # Try direct tool registration with proper method signature
-    try:
-        print("Attempting direct tool registration...")
-        # The add_tool method may have different signatures in different FastMCP versions
-        # Try with basic signature
-        server_instance.add_tool(
-            name="st_test_tool", 
-            fn=lambda auth: {"result": "Test successful", "auth": auth}
-        )
-        print("Direct tool registration succeeded")
-        
-        # List all tools after registration
-        print("Tools registered on server:")
-        try:
-            # FastMCP.list_tools appears to be a coroutine, so we can't call it directly
-            # Just check if the methods exist
-            if hasattr(server_instance, "list_tools"):
-                tools = "Server has list_tools() method (coroutine)"
-            elif hasattr(server_instance, "get_tools"):
-                tools = "Server has get_tools() method"
-            else:
-                tools = "Unable to list tools - method not found"
-            print(f"Tools: {tools}")
-        except Exception as e:
-            print(f"Error listing tools: {e}")
-    except Exception as e:
-        print(f"Error registering test tool: {e}")
-    
-    # Register the list_devices tool
-    print("Registering list_devices tool")
+    logger.debug("Registering %s tools", __name__)
+    
     @server_instance.tool()
-    def list_devices(auth: str, capability: Optional[str] = None, 
+    async def list_devices(auth: str, capability: Optional[str] = None, 
                      device_id: Optional[str] = None, 
                      location_id: Optional[str] = None,
-                     room_id: Optional[str] = None) -> Dict[str, Any]:
+                     room_id: Optional[str] = None,
+                     summary: bool = False) -> Dict[str, Any]:
         """
         Get a list of devices.
         
@@ -67,21 +64,30 @@ def register_tools(server_instance):
             device_id: Filter by device ID
             location_id: Filter by location ID
             room_id: Filter by room ID
+            summary: Return only each device's identifying fields and capability IDs
             
         Returns:
             List of devices matching the filters
         """
-        params = filter_none_params(
-            capability=capability,
-            deviceId=device_id,
-            locationId=location_id,
-            roomId=room_id
-        )
-            
-        return make_request(auth, "GET", build_url("devices"), params=params)
+        # Built inline: this is the most called tool
+        params = {}
+        if capability is not None:
+            params["capability"] = capability
+        if device_id is not None:
+            params["deviceId"] = device_id
+        if location_id is not None:
+            params["locationId"] = location_id
+        if room_id is not None:
+            params["roomId"] = room_id
+        
+        result = await make_request_async(auth, "GET", _LIST_DEVICES_URL, params=params)
+        if not summary:
+            return result
+        # A new dict, so the cached full response is left intact
+        return {**result, "items": [summarize_device(device) for device in result.get("items", ())]}
     
     @server_instance.tool()
-    def get_device(auth: str, device_id: str) -> Dict[str, Any]:
+    async def get_device(auth: str, device_id: str) -> Dict[str, Any]:
         """
         Get a specific device by ID.
         
@@ -92,10 +98,27 @@ def register_tools(server_instance):
         Returns:
             Device details
         """
-        return make_request(auth, "GET", build_device_url(device_id))
+        return await make_request_async(auth, "GET", build_device_url(device_id))
     
     @server_instance.tool()
-    def delete_device(auth: str, device_id: str) -> Dict[str, Any]:
+    async def get_devices_many(auth: str, device_ids: List[str]) -> Dict[str, Any]:
+        """
+        Get several devices in one tool call.
+        
+        Args:
+            auth: OAuth 2.0 bearer token
+            device_ids: Device IDs to retrieve
+            
+        Returns:
+            Dictionary with an 'items' list of device details (or {"error": ...}), in request order
+        """
+        return await gather_requests(
+            make_request_async(auth, "GET", build_device_url(device_id))
+            for device_id in device_ids
+        )
+    
+    @server_instance.tool()
+    async def delete_device(auth: str, device_id: str) -> Dict[str, Any]:
         """
         Delete a device.
         
@@ -106,10 +129,10 @@ def register_tools(server_instance):
         Returns:
             Delete operation result
         """
-        return make_request(auth, "DELETE", build_device_url(device_id))
+        return await make_request_async(auth, "DELETE", build_device_url(device_id))
     
     @server_instance.tool()
-    def update_device(auth: str, device_id: str, label: str) -> Dict[str, Any]:
+    async def update_device(auth: str, device_id: str, label: str) -> Dict[str, Any]:
         """
         Update a device.
         
@@ -122,10 +145,10 @@ def register_tools(server_instance):
             Updated device details
         """
         data = {"label": label}
-        return make_request(auth, "PUT", build_device_url(device_id), data=data)
+        return await make_request_async(auth, "PUT", build_device_url(device_id), data=data)
     
     @server_instance.tool()
-    def execute_command(auth: str, device_id: str, component: str, capability: str, 
+    async def execute_command(auth: str, device_id: str, component: str, capability: str, 
                         command: str, arguments: Optional[List[Any]] = None) -> Dict[str, Any]:
         """
         Execute a command on a device.
@@ -142,10 +165,51 @@ def register_tools(server_instance):
             Command execution result
         """
         data = build_command_payload(component, capability, command, arguments)
-        return make_request(auth, "POST", build_device_url(device_id, "commands"), data=data)
+        return await make_request_async(auth, "POST", build_device_url(device_id, "commands"), data=data)
+    
+    @server_instance.tool()
+    async def execute_commands(auth: str, device_id: str, commands: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Execute several commands on one device in a single API request.
+        
+        Args:
+            auth: OAuth 2.0 bearer token
+            device_id: Device ID to execute the commands on
+            commands: Commands to send, each with capability, command and
+                optional component (default 'main') and arguments
+            
+        Returns:
+            Command execution result, with one entry per command
+        """
+        data = build_commands_payload(
+            (c.get("component", "main"), c["capability"], c["command"], c.get("arguments"))
+            for c in commands
+        )
+        return await make_request_async(auth, "POST", build_device_url(device_id, "commands"), data=data)
     
     @server_instance.tool()
-    def get_device_status(auth: str, device_id: str, 
+    async def bulk_execute_commands(auth: str, commands: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Execute commands on several devices in one tool call.
+        
+        Args:
+            auth: OAuth 2.0 bearer token
+            commands: Commands to send, each with device_id, capability, command and
+                optional component (default 'main') and arguments
+            
+        Returns:
+            Dictionary with an 'items' list of command results (or {"error": ...}), in request order
+        """
+        async def send(command: Dict[str, Any]) -> Dict[str, Any]:
+            data = build_command_payload(command.get("component", "main"), command["capability"],
+                                         command["command"], command.get("arguments"))
+            return await make_request_async(auth, "POST", build_device_url(command["device_id"], "commands"),
+                                            data=data)
+        
+        return await gather_requests(send(command) for command in commands)
+    
+    @server_instance.tool()
+    async def get_device_status(auth: str, device_id: str, 
                           component_id: Optional[str] = None, 
                           capability_id: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -160,15 +224,36 @@ def register_tools(server_instance):
         Returns:
             Device status
         """
-        params = filter_none_params(
-            componentId=component_id,
-            capabilityId=capability_id
-        )
+        params = {}
+        if component_id is not None:
+            params["componentId"] = component_id
+        if capability_id is not None:
+            params["capabilityId"] = capability_id
             
-        return make_request(auth, "GET", build_device_url(device_id, "status"), params=params)
+        return await make_request_async(auth, "GET", build_device_url(device_id, "status"), params=params)
     
     @server_instance.tool()
-    def get_device_components(auth: str, device_id: str) -> Dict[str, Any]:
+    async def get_device_status_many(auth: str, device_ids: List[str]) -> Dict[str, Any]:
+        """
+        Get the status of several devices in one tool call.
+        
+        The status requests run concurrently, so the call takes about as long
+        as the slowest single request.
+        
+        Args:
+            auth: OAuth 2.0 bearer token
+            device_ids: Device IDs to get status for
+            
+        Returns:
+            Dictionary with an 'items' list of device statuses (or {"error": ...}), in request order
+        """
+        return await gather_requests(
+            make_request_async(auth, "GET", build_device_url(device_id, "status"))
+            for device_id in device_ids
+        )
+    
+    @server_instance.tool()
+    async def get_device_components(auth: str, device_id: str) -> Dict[str, Any]:
         """
         Get the components of a device.
         
@@ -179,10 +264,10 @@ def register_tools(server_instance):
         Returns:
             Device components
         """
-        return make_request(auth, "GET", build_device_url(device_id, "components"))
+        return await make_request_async(auth, "GET", build_device_url(device_id, "components"))
     
     @server_instance.tool()
-    def get_device_capabilities(auth: str, device_id: str, component_id: str) -> Dict[str, Any]:
+    async def get_device_capabilities(auth: str, device_id: str, component_id: str) -> Dict[str, Any]:
         """
         Get the capabilities of a device component.
         
@@ -194,10 +279,10 @@ def register_tools(server_instance):
         Returns:
             Component capabilities
         """
-        return make_request(auth, "GET", build_device_url(device_id, "components", component_id, "capabilities"))
+        return await make_request_async(auth, "GET", build_device_url(device_id, "components", component_id, "capabilities"))
     
     @server_instance.tool()
-    def get_device_health(auth: str, device_id: str) -> Dict[str, Any]:
+    async def get_device_health(auth: str, device_id: str) -> Dict[str, Any]:
         """
         Get the health status of a device.
         
@@ -208,10 +293,27 @@ def register_tools(server_instance):
         Returns:
             Device health status
         """
-        return make_request(auth, "GET", build_device_url(device_id, "health"))
+        return await make_request_async(auth, "GET", build_device_url(device_id, "health"))
+    
+    @server_instance.tool()
+    async def get_device_health_many(auth: str, device_ids: List[str]) -> Dict[str, Any]:
+        """
+        Get the health status of several devices in one tool call.
+        
+        Args:
+            auth: OAuth 2.0 bearer token
+            device_ids: Device IDs to get health status for
+            
+        Returns:
+            Dictionary with an 'items' list of health statuses (or {"error": ...}), in request order
+        """
+        return await gather_requests(
+            make_request_async(auth, "GET", build_device_url(device_id, "health"))
+            for device_id in device_ids
+        )
     
     @server_instance.tool()
-    def get_device_presentation(auth: str, device_id: str) -> Dict[str, Any]:
+    async def get_device_presentation(auth: str, device_id: str) -> Dict[str, Any]:
         """
         Get the presentation of a device.
         
@@ -222,4 +324,4 @@ def register_tools(server_instance):
         Returns:
             Device presentation
         """
-        return make_request(auth, "GET", build_device_url(device_id, "presentation"))
+        return await make_request_async(auth, "GET", build_device_url(device_id, "presentation"))
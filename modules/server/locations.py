@@ -2,14 +2,22 @@
 Locations module for SmartThings MCP server.
 Exposes SmartThings location endpoints as MCP tools.
 """
+import logging
 from typing import Dict, List, Optional, Any
 from .common import (
-    make_request, 
+    make_request_async, 
     build_url, 
     filter_none_params,
+    filter_empty_params,
+    fetch_all_pages,
+    fetch_page,
+    gather_requests,
+    location_url_prefix,
     BASE_URL
 )
 
+logger = logging.getLogger(__name__)
+
 def build_location_url(location_id: str, *path_params) -> str:
     """
     Build a SmartThings API URL for a specific location.
@@ -21,6 +29,11 @@ def build_location_url(location_id: str, *path_params) -> str:
     Returns:
         Complete location URL string
     """
+    if location_id is not None:
+        if not path_params:
+            return location_url_prefix(location_id)
+        if len(path_params) == 1 and path_params[0] is not None:
+            return f"{location_url_prefix(location_id)}/{path_params[0]}"
     return build_url('locations', location_id, *path_params)
 
 def register_tools(server_instance):
@@ -30,10 +43,10 @@ def register_tools(server_instance):
     Args:
         server_instance: FastMCP instance to register tools with
     """
-    print(f"Registering SmartThings location tools with server: {server_instance}")
+    logger.debug("Registering %s tools", __name__)
     
     @server_instance.tool()
-    def list_locations(auth: str) -> Dict[str, Any]:
+    async def list_locations(auth: str) -> Dict[str, Any]:
         """
         Get a list of all locations.
         
@@ -41,12 +54,26 @@ def register_tools(server_instance):
             auth: OAuth 2.0 bearer token
             
         Returns:
-            List of locations
+            List of locations (all pages)
+        """
+        return await fetch_all_pages(auth, build_url("locations"))
+    
+    @server_instance.tool()
+    async def list_locations_page(auth: str, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get one page of locations.
+        
+        Args:
+            auth: OAuth 2.0 bearer token
+            cursor: Cursor returned with the previous page; omit for the first page
+            
+        Returns:
+            Dictionary with the page's 'items' and the 'cursor' of the next page (None on the last page)
         """
-        return make_request(auth, "GET", build_url("locations"))
+        return await fetch_page(auth, build_url("locations"), cursor=cursor)
     
     @server_instance.tool()
-    def get_location(auth: str, location_id: str) -> Dict[str, Any]:
+    async def get_location(auth: str, location_id: str) -> Dict[str, Any]:
         """
         Get a specific location by ID.
         
@@ -57,10 +84,10 @@ def register_tools(server_instance):
         Returns:
             Location details
         """
-        return make_request(auth, "GET", build_location_url(location_id))
+        return await make_request_async(auth, "GET", build_location_url(location_id))
     
     @server_instance.tool()
-    def create_location(auth: str, name: str, country_code: str, 
+    async def create_location(auth: str, name: str, country_code: str, 
                        latitude: Optional[float] = None, 
                        longitude: Optional[float] = None, 
                        region_code: Optional[str] = None, 
@@ -84,27 +111,19 @@ def register_tools(server_instance):
         """
         data = {
             "name": name,
-            "countryCode": country_code
+            "countryCode": country_code,
+            **filter_empty_params(regionCode=region_code, locality=locality, addressLines=address_lines)
         }
         
-        # Add optional parameters
+        # Coordinates are only sent as a pair
         if latitude is not None and longitude is not None:
             data["latitude"] = latitude
             data["longitude"] = longitude
             
-        if region_code:
-            data["regionCode"] = region_code
-            
-        if locality:
-            data["locality"] = locality
-            
-        if address_lines:
-            data["addressLines"] = address_lines
-            
-        return make_request(auth, "POST", build_url("locations"), data=data)
+        return await make_request_async(auth, "POST", build_url("locations"), data=data)
     
     @server_instance.tool()
-    def update_location(auth: str, location_id: str, name: str, 
+    async def update_location(auth: str, location_id: str, name: str, 
                        country_code: Optional[str] = None, 
                        latitude: Optional[float] = None, 
                        longitude: Optional[float] = None, 
@@ -128,29 +147,21 @@ def register_tools(server_instance):
         Returns:
             Updated location details
         """
-        data = {"name": name}
+        data = {
+            "name": name,
+            **filter_empty_params(countryCode=country_code, regionCode=region_code,
+                                  locality=locality, addressLines=address_lines)
+        }
         
-        # Add optional parameters
-        if country_code:
-            data["countryCode"] = country_code
-            
+        # Coordinates are only sent as a pair
         if latitude is not None and longitude is not None:
             data["latitude"] = latitude
             data["longitude"] = longitude
             
-        if region_code:
-            data["regionCode"] = region_code
-            
-        if locality:
-            data["locality"] = locality
-            
-        if address_lines:
-            data["addressLines"] = address_lines
-            
-        return make_request(auth, "PUT", build_location_url(location_id), data=data)
+        return await make_request_async(auth, "PUT", build_location_url(location_id), data=data)
     
     @server_instance.tool()
-    def delete_location(auth: str, location_id: str) -> Dict[str, Any]:
+    async def delete_location(auth: str, location_id: str) -> Dict[str, Any]:
         """
         Delete a location.
         
@@ -161,66 +172,28 @@ def register_tools(server_instance):
         Returns:
             Delete operation result
         """
-        return make_request(auth, "DELETE", build_location_url(location_id))
-    
-    @server_instance.tool()
-    def get_location_rooms(auth: str, location_id: str) -> Dict[str, Any]:
-        """
-        Get rooms in a location.
-        
-        Args:
-            auth: OAuth 2.0 bearer token
-            location_id: Location ID to get rooms for
-            
-        Returns:
-            List of rooms in the location
-        """
-        return make_request(auth, "GET", build_location_url(location_id, "rooms"))
-    
-    @server_instance.tool()
-    def create_room(auth: str, location_id: str, name: str) -> Dict[str, Any]:
-        """
-        Create a room in a location.
-        
-        Args:
-            auth: OAuth 2.0 bearer token
-            location_id: Location ID where to create room
-            name: Name of the room
-            
-        Returns:
-            Created room details
-        """
-        data = {"name": name}
-        return make_request(auth, "POST", build_location_url(location_id, "rooms"), data=data)
+        return await make_request_async(auth, "DELETE", build_location_url(location_id), invalidates=["devices"])
     
     @server_instance.tool()
-    def update_room(auth: str, location_id: str, room_id: str, name: str) -> Dict[str, Any]:
+    async def list_location_overview(auth: str, location_id: str) -> Dict[str, Any]:
         """
-        Update a room in a location.
+        Get the devices, rules and scenes of a location in one tool call.
         
-        Args:
-            auth: OAuth 2.0 bearer token
-            location_id: Location ID containing the room
-            room_id: Room ID to update
-            name: New name for the room
-            
-        Returns:
-            Updated room details
-        """
-        data = {"name": name}
-        return make_request(auth, "PUT", build_location_url(location_id, "rooms", room_id), data=data)
-    
-    @server_instance.tool()
-    def delete_room(auth: str, location_id: str, room_id: str) -> Dict[str, Any]:
-        """
-        Delete a room from a location.
+        The three lists are fetched concurrently, so the call takes about as
+        long as the slowest of them.
         
         Args:
             auth: OAuth 2.0 bearer token
-            location_id: Location ID containing the room
-            room_id: Room ID to delete
+            location_id: Location ID to get the overview for
             
         Returns:
-            Delete operation result
-        """
-        return make_request(auth, "DELETE", build_location_url(location_id, "rooms", room_id))
+            Dictionary with 'devices', 'rules' and 'scenes' (each the list response,
+            or {"error": ...} if that part failed)
+        """
+        params = {"locationId": location_id}
+        parts = await gather_requests([
+            make_request_async(auth, "GET", build_url("devices"), params=params),
+            fetch_all_pages(auth, build_url("rules"), params=params),
+            fetch_all_pages(auth, build_url("scenes"), params=params),
+        ])
+        return dict(zip(("devices", "rules", "scenes"), parts["items"]))
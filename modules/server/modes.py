@@ -15,16 +15,16 @@ See https://developer.smartthings.com/docs/api/public#section/Authentication for
 """
 import sys
 import logging
-from typing import Dict, Any
+import functools
+from typing import Dict, Any, Callable, Awaitable
 from .common import (
-    make_request, 
+    make_request_async, 
     build_url, 
     filter_none_params,
+    location_url_prefix,
     BASE_URL
 )
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def build_mode_url(location_id: str, *path_params) -> str:
@@ -38,8 +38,39 @@ def build_mode_url(location_id: str, *path_params) -> str:
     Returns:
         Complete mode URL string
     """
+    if location_id is not None:
+        if not path_params:
+            return f"{location_url_prefix(location_id)}/modes"
+        if len(path_params) == 1 and path_params[0] is not None:
+            return f"{location_url_prefix(location_id)}/modes/{path_params[0]}"
     return build_url('locations', location_id, 'modes', *path_params)
 
+def _traced(op: str) -> Callable:
+    """
+    Wrap a mode tool with debug tracing and error logging.
+    
+    Arguments are only formatted when DEBUG is enabled, and the auth token is
+    never logged.
+    
+    Args:
+        op: Operation name used in log messages
+        
+    Returns:
+        Decorator for an async tool function
+    """
+    def decorator(fn: Callable[..., Awaitable[Dict[str, Any]]]) -> Callable[..., Awaitable[Dict[str, Any]]]:
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs) -> Dict[str, Any]:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("%s args=%s", op, {k: v for k, v in kwargs.items() if k != "auth"})
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                logger.error("%s failed: %s", op, e)
+                raise
+        return wrapper
+    return decorator
+
 def register_tools(server_instance):
     """
     Register all mode tools with the MCP server.
@@ -47,10 +78,11 @@ def register_tools(server_instance):
     Args:
         server_instance: FastMCP instance to register tools with
     """
-    print(f"Registering SmartThings Mode tools with server: {server_instance}")
+    logger.debug("Registering %s tools", __name__)
     
     @server_instance.tool()
-    def list_modes(auth: str, location_id: str) -> Dict[str, Any]:
+    @_traced("list_modes")
+    async def list_modes(auth: str, location_id: str) -> Dict[str, Any]:
         """
         List all modes for a location.
         
@@ -61,20 +93,11 @@ def register_tools(server_instance):
         Returns:
             List of modes for the location
         """
-        logger.info(f"Listing modes for location: {location_id}")
-        logger.info(f"Auth token prefix: {auth[:10]}...")
-        url = build_mode_url(location_id)
-        logger.info(f"Request URL: {url}")
-        try:
-            result = make_request(auth, "GET", url)
-            logger.info("Successfully retrieved modes")
-            return result
-        except Exception as e:
-            logger.error(f"Error listing modes: {e}")
-            raise
+        return await make_request_async(auth, "GET", build_mode_url(location_id))
     
     @server_instance.tool()
-    def get_mode(auth: str, location_id: str, mode_id: str) -> Dict[str, Any]:
+    @_traced("get_mode")
+    async def get_mode(auth: str, location_id: str, mode_id: str) -> Dict[str, Any]:
         """
         Get a specific mode by ID.
         
@@ -86,19 +109,11 @@ def register_tools(server_instance):
         Returns:
             Mode details
         """
-        logger.info(f"Getting mode {mode_id} for location: {location_id}")
-        url = build_mode_url(location_id, mode_id)
-        logger.info(f"Request URL: {url}")
-        try:
-            result = make_request(auth, "GET", url)
-            logger.info("Successfully retrieved mode")
-            return result
-        except Exception as e:
-            logger.error(f"Error getting mode: {e}")
-            raise
+        return await make_request_async(auth, "GET", build_mode_url(location_id, mode_id))
     
     @server_instance.tool()
-    def get_current_mode(auth: str, location_id: str) -> Dict[str, Any]:
+    @_traced("get_current_mode")
+    async def get_current_mode(auth: str, location_id: str) -> Dict[str, Any]:
         """
         Get the current mode for a location.
         
@@ -109,19 +124,11 @@ def register_tools(server_instance):
         Returns:
             Current mode details
         """
-        logger.info(f"Getting current mode for location: {location_id}")
-        url = build_url('locations', location_id, 'modes', 'current')
-        logger.info(f"Request URL: {url}")
-        try:
-            result = make_request(auth, "GET", url)
-            logger.info("Successfully retrieved current mode")
-            return result
-        except Exception as e:
-            logger.error(f"Error getting current mode: {e}")
-            raise
+        return await make_request_async(auth, "GET", build_mode_url(location_id, 'current'))
     
     @server_instance.tool()
-    def set_mode(auth: str, location_id: str, mode_id: str) -> Dict[str, Any]:
+    @_traced("set_mode")
+    async def set_mode(auth: str, location_id: str, mode_id: str) -> Dict[str, Any]:
         """
         Set the current mode for a location.
         
@@ -133,15 +140,5 @@ def register_tools(server_instance):
         Returns:
             Mode change result
         """
-        logger.info(f"Setting mode {mode_id} for location: {location_id}")
-        url = build_url('locations', location_id, 'modes/current')
         data = {"modeId": mode_id}
-        logger.info(f"Request URL: {url}")
-        logger.info(f"Request data: {data}")
-        try:
-            result = make_request(auth, "PUT", url, data=data)
-            logger.info("Successfully set mode")
-            return result
-        except Exception as e:
-            logger.error(f"Error setting mode: {e}")
-            raise
+        return await make_request_async(auth, "PUT", build_mode_url(location_id, 'current'), data=data)
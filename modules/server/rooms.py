@@ -2,30 +2,52 @@
 Rooms module for SmartThings MCP server.
 Exposes SmartThings room endpoints as MCP tools.
 """
+import logging
 from typing import Dict, List, Optional, Any
 from .common import (
-    make_request, 
+    make_request_async, 
     build_url, 
     filter_none_params,
+    fetch_all_pages,
+    fetch_page,
+    gather_requests,
+    location_url_prefix,
     BASE_URL
 )
 
-def build_room_url(location_id: str, room_id: Optional[str] = None, *path_params) -> str:
+logger = logging.getLogger(__name__)
+
+def build_rooms_collection_url(location_id: str, *path_params) -> str:
     """
-    Build a SmartThings API URL for rooms in a location.
+    Build a SmartThings API URL for the rooms collection of a location.
     
     Args:
         location_id: The location ID
-        room_id: The optional room ID
         path_params: Additional path parameters to append
         
     Returns:
-        Complete room URL string
+        Complete rooms URL string
     """
-    if room_id:
-        return build_url('locations', location_id, 'rooms', room_id, *path_params)
+    if location_id is not None and not path_params:
+        return f"{location_url_prefix(location_id)}/rooms"
     return build_url('locations', location_id, 'rooms', *path_params)
 
+def build_room_url(location_id: str, room_id: str, *path_params) -> str:
+    """
+    Build a SmartThings API URL for a specific room.
+    
+    Args:
+        location_id: The location ID
+        room_id: The room ID
+        path_params: Additional path parameters to append
+        
+    Returns:
+        Complete room URL string
+    """
+    if location_id is not None and room_id is not None and not path_params:
+        return f"{location_url_prefix(location_id)}/rooms/{room_id}"
+    return build_url('locations', location_id, 'rooms', room_id, *path_params)
+
 def register_tools(server_instance):
     """
     Register all room tools with the MCP server.
@@ -33,10 +55,9 @@ def register_tools(server_instance):
     Args:
         server_instance: FastMCP instance to register tools with
     """
-    print(f"Registering SmartThings room tools with server: {server_instance}")
+    logger.debug("Registering %s tools", __name__)
     
-    @server_instance.tool()
-    def list_rooms(auth: str, location_id: str) -> Dict[str, Any]:
+    async def list_rooms(auth: str, location_id: str) -> Dict[str, Any]:
         """
         Get a list of all rooms in a location.
         
@@ -45,12 +66,49 @@ def register_tools(server_instance):
             location_id: Location ID to get rooms for
             
         Returns:
-            List of rooms in the location
+            List of rooms in the location (all pages)
+        """
+        return await fetch_all_pages(auth, build_rooms_collection_url(location_id))
+    
+    # get_location_rooms is the name the client and older callers use; both
+    # names register the same function
+    server_instance.tool()(list_rooms)
+    server_instance.tool(name="get_location_rooms")(list_rooms)
+    
+    @server_instance.tool()
+    async def get_location_rooms_many(auth: str, location_ids: List[str]) -> Dict[str, Any]:
+        """
+        Get the rooms of several locations in one tool call.
+        
+        Args:
+            auth: OAuth 2.0 bearer token
+            location_ids: Location IDs to get rooms for
+            
+        Returns:
+            Dictionary with an 'items' list holding each location's rooms (or {"error": ...}), in request order
+        """
+        return await gather_requests(
+            fetch_all_pages(auth, build_rooms_collection_url(location_id))
+            for location_id in location_ids
+        )
+    
+    @server_instance.tool()
+    async def get_location_rooms_page(auth: str, location_id: str, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get one page of rooms in a location.
+        
+        Args:
+            auth: OAuth 2.0 bearer token
+            location_id: Location ID to get rooms for
+            cursor: Cursor returned with the previous page; omit for the first page
+            
+        Returns:
+            Dictionary with the page's 'items' and the 'cursor' of the next page (None on the last page)
         """
-        return make_request(auth, "GET", build_room_url(location_id))
+        return await fetch_page(auth, build_rooms_collection_url(location_id), cursor=cursor)
     
     @server_instance.tool()
-    def get_room(auth: str, location_id: str, room_id: str) -> Dict[str, Any]:
+    async def get_room(auth: str, location_id: str, room_id: str) -> Dict[str, Any]:
         """
         Get a specific room by ID.
         
@@ -62,10 +120,10 @@ def register_tools(server_instance):
         Returns:
             Room details
         """
-        return make_request(auth, "GET", build_room_url(location_id, room_id))
+        return await make_request_async(auth, "GET", build_room_url(location_id, room_id))
     
     @server_instance.tool()
-    def create_room(auth: str, location_id: str, name: str) -> Dict[str, Any]:
+    async def create_room(auth: str, location_id: str, name: str) -> Dict[str, Any]:
         """
         Create a room in a location.
         
@@ -78,10 +136,10 @@ def register_tools(server_instance):
             Created room details
         """
         data = {"name": name}
-        return make_request(auth, "POST", build_room_url(location_id), data=data)
+        return await make_request_async(auth, "POST", build_rooms_collection_url(location_id), data=data)
     
     @server_instance.tool()
-    def update_room(auth: str, location_id: str, room_id: str, name: str) -> Dict[str, Any]:
+    async def update_room(auth: str, location_id: str, room_id: str, name: str) -> Dict[str, Any]:
         """
         Update a room in a location.
         
@@ -95,10 +153,10 @@ def register_tools(server_instance):
             Updated room details
         """
         data = {"name": name}
-        return make_request(auth, "PUT", build_room_url(location_id, room_id), data=data)
+        return await make_request_async(auth, "PUT", build_room_url(location_id, room_id), data=data)
     
     @server_instance.tool()
-    def delete_room(auth: str, location_id: str, room_id: str) -> Dict[str, Any]:
+    async def delete_room(auth: str, location_id: str, room_id: str) -> Dict[str, Any]:
         """
         Delete a room from a location.
         
@@ -110,4 +168,5 @@ def register_tools(server_instance):
         Returns:
             Delete operation result
         """
-        return make_request(auth, "DELETE", build_room_url(location_id, room_id))
+        return await make_request_async(auth, "DELETE", build_room_url(location_id, room_id),
+                                        invalidates=["devices"])
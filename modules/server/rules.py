@@ -24,18 +24,24 @@ See https://developer.smartthings.com/docs/api/public#section/Authentication for
 and https://developer.smartthings.com/docs/api/public#tag/Rules for Rules API documentation.
 """
 import logging
+from urllib.parse import urlencode
 from typing import Dict, Any, Optional, List
 from .common import (
-    make_request, 
+    make_request_async, 
+    gather_requests,
     build_url, 
     filter_none_params,
+    filter_empty_params,
+    format_json,
+    fetch_all_pages,
+    fetch_page,
     BASE_URL
 )
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_RULES_URL = f"{BASE_URL}/rules"
+
 def build_rule_url(rule_id: str = None, *path_params) -> str:
     """
     Build a SmartThings API URL for rules.
@@ -47,11 +53,26 @@ def build_rule_url(rule_id: str = None, *path_params) -> str:
     Returns:
         Complete rule URL string
     """
+    if not path_params:
+        return f"{_RULES_URL}/{rule_id}" if rule_id else _RULES_URL
     if rule_id:
         return build_url('rules', rule_id, *path_params)
     else:
         return build_url('rules', *path_params)
 
+def build_rule_body(rule: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build a rule create/update payload from a rule description.
+    
+    Args:
+        rule: Dictionary with any of name, actions, triggers and enabled
+        
+    Returns:
+        Request body with only the fields that are set
+    """
+    return filter_empty_params(name=rule.get("name"), actions=rule.get("actions"),
+                               triggers=rule.get("triggers"), enabled=rule.get("enabled"))
+
 def register_tools(server_instance):
     """
     Register all rule tools with the MCP server.
@@ -59,10 +80,10 @@ def register_tools(server_instance):
     Args:
         server_instance: FastMCP instance to register tools with
     """
-    logger.info(f"Registering SmartThings Rule tools with server: {server_instance}")
+    logger.debug("Registering %s tools", __name__)
     
     @server_instance.tool()
-    def list_rules(auth: str, location_id: Optional[str] = None) -> Dict[str, Any]:
+    async def list_rules(auth: str, location_id: Optional[str] = None) -> Dict[str, Any]:
         """
         List all rules.
         
@@ -71,22 +92,39 @@ def register_tools(server_instance):
             location_id: Optional location ID to filter rules
             
         Returns:
-            List of rules matching the filters
+            List of rules matching the filters (all pages)
         """
-        logger.info(f"Listing rules" + (f" for location: {location_id}" if location_id else ""))
+        logger.debug("Listing rules for location: %s", location_id)
         params = filter_none_params(locationId=location_id)
         url = build_rule_url()
-        logger.info(f"Request URL: {url}")
+        logger.debug("Request URL: %s", url)
         try:
-            result = make_request(auth, "GET", url, params=params)
-            logger.info("Successfully retrieved rules")
+            result = await fetch_all_pages(auth, url, params=params)
+            logger.debug("Successfully retrieved rules")
             return result
         except Exception as e:
             logger.error(f"Error listing rules: {e}")
             raise
     
     @server_instance.tool()
-    def get_rule(auth: str, rule_id: str) -> Dict[str, Any]:
+    async def list_rules_page(auth: str, location_id: Optional[str] = None,
+                         cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get one page of rules.
+        
+        Args:
+            auth: OAuth 2.0 bearer token
+            location_id: Optional location ID to filter rules
+            cursor: Cursor returned with the previous page; omit for the first page
+            
+        Returns:
+            Dictionary with the page's 'items' and the 'cursor' of the next page (None on the last page)
+        """
+        return await fetch_page(auth, build_rule_url(), params=filter_none_params(locationId=location_id),
+                                cursor=cursor)
+    
+    @server_instance.tool()
+    async def get_rule(auth: str, rule_id: str) -> Dict[str, Any]:
         """
         Get a specific rule by ID.
         
@@ -97,19 +135,19 @@ def register_tools(server_instance):
         Returns:
             Rule details
         """
-        logger.info(f"Getting rule: {rule_id}")
+        logger.debug("Getting rule: %s", rule_id)
         url = build_rule_url(rule_id)
-        logger.info(f"Request URL: {url}")
+        logger.debug("Request URL: %s", url)
         try:
-            result = make_request(auth, "GET", url)
-            logger.info("Successfully retrieved rule")
+            result = await make_request_async(auth, "GET", url)
+            logger.debug("Successfully retrieved rule")
             return result
         except Exception as e:
             logger.error(f"Error getting rule: {e}")
             raise
     
     @server_instance.tool()
-    def create_rule(auth: str, name: str, actions: List[Dict[str, Any]], 
+    async def create_rule(auth: str, name: str, actions: List[Dict[str, Any]], 
                   triggers: List[Dict[str, Any]] = None, 
                   location_id: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -125,7 +163,7 @@ def register_tools(server_instance):
         Returns:
             Created rule details
         """
-        logger.info(f"Creating rule: {name}")
+        logger.debug("Creating rule: %s", name)
         url = build_rule_url()
         
         # location_id must be passed as query parameter, not in the body
@@ -133,40 +171,31 @@ def register_tools(server_instance):
         
         # Build data payload - only include name and actions
         # The if/then structure is already embedded in actions
+        # Only add triggers if provided and non-empty (for backward compatibility)
         data = {
             "name": name,
-            "actions": actions
+            "actions": actions,
+            **filter_empty_params(triggers=triggers)
         }
         
-        # Only add triggers if provided and non-empty (for backward compatibility)
-        if triggers:
-            data["triggers"] = triggers
-        
-        # Log the complete URL with query parameters for debugging
-        import json as _json
-        if params:
-            query_string = "&".join([f"{k}={v}" for k, v in params.items()])
-            full_url = f"{url}?{query_string}"
-            logger.info(f"Request URL with params: {full_url}")
-        else:
-            logger.info(f"Request URL: {url}")
-        
-        # Log pretty JSON body for debugging server-side parsing errors
-        try:
-            logger.info("Request data (JSON):\n%s", _json.dumps(data, indent=2))
-        except Exception:
-            logger.info(f"Request data (raw): {data}")
+        # Log the URL and pretty JSON body for debugging server-side parsing errors
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Request URL: %s?%s", url, urlencode(params))
+            try:
+                logger.debug("Request data (JSON):\n%s", format_json(data))
+            except (TypeError, ValueError):
+                logger.debug("Request data (raw): %s", data)
             
         try:
-            result = make_request(auth, "POST", url, params=params, data=data)
-            logger.info("Successfully created rule")
+            result = await make_request_async(auth, "POST", url, params=params, data=data)
+            logger.debug("Successfully created rule")
             return result
         except Exception as e:
             logger.error(f"Error creating rule: {e}")
             raise
     
     @server_instance.tool()
-    def update_rule(auth: str, rule_id: str, name: Optional[str] = None, 
+    async def update_rule(auth: str, rule_id: str, name: Optional[str] = None, 
                   actions: Optional[List[Dict[str, Any]]] = None, 
                   triggers: Optional[List[Dict[str, Any]]] = None,
                   enabled: Optional[bool] = None) -> Dict[str, Any]:
@@ -184,31 +213,23 @@ def register_tools(server_instance):
         Returns:
             Updated rule details
         """
-        logger.info(f"Updating rule: {rule_id}")
+        logger.debug("Updating rule: %s", rule_id)
         url = build_rule_url(rule_id)
         
-        data = {}
-        if name:
-            data["name"] = name
-        if actions:
-            data["actions"] = actions
-        if triggers:
-            data["triggers"] = triggers
-        if enabled is not None:
-            data["enabled"] = enabled
+        data = filter_empty_params(name=name, actions=actions, triggers=triggers, enabled=enabled)
             
-        logger.info(f"Request URL: {url}")
-        logger.info(f"Request data: {data}")
+        logger.debug("Request URL: %s", url)
+        logger.debug("Request data: %s", data)
         try:
-            result = make_request(auth, "PUT", url, data=data)
-            logger.info("Successfully updated rule")
+            result = await make_request_async(auth, "PUT", url, data=data)
+            logger.debug("Successfully updated rule")
             return result
         except Exception as e:
             logger.error(f"Error updating rule: {e}")
             raise
     
     @server_instance.tool()
-    def delete_rule(auth: str, rule_id: str, location_id: Optional[str] = None) -> Dict[str, Any]:
+    async def delete_rule(auth: str, rule_id: str, location_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Delete a rule.
         
@@ -220,29 +241,23 @@ def register_tools(server_instance):
         Returns:
             Delete operation result
         """
-        logger.info(f"Deleting rule: {rule_id}" + (f" for location: {location_id}" if location_id else ""))
+        logger.debug("Deleting rule: %s for location: %s", rule_id, location_id)
         params = filter_none_params(locationId=location_id)
         url = build_rule_url(rule_id)
         
-        # Log the complete URL with query parameters for debugging
-        if params:
-            query_string = "&".join([f"{k}={v}" for k, v in params.items()])
-            full_url = f"{url}?{query_string}"
-            logger.info(f"Request URL with params: {full_url}")
-        else:
-            logger.info(f"Request URL: {url}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Request URL: %s?%s", url, urlencode(params))
         
         try:
-            result = make_request(auth, "DELETE", url, params=params)
-            logger.info("Successfully deleted rule")
-            logger.info("Note: Server cache has been cleared - next list_rules will fetch fresh data")
+            result = await make_request_async(auth, "DELETE", url, params=params)
+            logger.debug("Successfully deleted rule")
             return result
         except Exception as e:
             logger.error(f"Error deleting rule: {e}")
             raise
             
     @server_instance.tool()
-    def execute_rule(auth: str, rule_id: str) -> Dict[str, Any]:
+    async def execute_rule(auth: str, rule_id: str) -> Dict[str, Any]:
         """
         Execute a rule.
         
@@ -253,13 +268,77 @@ def register_tools(server_instance):
         Returns:
             Rule execution result
         """
-        logger.info(f"Executing rule: {rule_id}")
+        logger.debug("Executing rule: %s", rule_id)
         url = build_rule_url(rule_id, "execute")
-        logger.info(f"Request URL: {url}")
+        logger.debug("Request URL: %s", url)
         try:
-            result = make_request(auth, "POST", url)
-            logger.info("Successfully executed rule")
+            # Executing a rule changes device states
+            result = await make_request_async(auth, "POST", url, invalidates=["devices"])
+            logger.debug("Successfully executed rule")
             return result
         except Exception as e:
             logger.error(f"Error executing rule: {e}")
             raise
+    
+    @server_instance.tool()
+    async def bulk_create_rules(auth: str, rules: List[Dict[str, Any]], 
+                                location_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Create several rules in one tool call.
+        
+        Args:
+            auth: OAuth 2.0 bearer token
+            rules: Rules to create, each with name, actions and optional triggers
+            location_id: Optional location ID for the rules (required by SmartThings API as query param)
+            
+        Returns:
+            Dictionary with an 'items' list of created rules (or {"error": ...}), in request order
+        """
+        logger.debug("Creating %s rules", len(rules))
+        url = build_rule_url()
+        params = filter_none_params(locationId=location_id)
+        return await gather_requests(
+            make_request_async(auth, "POST", url, params=params, data=build_rule_body(rule))
+            for rule in rules
+        )
+    
+    @server_instance.tool()
+    async def bulk_update_rules(auth: str, rules: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Update several rules in one tool call.
+        
+        Args:
+            auth: OAuth 2.0 bearer token
+            rules: Rule updates, each with rule_id and any of name, actions, triggers and enabled
+            
+        Returns:
+            Dictionary with an 'items' list of updated rules (or {"error": ...}), in request order
+        """
+        logger.debug("Updating %s rules", len(rules))
+        
+        async def update(rule: Dict[str, Any]) -> Dict[str, Any]:
+            return await make_request_async(auth, "PUT", build_rule_url(rule["rule_id"]),
+                                            data=build_rule_body(rule))
+        
+        return await gather_requests(update(rule) for rule in rules)
+    
+    @server_instance.tool()
+    async def bulk_delete_rules(auth: str, rule_ids: List[str], 
+                                location_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Delete several rules in one tool call.
+        
+        Args:
+            auth: OAuth 2.0 bearer token
+            rule_ids: Rule IDs to delete
+            location_id: Optional location ID (required by SmartThings API)
+            
+        Returns:
+            Dictionary with an 'items' list of delete results (or {"error": ...}), in request order
+        """
+        logger.debug("Deleting %s rules", len(rule_ids))
+        params = filter_none_params(locationId=location_id)
+        return await gather_requests(
+            make_request_async(auth, "DELETE", build_rule_url(rule_id), params=params)
+            for rule_id in rule_ids
+        )
@@ -10,16 +10,20 @@ Authentication Requirements:
 import logging
 from typing import Dict, Any, Optional, List
 from .common import (
-    make_request, 
+    make_request_async, 
+    gather_requests,
     build_url, 
     filter_none_params,
+    filter_empty_params,
+    fetch_all_pages,
+    fetch_page,
     BASE_URL
 )
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_SCENES_URL = f"{BASE_URL}/scenes"
+
 def build_scene_url(scene_id: str = None, *path_params) -> str:
     """
     Build a SmartThings API URL for scenes.
@@ -31,11 +35,26 @@ def build_scene_url(scene_id: str = None, *path_params) -> str:
     Returns:
         Complete scene URL string
     """
+    if not path_params:
+        return f"{_SCENES_URL}/{scene_id}" if scene_id else _SCENES_URL
     if scene_id:
         return build_url('scenes', scene_id, *path_params)
     else:
         return build_url('scenes', *path_params)
 
+def build_scene_body(scene: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build a scene create/update payload from a scene description.
+    
+    Args:
+        scene: Dictionary with any of name, icon, colors and actions
+        
+    Returns:
+        Request body with only the fields that are set
+    """
+    return filter_empty_params(sceneName=scene.get("name"), icon=scene.get("icon"),
+                               colors=scene.get("colors"), actions=scene.get("actions"))
+
 def register_tools(server_instance):
     """
     Register all scene tools with the MCP server.
@@ -43,10 +62,10 @@ def register_tools(server_instance):
     Args:
         server_instance: FastMCP instance to register tools with
     """
-    logger.info(f"Registering SmartThings Scene tools with server: {server_instance}")
+    logger.debug("Registering %s tools", __name__)
     
     @server_instance.tool()
-    def list_scenes(auth: str, location_id: Optional[str] = None) -> Dict[str, Any]:
+    async def list_scenes(auth: str, location_id: Optional[str] = None) -> Dict[str, Any]:
         """
         List all scenes.
         
@@ -55,22 +74,39 @@ def register_tools(server_instance):
             location_id: Optional location ID to filter scenes
             
         Returns:
-            List of scenes matching the filters
+            List of scenes matching the filters (all pages)
         """
-        logger.info(f"Listing scenes" + (f" for location: {location_id}" if location_id else ""))
+        logger.debug("Listing scenes for location: %s", location_id)
         params = filter_none_params(locationId=location_id)
         url = build_scene_url()
-        logger.info(f"Request URL: {url}")
+        logger.debug("Request URL: %s", url)
         try:
-            result = make_request(auth, "GET", url, params=params)
-            logger.info("Successfully retrieved scenes")
+            result = await fetch_all_pages(auth, url, params=params)
+            logger.debug("Successfully retrieved scenes")
             return result
         except Exception as e:
             logger.error(f"Error listing scenes: {e}")
             raise
     
     @server_instance.tool()
-    def get_scene(auth: str, scene_id: str) -> Dict[str, Any]:
+    async def list_scenes_page(auth: str, location_id: Optional[str] = None,
+                         cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get one page of scenes.
+        
+        Args:
+            auth: OAuth 2.0 bearer token
+            location_id: Optional location ID to filter scenes
+            cursor: Cursor returned with the previous page; omit for the first page
+            
+        Returns:
+            Dictionary with the page's 'items' and the 'cursor' of the next page (None on the last page)
+        """
+        return await fetch_page(auth, build_scene_url(), params=filter_none_params(locationId=location_id),
+                                cursor=cursor)
+    
+    @server_instance.tool()
+    async def get_scene(auth: str, scene_id: str) -> Dict[str, Any]:
         """
         Get a specific scene by ID.
         
@@ -81,19 +117,19 @@ def register_tools(server_instance):
         Returns:
             Scene details
         """
-        logger.info(f"Getting scene: {scene_id}")
+        logger.debug("Getting scene: %s", scene_id)
         url = build_scene_url(scene_id)
-        logger.info(f"Request URL: {url}")
+        logger.debug("Request URL: %s", url)
         try:
-            result = make_request(auth, "GET", url)
-            logger.info("Successfully retrieved scene")
+            result = await make_request_async(auth, "GET", url)
+            logger.debug("Successfully retrieved scene")
             return result
         except Exception as e:
             logger.error(f"Error getting scene: {e}")
             raise
     
     @server_instance.tool()
-    def execute_scene(auth: str, scene_id: str) -> Dict[str, Any]:
+    async def execute_scene(auth: str, scene_id: str) -> Dict[str, Any]:
         """
         Execute a scene.
         
@@ -104,19 +140,20 @@ def register_tools(server_instance):
         Returns:
             Scene execution result
         """
-        logger.info(f"Executing scene: {scene_id}")
+        logger.debug("Executing scene: %s", scene_id)
         url = build_scene_url(scene_id, "execute")
-        logger.info(f"Request URL: {url}")
+        logger.debug("Request URL: %s", url)
         try:
-            result = make_request(auth, "POST", url)
-            logger.info("Successfully executed scene")
+            # Executing a scene changes device states
+            result = await make_request_async(auth, "POST", url, invalidates=["devices"])
+            logger.debug("Successfully executed scene")
             return result
         except Exception as e:
             logger.error(f"Error executing scene: {e}")
             raise
     
     @server_instance.tool()
-    def create_scene(auth: str, location_id: str, name: str, 
+    async def create_scene(auth: str, location_id: str, name: str, 
                      icon: Optional[str] = None, 
                      colors: Optional[Dict[str, Any]] = None, 
                      actions: List[Dict[str, Any]] = None) -> Dict[str, Any]:
@@ -134,35 +171,27 @@ def register_tools(server_instance):
         Returns:
             Created scene details
         """
-        logger.info(f"Creating scene: {name} in location: {location_id}")
+        logger.debug("Creating scene: %s in location: %s", name, location_id)
         url = build_scene_url()
         
         data = {
             "locationId": location_id,
-            "sceneName": name
+            "sceneName": name,
+            **filter_empty_params(icon=icon, colors=colors, actions=actions)
         }
-        
-        if icon:
-            data["icon"] = icon
-        
-        if colors:
-            data["colors"] = colors
-            
-        if actions:
-            data["actions"] = actions
             
-        logger.info(f"Request URL: {url}")
-        logger.info(f"Request data: {data}")
+        logger.debug("Request URL: %s", url)
+        logger.debug("Request data: %s", data)
         try:
-            result = make_request(auth, "POST", url, data=data)
-            logger.info("Successfully created scene")
+            result = await make_request_async(auth, "POST", url, data=data)
+            logger.debug("Successfully created scene")
             return result
         except Exception as e:
             logger.error(f"Error creating scene: {e}")
             raise
     
     @server_instance.tool()
-    def update_scene(auth: str, scene_id: str, name: Optional[str] = None, 
+    async def update_scene(auth: str, scene_id: str, name: Optional[str] = None, 
                      icon: Optional[str] = None, 
                      colors: Optional[Dict[str, Any]] = None, 
                      actions: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
@@ -180,34 +209,23 @@ def register_tools(server_instance):
         Returns:
             Updated scene details
         """
-        logger.info(f"Updating scene: {scene_id}")
+        logger.debug("Updating scene: %s", scene_id)
         url = build_scene_url(scene_id)
         
-        data = {}
-        if name:
-            data["sceneName"] = name
+        data = filter_empty_params(sceneName=name, icon=icon, colors=colors, actions=actions)
             
-        if icon:
-            data["icon"] = icon
-            
-        if colors:
-            data["colors"] = colors
-            
-        if actions:
-            data["actions"] = actions
-            
-        logger.info(f"Request URL: {url}")
-        logger.info(f"Request data: {data}")
+        logger.debug("Request URL: %s", url)
+        logger.debug("Request data: %s", data)
         try:
-            result = make_request(auth, "PUT", url, data=data)
-            logger.info("Successfully updated scene")
+            result = await make_request_async(auth, "PUT", url, data=data)
+            logger.debug("Successfully updated scene")
             return result
         except Exception as e:
             logger.error(f"Error updating scene: {e}")
             raise
     
     @server_instance.tool()
-    def delete_scene(auth: str, scene_id: str) -> Dict[str, Any]:
+    async def delete_scene(auth: str, scene_id: str) -> Dict[str, Any]:
         """
         Delete a scene.
         
@@ -218,13 +236,72 @@ def register_tools(server_instance):
         Returns:
             Delete operation result
         """
-        logger.info(f"Deleting scene: {scene_id}")
+        logger.debug("Deleting scene: %s", scene_id)
         url = build_scene_url(scene_id)
-        logger.info(f"Request URL: {url}")
+        logger.debug("Request URL: %s", url)
         try:
-            result = make_request(auth, "DELETE", url)
-            logger.info("Successfully deleted scene")
+            result = await make_request_async(auth, "DELETE", url)
+            logger.debug("Successfully deleted scene")
             return result
         except Exception as e:
             logger.error(f"Error deleting scene: {e}")
             raise
+    
+    @server_instance.tool()
+    async def bulk_create_scenes(auth: str, location_id: str, 
+                                 scenes: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Create several scenes in one tool call.
+        
+        Args:
+            auth: OAuth 2.0 bearer token
+            location_id: Location ID where the scenes will be created
+            scenes: Scenes to create, each with name and optional icon, colors and actions
+            
+        Returns:
+            Dictionary with an 'items' list of created scenes (or {"error": ...}), in request order
+        """
+        logger.debug("Creating %s scenes in location: %s", len(scenes), location_id)
+        url = build_scene_url()
+        return await gather_requests(
+            make_request_async(auth, "POST", url, data={"locationId": location_id, **build_scene_body(scene)})
+            for scene in scenes
+        )
+    
+    @server_instance.tool()
+    async def bulk_update_scenes(auth: str, scenes: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Update several scenes in one tool call.
+        
+        Args:
+            auth: OAuth 2.0 bearer token
+            scenes: Scene updates, each with scene_id and any of name, icon, colors and actions
+            
+        Returns:
+            Dictionary with an 'items' list of updated scenes (or {"error": ...}), in request order
+        """
+        logger.debug("Updating %s scenes", len(scenes))
+        
+        async def update(scene: Dict[str, Any]) -> Dict[str, Any]:
+            return await make_request_async(auth, "PUT", build_scene_url(scene["scene_id"]),
+                                            data=build_scene_body(scene))
+        
+        return await gather_requests(update(scene) for scene in scenes)
+    
+    @server_instance.tool()
+    async def bulk_delete_scenes(auth: str, scene_ids: List[str]) -> Dict[str, Any]:
+        """
+        Delete several scenes in one tool call.
+        
+        Args:
+            auth: OAuth 2.0 bearer token
+            scene_ids: Scene IDs to delete
+            
+        Returns:
+            Dictionary with an 'items' list of delete results (or {"error": ...}), in request order
+        """
+        logger.debug("Deleting %s scenes", len(scene_ids))
+        return await gather_requests(
+            make_request_async(auth, "DELETE", build_scene_url(scene_id))
+            for scene_id in scene_ids
+        )
@@ -4,10 +4,70 @@ These tools allow LLMs to generate validated structured outputs by calling tools
 instead of generating JSON text.
 """
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, field_validator
 
 logger = logging.getLogger(__name__)
 
+# Intents accepted by generate_context_analysis; anything else becomes "other"
+VALID_INTENTS = frozenset(("query", "control", "status", "other"))
+
+
+def _as_str(value: Any) -> Any:
+    """Coerce any present value to a string, as str() would"""
+    return value if isinstance(value, str) else str(value)
+
+
+def _none_as_empty(value: Any) -> Any:
+    """Treat an explicit None mapping as empty"""
+    return {} if value is None else value
+
+
+class Entity(BaseModel):
+    """An entity extracted by generate_context_analysis"""
+    type: str
+    value: str
+    confidence: float = 0.5
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+    
+    _coerce_strings = field_validator("type", "value", mode="before")(_as_str)
+    _default_metadata = field_validator("metadata", mode="before")(_none_as_empty)
+
+
+class PlannedToolCall(BaseModel):
+    """One step of a plan built by generate_execution_plan"""
+    tool_name: str
+    parameters: Dict[str, Any] = Field(default_factory=dict)
+    description: str = ""
+    
+    _coerce_strings = field_validator("tool_name", "description", mode="before")(_as_str)
+    _default_parameters = field_validator("parameters", mode="before")(_none_as_empty)
+
+
+_ENTITY_LIST = TypeAdapter(List[Entity])
+_TOOL_CALL_LIST = TypeAdapter(List[PlannedToolCall])
+
+
+def _validate_items(adapter: TypeAdapter, items: List[Any]) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Validate a list of items in one pass, dropping the ones that fail.
+    
+    Args:
+        adapter: TypeAdapter for a list of models
+        items: Raw items from the tool arguments
+        
+    Returns:
+        Tuple of (validated items as dicts, number of items skipped)
+    """
+    try:
+        return adapter.dump_python(adapter.validate_python(items)), 0
+    except ValidationError as e:
+        # Each error location starts with the index of the offending item
+        bad = {error["loc"][0] for error in e.errors()}
+    
+    kept = [item for index, item in enumerate(items) if index not in bad]
+    return adapter.dump_python(adapter.validate_python(kept)), len(bad)
+
 
 def register_tools(mcp):
     """
@@ -62,38 +122,21 @@ def register_tools(mcp):
             )
         """
         # Validate intent
-        valid_intents = ["query", "control", "status", "other"]
-        if intent not in valid_intents:
+        if intent not in VALID_INTENTS:
             logger.warning(f"Invalid intent '{intent}', defaulting to 'other'")
             intent = "other"
         
         # Validate confidence
-        confidence = max(0.0, min(1.0, confidence))
+        confidence = 0.0 if confidence < 0.0 else 1.0 if confidence > 1.0 else confidence
         
         # Ensure ambiguities is a list
         if ambiguities is None:
             ambiguities = []
         
-        # Validate entities
-        validated_entities = []
-        for entity in entities:
-            if not isinstance(entity, dict):
-                logger.warning(f"Skipping invalid entity: {entity}")
-                continue
-            
-            # Ensure required fields
-            if "type" not in entity or "value" not in entity:
-                logger.warning(f"Entity missing type or value: {entity}")
-                continue
-            
-            # Add defaults
-            validated_entity = {
-                "type": str(entity["type"]),
-                "value": str(entity["value"]),
-                "confidence": float(entity.get("confidence", 0.5)),
-                "metadata": entity.get("metadata", {})
-            }
-            validated_entities.append(validated_entity)
+        # Validate entities; drop anything without a type and value
+        validated_entities, skipped = _validate_items(_ENTITY_LIST, entities)
+        if skipped:
+            logger.warning("Skipped %s invalid entities (not a dict, missing type/value or bad field types)", skipped)
         
         result = {
             "intent": intent,
@@ -103,7 +146,7 @@ def register_tools(mcp):
             "confidence": confidence
         }
         
-        logger.info(f"✓ Generated context analysis: intent={intent}, entities={len(validated_entities)}")
+        logger.debug("✓ Generated context analysis: intent=%s, entities=%s", intent, len(validated_entities))
         
         return result
     
@@ -150,24 +193,10 @@ def register_tools(mcp):
                 requires_user_input=False
             )
         """
-        # Validate tool calls
-        validated_calls = []
-        for tool_call in tool_calls:
-            if not isinstance(tool_call, dict):
-                logger.warning(f"Skipping invalid tool call: {tool_call}")
-                continue
-            
-            # Ensure required fields
-            if "tool_name" not in tool_call:
-                logger.warning(f"Tool call missing tool_name: {tool_call}")
-                continue
-            
-            validated_call = {
-                "tool_name": str(tool_call["tool_name"]),
-                "parameters": tool_call.get("parameters", {}),
-                "description": str(tool_call.get("description", ""))
-            }
-            validated_calls.append(validated_call)
+        # Validate tool calls; drop anything without a tool_name
+        validated_calls, skipped = _validate_items(_TOOL_CALL_LIST, tool_calls)
+        if skipped:
+            logger.warning("Skipped %s invalid tool calls (not a dict, missing tool_name or bad field types)", skipped)
         
         result = {
             "plan": validated_calls,
@@ -176,7 +205,7 @@ def register_tools(mcp):
             "user_prompt": user_prompt
         }
         
-        logger.info(f"✓ Generated execution plan: {len(validated_calls)} tool calls")
+        logger.debug("✓ Generated execution plan: %s tool calls", len(validated_calls))
         
         return result
     
@@ -1,22 +1,34 @@
 """
 Pytest configuration and shared fixtures for SmartThingsMCP tests.
 """
-import pytest
-from unittest.mock import Mock, MagicMock
 import os
 import sys
+import asyncio
+import pytest
+from json import dumps, loads
+from unittest.mock import Mock, patch
 
-# Add parent directory to Python path so SmartThingsMCP can be imported
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+# The JSON payload fixtures below are built once per session and shared by every
+# test that requests them; treat them as read-only and copy.deepcopy before mutating.
+# The Mock fixtures stay per test so recorded calls don't leak between tests.
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
+def auth_token():
+    """Provide the real SmartThings token, skipping the test when it isn't set."""
+    token = os.environ.get("SMARTTHINGS_AUTH_TOKEN")
+    if not token:
+        pytest.skip("SMARTTHINGS_AUTH_TOKEN not set")
+    return token
+
+
+@pytest.fixture(scope="session")
 def mock_auth_token():
     """Provide a mock authentication token."""
     return "test-auth-token-12345"
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_location():
     """Provide a mock location object."""
     return {
@@ -29,7 +41,37 @@ def mock_location():
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
+def mock_locations_list(mock_location):
+    """Provide a mock list of locations."""
+    return {
+        "items": [
+            mock_location,
+            {
+                "id": "loc-2",
+                "name": "Cabin",
+                "countryCode": "US",
+                "timeZoneId": "America/Denver"
+            }
+        ]
+    }
+
+
+@pytest.fixture(scope="session")
+def mock_hubs_list():
+    """Provide a mock list of hubs."""
+    return {
+        "items": [
+            {
+                "id": "hub-1",
+                "name": "SmartThings Hub",
+                "status": "ONLINE"
+            }
+        ]
+    }
+
+
+@pytest.fixture(scope="session")
 def mock_device():
     """Provide a mock device object."""
     return {
@@ -53,7 +95,7 @@ def mock_device():
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_devices_list(mock_device):
     """Provide a mock list of devices."""
     return {
@@ -79,7 +121,7 @@ def mock_devices_list(mock_device):
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_room():
     """Provide a mock room object."""
     return {
@@ -89,7 +131,7 @@ def mock_room():
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_rooms_list(mock_room):
     """Provide a mock list of rooms."""
     return {
@@ -109,7 +151,7 @@ def mock_rooms_list(mock_room):
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_rule():
     """Provide a mock rule object."""
     return {
@@ -136,7 +178,7 @@ def mock_rule():
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_rules_list(mock_rule):
     """Provide a mock list of rules."""
     return {
@@ -161,7 +203,7 @@ def mock_rules_list(mock_rule):
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_mode():
     """Provide a mock mode object."""
     return {
@@ -171,7 +213,7 @@ def mock_mode():
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_modes_list(mock_mode):
     """Provide a mock list of modes."""
     return {
@@ -188,7 +230,7 @@ def mock_modes_list(mock_mode):
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_scene():
     """Provide a mock scene object."""
     return {
@@ -200,7 +242,7 @@ def mock_scene():
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_scenes_list(mock_scene):
     """Provide a mock list of scenes."""
     return {
@@ -232,13 +274,14 @@ def mock_http_client():
 def mock_server():
     """Provide a mock MCP server instance."""
     server = Mock()
-    server.tool = Mock(return_value=lambda f: f)
+    # A plain decorator factory: registering every tool shouldn't record Mock calls
+    server.tool = lambda *args, **kwargs: (lambda f: f)
     server.add_tool = Mock()
     server.list_tools = Mock()
     return server
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def api_error_response():
     """Provide a mock API error response."""
     return {
@@ -249,7 +292,7 @@ def api_error_response():
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def api_success_response():
     """Provide a mock successful API response."""
     return {
@@ -258,20 +301,95 @@ def api_success_response():
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_api_url():
     """Provide the mock API base URL."""
     return "https://api.smartthings.com/v1"
 
 
-def pytest_configure(config):
-    """Configure pytest with custom markers."""
-    config.addinivalue_line(
-        "markers", "integration: marks tests as integration tests (deselect with '-m \"not integration\"')"
-    )
-    config.addinivalue_line(
-        "markers", "slow: marks tests as slow (deselect with '-m \"not slow\"')"
-    )
-    config.addinivalue_line(
-        "markers", "requires_auth: marks tests that require authentication"
-    )
+# Server modules whose tools are registered on the shared in-memory server
+_TOOL_MODULES = ("devices", "locations", "rooms", "modes", "rules", "scenes", "structure_tools")
+
+
+def _json_response(body):
+    """Build a mocked HTTP response carrying a JSON body (read-only mappings allowed)."""
+    return Mock(status_code=200, content=dumps(body, default=dict).encode())
+
+
+@pytest.fixture(scope="session")
+def tool_server():
+    """Provide one in-memory FastMCP server with every tool module registered."""
+    from importlib import import_module
+    from fastmcp import FastMCP
+    
+    server = FastMCP(name="test")
+    for module in _TOOL_MODULES:
+        import_module(f"SmartThingsMCP.modules.server.{module}").register_tools(server)
+    return server
+
+
+@pytest.fixture
+def call_tool(tool_server):
+    """
+    Provide a caller that runs one tool on the in-memory server.
+    
+    The HTTP session answers every request with body. To answer per
+    request, pass side_effect instead: it is called with (method, url,
+    params, sent JSON body) and returns the response body or raises.
+    Tool errors propagate as fastmcp's ToolError. The caller returns the
+    tool's data and the mocked HTTP request.
+    """
+    from fastmcp import Client
+    from SmartThingsMCP.modules.server import common
+    
+    def respond_with(side_effect):
+        def respond(method, url, params=None, data=None, json=None, **kwargs):
+            sent = loads(data) if data is not None else json
+            return _json_response(side_effect(method, url, params, sent))
+        return respond
+    
+    def call(name, arguments, body=None, side_effect=None):
+        if side_effect is not None:
+            patched = {"side_effect": respond_with(side_effect)}
+        else:
+            patched = {"return_value": _json_response(body)}
+        
+        async def run():
+            async with Client(tool_server) as client:
+                return await client.call_tool(name, arguments)
+        
+        with patch.object(common._http_session, "request", **patched) as http_request:
+            result = asyncio.run(run())
+        return result.data, http_request
+    
+    return call
+
+
+@pytest.fixture(scope="session")
+def sent_body():
+    """Provide a decoder for the JSON body of the last mocked HTTP request."""
+    def decode(http_request):
+        kwargs = http_request.call_args.kwargs
+        return loads(kwargs["data"]) if kwargs.get("data") is not None else kwargs.get("json")
+    
+    return decode
+
+
+@pytest.fixture(autouse=True)
+def _clear_server_cache():
+    """
+    Start every test with an empty server cache and cold memoized helpers.
+    
+    Tests import common both as SmartThingsMCP.modules.server.common and as
+    modules.server.common, which are separate module objects; clear whichever
+    are loaded.
+    """
+    for name in ("SmartThingsMCP.modules.server.common", "modules.server.common"):
+        common = sys.modules.get(name)
+        if common is None:
+            continue
+        common._clear_cache()
+        for obj in vars(common).values():
+            if hasattr(obj, "cache_clear"):
+                obj.cache_clear()
+    yield
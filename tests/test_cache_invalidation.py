@@ -3,191 +3,596 @@ Test cache invalidation on write operations.
 
 Verifies that DELETE operations properly clear the cache.
 """
+import asyncio
 import pytest
-from unittest.mock import Mock, patch, MagicMock
-import sys
-import os
-
-# Add modules to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import requests
+from unittest.mock import Mock, patch
 
 from modules.server import common
 
 
+def _api_response(status_code=200, content=b'', headers=None):
+    """Build a real requests.Response, as the session would return it"""
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = content
+    response.headers.update(headers or {})
+    response.url = "https://api.smartthings.com/v1/"
+    return response
+
+
+# Responses shared across tests; built once and never modified
+_OK_CONTENT = b'{"result": "test"}'
+_OK_JSON = {"result": "test"}
+_OK_RESPONSE = _api_response(content=_OK_CONTENT)
+_EMPTY_RESPONSE = _api_response(content=b'{}')
+
+
 class TestCacheInvalidation:
     """Test cache clearing on write operations"""
     
-    def setup_method(self):
-        """Clear cache before each test"""
-        common._clear_cache()
+    @pytest.fixture(scope="class")
+    @classmethod
+    def _patched_request(cls):
+        """Patch the shared session once for the whole class"""
+        with patch.object(common._http_session, 'request') as mock_request:
+            yield mock_request
     
-    def test_get_request_caches_response(self):
+    @pytest.fixture
+    def mock_request(self, _patched_request):
+        """Provide the patched request, reset to return _OK_RESPONSE"""
+        _patched_request.reset_mock(return_value=True, side_effect=True)
+        _patched_request.return_value = _OK_RESPONSE
+        return _patched_request
+    
+    def test_get_request_caches_response(self, mock_request):
         """Test that GET requests are cached"""
-        with patch('modules.server.common.requests.request') as mock_request:
-            mock_response = Mock()
-            mock_response.status_code = 200
-            mock_response.content = b'{"result": "test"}'
-            mock_response.json.return_value = {"result": "test"}
-            mock_request.return_value = mock_response
-            
-            # First request - should hit API
-            result1 = common.make_request("Bearer token", "GET", "https://api.smartthings.com/v1/test")
-            
-            # Second request - should hit cache
-            result2 = common.make_request("Bearer token", "GET", "https://api.smartthings.com/v1/test")
-            
-            # API should only be called once
-            assert mock_request.call_count == 1
-            assert result1 == result2
-    
-    def test_delete_clears_cache(self):
-        """Test that DELETE operation clears all cache"""
-        with patch('modules.server.common.requests.request') as mock_request:
-            mock_response = Mock()
-            mock_response.status_code = 200
-            mock_response.content = b'{"result": "test"}'
-            mock_response.json.return_value = {"result": "test"}
-            mock_request.return_value = mock_response
-            
-            # First: Cache some GET requests
-            common.make_request("Bearer token", "GET", "https://api.smartthings.com/v1/rules")
-            common.make_request("Bearer token", "GET", "https://api.smartthings.com/v1/devices")
-            
-            # Verify cache has entries
-            stats = common.get_cache_stats()
-            assert stats['size'] == 2
-            
-            # Now perform DELETE operation
+        # First request - should hit API
+        result1 = common.make_request("Bearer token", "GET", "https://api.smartthings.com/v1/test")
+        
+        # Second request - should hit cache
+        result2 = common.make_request("Bearer token", "GET", "https://api.smartthings.com/v1/test")
+        
+        # API should only be called once
+        assert mock_request.call_count == 1
+        assert result1 == result2 == _OK_JSON
+    
+    def test_delete_clears_cache(self, mock_request):
+        """Test that DELETE operation clears cached reads of the same resource only"""
+        # First: Cache some GET requests
+        common.make_request("Bearer token", "GET", "https://api.smartthings.com/v1/rules")
+        common.make_request("Bearer token", "GET", "https://api.smartthings.com/v1/devices")
+        
+        # Verify cache has entries
+        assert common.cache_size() == 2
+        
+        # Now perform DELETE operation
+        common.make_request("Bearer token", "DELETE", "https://api.smartthings.com/v1/rules/123")
+        
+        # Verify only the rules entry was dropped
+        assert common.cache_size() == 1
+        common.make_request("Bearer token", "GET", "https://api.smartthings.com/v1/devices")
+        assert mock_request.call_count == 3
+    
+    def test_write_invalidates_extra_namespaces(self, mock_request):
+        """Test that a write can name other namespaces it affects"""
+        common.make_request("Bearer token", "GET", "https://api.smartthings.com/v1/devices")
+        common.make_request("Bearer token", "GET", "https://api.smartthings.com/v1/locations")
+        
+        # Scene execution changes device states
+        common.make_request("Bearer token", "POST", "https://api.smartthings.com/v1/scenes/s1/execute",
+                          invalidates=["devices"])
+        
+        assert common.cache_size() == 1
+        assert common._get_from_cache(common._generate_cache_key(
+            "GET", "https://api.smartthings.com/v1/locations", None, "Bearer token")) is not None
+    
+    @pytest.mark.parametrize("method,url,kwargs", [
+        ("POST", "https://api.smartthings.com/v1/rules", {"data": {"name": "test"}}),
+        ("PUT", "https://api.smartthings.com/v1/rules/123", {"data": {"name": "updated"}}),
+        # As sent by delete_rule
+        ("DELETE", "https://api.smartthings.com/v1/rules/rule123", {"params": {"locationId": "location123"}}),
+    ])
+    def test_write_clears_cache(self, mock_request, method, url, kwargs):
+        """Test that writes to a resource clear its cached reads"""
+        common.make_request("Bearer token", "GET", "https://api.smartthings.com/v1/rules")
+        assert common.cache_size() == 1
+        
+        common.make_request("Bearer token", method, url, **kwargs)
+        
+        assert common.cache_size() == 0
+    
+    def test_failed_delete_still_clears_cache(self, mock_request):
+        """Test that cache is cleared even if DELETE fails"""
+        # DELETE will fail
+        mock_request.side_effect = [_OK_RESPONSE, _api_response(404, b'{"error": "Not found"}')]
+        
+        # Cache a GET
+        common.make_request("Bearer token", "GET", "https://api.smartthings.com/v1/rules")
+        assert common.cache_size() == 1
+        
+        # Try to DELETE (will fail)
+        with pytest.raises(Exception):
             common.make_request("Bearer token", "DELETE", "https://api.smartthings.com/v1/rules/123")
+        
+        # Cache should still be cleared (happens before the request)
+        assert common.cache_size() == 0
+    
+    def test_cache_refills_after_clear(self, mock_request):
+        """Test that cache refills correctly after being cleared"""
+        # Cache initial GET
+        common.make_request("Bearer token", "GET", "https://api.smartthings.com/v1/rules")
+        assert common.cache_size() == 1
+        assert mock_request.call_count == 1
+        
+        # Clear cache with DELETE
+        common.make_request("Bearer token", "DELETE", "https://api.smartthings.com/v1/rules/123")
+        assert common.cache_size() == 0
+        assert mock_request.call_count == 2
+        
+        # GET again - should refill cache
+        common.make_request("Bearer token", "GET", "https://api.smartthings.com/v1/rules")
+        assert common.cache_size() == 1
+        assert mock_request.call_count == 3
+        
+        # GET again - should hit cache (no new API call)
+        common.make_request("Bearer token", "GET", "https://api.smartthings.com/v1/rules")
+        assert common.cache_size() == 1
+        assert mock_request.call_count == 3  # Still 3, used cache
+    
+    def test_async_request_shares_cache(self, mock_request):
+        """Test that make_request_async caches GETs and clears on writes like make_request"""
+        async def run():
+            url = "https://api.smartthings.com/v1/rules"
+            await asyncio.gather(*[common.make_request_async("token", "GET", url) for _ in range(2)])
+            await common.make_request_async("token", "GET", url)
+            assert common.cache_size() == 1
             
-            # Verify cache is empty
-            stats_after = common.get_cache_stats()
-            assert stats_after['size'] == 0
-    
-    def test_post_clears_cache(self):
-        """Test that POST operation clears cache"""
-        with patch('modules.server.common.requests.request') as mock_request:
-            mock_response = Mock()
-            mock_response.status_code = 200
-            mock_response.content = b'{"result": "test"}'
-            mock_response.json.return_value = {"result": "test"}
-            mock_request.return_value = mock_response
-            
-            # Cache a GET request
-            common.make_request("Bearer token", "GET", "https://api.smartthings.com/v1/rules")
-            assert common.get_cache_stats()['size'] == 1
-            
-            # POST operation
-            common.make_request("Bearer token", "POST", "https://api.smartthings.com/v1/rules", 
-                              data={"name": "test"})
-            
-            # Cache should be cleared
-            assert common.get_cache_stats()['size'] == 0
-    
-    def test_put_clears_cache(self):
-        """Test that PUT operation clears cache"""
-        with patch('modules.server.common.requests.request') as mock_request:
-            mock_response = Mock()
-            mock_response.status_code = 200
-            mock_response.content = b'{"result": "test"}'
-            mock_response.json.return_value = {"result": "test"}
-            mock_request.return_value = mock_response
-            
-            # Cache a GET request
-            common.make_request("Bearer token", "GET", "https://api.smartthings.com/v1/rules")
-            assert common.get_cache_stats()['size'] == 1
-            
-            # PUT operation
-            common.make_request("Bearer token", "PUT", "https://api.smartthings.com/v1/rules/123",
-                              data={"name": "updated"})
-            
-            # Cache should be cleared
-            assert common.get_cache_stats()['size'] == 0
-    
-    def test_delete_rule_clears_cache(self):
-        """Test that delete_rule properly clears cache"""
-        with patch('modules.server.common.requests.request') as mock_request:
-            mock_response = Mock()
-            mock_response.status_code = 200
-            mock_response.content = b'{"result": "deleted"}'
-            mock_response.json.return_value = {"result": "deleted"}
-            mock_request.return_value = mock_response
-            
-            # Cache a list_rules result
-            common.make_request("Bearer token", "GET", "https://api.smartthings.com/v1/rules")
-            assert common.get_cache_stats()['size'] == 1
-            
-            # Delete a rule (simulating the delete_rule function behavior)
-            common.make_request("Bearer token", "DELETE", "https://api.smartthings.com/v1/rules/rule123",
-                              params={"locationId": "location123"})
-            
-            # Cache should be cleared
-            assert common.get_cache_stats()['size'] == 0
+            await common.make_request_async("token", "DELETE", url + "/123")
+            assert common.cache_size() == 0
+        
+        asyncio.run(run())
+        
+        # Two concurrent misses share one request, then a cached read and one DELETE
+        assert mock_request.call_count == 2
+
+
+class TestCacheKeys:
+    """Test server cache key generation"""
     
-    def test_failed_delete_still_clears_cache(self):
-        """Test that cache is cleared even if DELETE fails"""
-        with patch('modules.server.common.requests.request') as mock_request:
-            # Setup: Cache a GET request
-            mock_response_get = Mock()
-            mock_response_get.status_code = 200
-            mock_response_get.content = b'{"result": "test"}'
-            mock_response_get.json.return_value = {"result": "test"}
+    def test_key_ignores_param_order(self):
+        """Test that parameter order does not change the key"""
+        url = "https://api.smartthings.com/v1/devices"
+        key1 = common._generate_cache_key("GET", url, {"capability": "switch", "locationId": "l1"})
+        key2 = common._generate_cache_key("GET", url, {"locationId": "l1", "capability": "switch"})
+        
+        assert key1 == key2
+        assert key1 != common._generate_cache_key("GET", url, None)
+    
+    def test_tokens_do_not_share_cached_responses(self):
+        """Test that a response cached for one token is not served to another"""
+        url = "https://api.smartthings.com/v1/rules"
+        responses = [_api_response(content=b'{"items": ["a"]}'),
+                     _api_response(content=b'{"items": ["b"]}')]
+        
+        with patch.object(common._http_session, 'request', side_effect=responses) as mock_request:
+            assert common.make_request("token-a", "GET", url) == {"items": ["a"]}
+            assert common.make_request("token-b", "GET", url) == {"items": ["b"]}
+            assert common.make_request("token-a", "GET", url) == {"items": ["a"]}
+        
+        assert mock_request.call_count == 2
+        assert common._ttl_for(url) == 15
+    
+    def test_entry_expires_at_deadline(self):
+        """Test that entries expire once their monotonic deadline passes"""
+        key = common._generate_cache_key("GET", "https://api.smartthings.com/v1/locations", None)
+        
+        with patch.object(common.time, 'monotonic', return_value=1000.0):
+            common._put_in_cache(key, {"items": []})
+        with patch.object(common.time, 'monotonic', return_value=1000.0 + common._cache_ttl - 1):
+            assert common._get_from_cache(key) == {"items": []}
+        with patch.object(common.time, 'monotonic', return_value=1000.0 + common._cache_ttl):
+            assert common._get_from_cache(key) is None
+        
+        assert common.cache_size() == 0
+    
+    def test_ttl_depends_on_resource(self):
+        """Test that live device state expires sooner than device metadata"""
+        device_url = "https://api.smartthings.com/v1/devices/d1"
+        
+        assert common._ttl_for(device_url + "/status") == 5
+        assert common._ttl_for(device_url + "/components/main/status?x=1") == 5
+        assert common._ttl_for(device_url + "/presentation") == 300
+        assert common._ttl_for("https://api.smartthings.com/v1/devices") == 30
+        assert common._ttl_for(device_url) == common._cache_ttl
+    
+    def test_nested_params_are_hashable(self):
+        """Test that nested parameter values produce a hashable key"""
+        key = common._generate_cache_key("GET", "https://api.smartthings.com/v1/rules",
+                                         {"filter": {"b": 1, "a": [1, 2]}})
+        
+        assert hash(key) == hash(common._generate_cache_key(
+            "GET", "https://api.smartthings.com/v1/rules", {"filter": {"a": [1, 2], "b": 1}}))
+
+
+class TestInflightDeduplication:
+    """Test that identical concurrent GETs share one upstream request"""
+    
+    def test_concurrent_gets_share_one_request(self):
+        """Test that callers racing for the same URL all get the single response"""
+        import time
+        
+        def slow_request(**kwargs):
+            time.sleep(0.02)
+            return _api_response(content=b'{"id": "d1"}')
+        
+        with patch.object(common._http_session, 'request', side_effect=slow_request) as mock_request:
+            async def run():
+                url = "https://api.smartthings.com/v1/devices/d1/status"
+                return await asyncio.gather(*[common.make_request_async("token", "GET", url) for _ in range(5)])
             
-            # DELETE will fail
-            mock_response_delete = Mock()
-            mock_response_delete.status_code = 404
-            mock_response_delete.raise_for_status.side_effect = Exception("Not found")
+            results = asyncio.run(run())
+        
+        assert mock_request.call_count == 1
+        assert results == [{"id": "d1"}] * 5
+        assert common._inflight == {}
+    
+    def test_concurrent_gets_are_shared_per_token(self):
+        """Test that identical GETs are only joined when they use the same token"""
+        import time
+        
+        def slow_request(**kwargs):
+            time.sleep(0.02)
+            return _api_response(content=b'{"items": []}')
+        
+        with patch.object(common._http_session, 'request', side_effect=slow_request) as mock_request:
+            async def run():
+                url = "https://api.smartthings.com/v1/rules"
+                params = {"locationId": "loc-1"}
+                return await asyncio.gather(*[common.make_request_async(token, "GET", url, params=params)
+                                              for token in ("token-a", "token-a", "token-b")])
             
-            mock_request.side_effect = [mock_response_get, mock_response_delete]
+            asyncio.run(run())
+        
+        assert mock_request.call_count == 2
+    
+    def test_failure_reaches_every_waiter(self):
+        """Test that a failed shared request raises for every caller and isn't kept"""
+        with patch.object(common._http_session, 'request',
+                   side_effect=requests.exceptions.ConnectionError("down")) as mock_request:
+            async def run():
+                url = "https://api.smartthings.com/v1/devices"
+                return await asyncio.gather(*[common.make_request_async("token", "GET", url) for _ in range(3)],
+                                            return_exceptions=True)
             
-            # Cache a GET
-            common.make_request("Bearer token", "GET", "https://api.smartthings.com/v1/rules")
-            assert common.get_cache_stats()['size'] == 1
+            results = asyncio.run(run())
+        
+        assert mock_request.call_count == 1
+        assert all("down" in str(result) for result in results)
+        assert common._inflight == {}
+
+
+    def test_write_during_get_detaches_and_skips_caching(self):
+        """Test that a GET in flight when a write lands is neither joined nor cached"""
+        import threading
+        
+        url = "https://api.smartthings.com/v1/devices/d1"
+        started = threading.Event()
+        release = threading.Event()
+        
+        def fake_request(method, url, **kwargs):
+            if method == "GET" and not started.is_set():
+                started.set()
+                release.wait(1)
+                return _api_response(content=b'{"name": "old"}')
+            if method == "GET":
+                return _api_response(content=b'{"name": "new"}')
+            return _EMPTY_RESPONSE
+        
+        with patch.object(common._http_session, 'request', side_effect=fake_request) as mock_request:
+            async def run():
+                stale = asyncio.create_task(common.make_request_async("token", "GET", url))
+                await asyncio.to_thread(started.wait, 1)
+                await common.make_request_async("token", "DELETE", url)
+                fresh = await common.make_request_async("token", "GET", url)
+                release.set()
+                return await stale, fresh
             
-            # Try to DELETE (will fail)
-            with pytest.raises(Exception):
-                common.make_request("Bearer token", "DELETE", "https://api.smartthings.com/v1/rules/123")
+            stale, fresh = asyncio.run(run())
+            cached = common.make_request("token", "GET", url)
+        
+        assert stale == {"name": "old"}
+        assert fresh == {"name": "new"}
+        assert cached == {"name": "new"}
+        assert mock_request.call_count == 3
+        assert common._inflight == {}
+
+
+class TestConditionalRequests:
+    """Test ETag revalidation of slow-changing resources"""
+    
+    def test_expired_entry_is_revalidated_with_etag(self):
+        """Test that a 304 after expiry returns the stored body and refreshes the entry"""
+        url = "https://api.smartthings.com/v1/devices/d1/presentation"
+        first = _api_response(content=b'{"dashboard": {}}', headers={"ETag": '"v1"'})
+        not_modified = _api_response(304, headers={"ETag": '"v1"'})
+        
+        with patch.object(common._http_session, 'request',
+                   side_effect=[first, not_modified]) as mock_request:
+            assert common.make_request("token", "GET", url) == {"dashboard": {}}
             
-            # Cache should still be cleared (happens before the request)
-            assert common.get_cache_stats()['size'] == 0
+            # Let the TTL run out, then read again
+            key = common._generate_cache_key("GET", url, None, "token")
+            result, _ = common._server_cache[key]
+            common._server_cache[key] = (result, 0.0)
+            assert common.make_request("token", "GET", url) == {"dashboard": {}}
+        
+        assert "If-None-Match" not in mock_request.call_args_list[0].kwargs["headers"]
+        assert mock_request.call_args_list[1].kwargs["headers"]["If-None-Match"] == '"v1"'
+        assert common._get_from_cache(key) == {"dashboard": {}}
     
-    def test_cache_refills_after_clear(self):
-        """Test that cache refills correctly after being cleared"""
-        with patch('modules.server.common.requests.request') as mock_request:
-            mock_response = Mock()
-            mock_response.status_code = 200
-            mock_response.content = b'{"result": "test"}'
-            mock_response.json.return_value = {"result": "test"}
-            mock_request.return_value = mock_response
+    def test_volatile_resources_are_not_revalidated(self):
+        """Test that status reads store no validator"""
+        url = "https://api.smartthings.com/v1/devices/d1/status"
+        response = _api_response(content=b'{"switch": "on"}', headers={"ETag": '"v1"'})
+        
+        with patch.object(common._http_session, 'request', return_value=response):
+            common.make_request("token", "GET", url)
+        
+        assert common._validators == {}
+
+
+class TestHttpSession:
+    """Test the shared SmartThings API session"""
+    
+    def test_gateway_errors_are_retried_for_idempotent_methods(self):
+        """Test that the adapter retries 502/503/504 but never resends a POST"""
+        retry = common._http_session.get_adapter(common.BASE_URL).max_retries
+        
+        assert retry.total == 3
+        assert {502, 503, 504} <= set(retry.status_forcelist)
+        assert retry.is_retry("GET", 503)
+        assert not retry.is_retry("POST", 503)
+        assert retry.is_retry("GET", 429)
+    
+    def test_rate_limited_writes_are_retried_with_jittered_backoff(self):
+        """Test that a 429 is retried for any method, with capped and jittered backoff"""
+        retry = common._http_session.get_adapter(common.BASE_URL).max_retries
+        
+        assert retry.is_retry("POST", 429)
+        assert retry.backoff_max == 30
+        assert retry.backoff_jitter > 0
+        assert type(retry.new()) is type(retry)
+    
+    def test_requests_use_a_timeout(self):
+        """Test that every API call is sent with a connect/read timeout"""
+        with patch.object(common._http_session, 'request') as mock_request:
+            mock_request.return_value = _api_response()
+            common.make_request("test-token", "GET", "https://api.smartthings.com/v1/devices")
+        
+        assert mock_request.call_args.kwargs["timeout"] == common.HTTP_TIMEOUT
+    
+    def test_request_headers_are_built_per_call(self):
+        """Test that auth and JSON headers are sent without modifying the caller's headers"""
+        extra = {"X-Trace": "1"}
+        with patch.object(common._http_session, 'request') as mock_request:
+            mock_request.return_value = _api_response()
+            common.make_request("test-token", "POST", "https://api.smartthings.com/v1/rules", headers=extra)
+        
+        sent = mock_request.call_args.kwargs["headers"]
+        assert sent == {"X-Trace": "1", "Content-Type": "application/json",
+                        "Accept": "application/json", "Accept-Encoding": common.ACCEPT_ENCODING,
+                        "Authorization": "Bearer test-token"}
+        assert "gzip" in sent["Accept-Encoding"]
+        assert extra == {"X-Trace": "1"}
+    
+    def test_auth_headers_are_reused_per_token(self):
+        """Test that a token's header mapping is built once and cannot be modified"""
+        first = common._auth_headers("test-token")
+        assert common._auth_headers("test-token") is first
+        assert common._auth_headers("other-token")["Authorization"] == "Bearer other-token"
+        with pytest.raises(TypeError):
+            first["Authorization"] = "Bearer changed"
+        assert common._auth_headers.cache_info().maxsize == common.AUTH_HEADERS_CACHE_SIZE
+    
+    def test_http2_falls_back_without_httpx(self, monkeypatch):
+        """Test that enabling HTTP/2 without httpx keeps the pooled HTTP/1.1 session"""
+        monkeypatch.setattr(common, "HTTP2_ENABLED", True)
+        monkeypatch.setattr(common, "httpx", None)
+        assert common._new_http2_client() is None
+        
+        monkeypatch.setattr(common, "HTTP2_ENABLED", False)
+        assert common._new_http2_client() is None
+    
+    def test_request_body_is_sent_as_json(self):
+        """Test that the body reaches the API as JSON, pre-encoded when orjson is installed"""
+        import json
+        with patch.object(common._http_session, 'request') as mock_request:
+            mock_request.return_value = _api_response()
+            common.make_request("test-token", "POST", "https://api.smartthings.com/v1/rules",
+                                data={"name": "r", "enabled": False})
+        
+        sent = mock_request.call_args.kwargs
+        body = json.loads(sent["data"]) if "data" in sent else sent["json"]
+        assert body == {"name": "r", "enabled": False}
+    
+    def test_format_json_matches_stdlib(self, monkeypatch):
+        """Test that debug JSON dumps decode the same with and without orjson"""
+        import json
+        data = {"name": "r", "actions": [{"if": {"equals": {"left": 1, "right": 2}}}]}
+        assert json.loads(common.format_json(data)) == data
+        
+        monkeypatch.setattr(common, "orjson", None)
+        assert common.format_json(data) == json.dumps(data, indent=2)
+    
+    def test_per_token_sessions_are_separate_and_bounded(self, monkeypatch):
+        """Test that per-token mode gives each token its own session and evicts the oldest"""
+        monkeypatch.setattr(common, "SESSION_PER_TOKEN", True)
+        monkeypatch.setattr(common, "MAX_TENANT_SESSIONS", 2)
+        monkeypatch.setattr(common, "_tenant_sessions", {})
+        
+        first = common._session_for("token-a")
+        assert common._session_for("token-a") is first
+        assert common._session_for("token-b") is not first
+        assert first is not common._http_session
+        
+        common._session_for("token-c")
+        assert len(common._tenant_sessions) == 2
+        assert common._session_for("token-a") is not first
+    
+    def test_shared_session_by_default(self):
+        """Test that all tokens share one session unless per-token mode is enabled"""
+        assert common._session_for("token-a") is common._session_for("token-b") is common._http_session
+    
+    def test_invalid_json_body_is_reported_as_request_failure(self):
+        """Test that an undecodable body fails like any other API error"""
+        with patch.object(common._http_session, 'request') as mock_request:
+            mock_request.return_value = _api_response(content=b'{not json')
             
-            # Cache initial GET
-            common.make_request("Bearer token", "GET", "https://api.smartthings.com/v1/rules")
-            assert common.get_cache_stats()['size'] == 1
-            assert mock_request.call_count == 1
+            with pytest.raises(Exception, match="SmartThings API request failed"):
+                common.make_request("test-token", "GET", "https://api.smartthings.com/v1/devices")
+
+
+class TestConcurrencyLimit:
+    """Test the cap on concurrent SmartThings API calls"""
+    
+    def teardown_method(self):
+        """Restore the default limit"""
+        common.set_max_concurrency(common.HTTP_POOL_MAXSIZE)
+    
+    def test_in_flight_requests_are_capped(self):
+        """Test that no more than the configured number of requests run at once"""
+        import threading
+        import time
+        
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+        
+        def fake_request(**kwargs):
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(0.02)
+            with lock:
+                state["active"] -= 1
+            return _EMPTY_RESPONSE
+        
+        common.set_max_concurrency(2)
+        with patch.object(common._http_session, 'request', side_effect=fake_request):
+            async def run():
+                await asyncio.gather(*[
+                    common.make_request_async("token", "GET", f"https://api.smartthings.com/v1/devices/{i}")
+                    for i in range(6)
+                ])
             
-            # Clear cache with DELETE
-            common.make_request("Bearer token", "DELETE", "https://api.smartthings.com/v1/rules/123")
-            assert common.get_cache_stats()['size'] == 0
-            assert mock_request.call_count == 2
+            asyncio.run(run())
+        
+        assert state["peak"] == 2
+    
+    def test_in_flight_requests_are_capped_per_token(self, monkeypatch):
+        """Test that one token can't use more than its share of the global limit"""
+        import threading
+        import time
+        
+        lock = threading.Lock()
+        active = {}
+        peak = {}
+        
+        def fake_request(**kwargs):
+            token = kwargs["headers"]["Authorization"]
+            with lock:
+                active[token] = active.get(token, 0) + 1
+                peak[token] = max(peak.get(token, 0), active[token])
+            time.sleep(0.02)
+            with lock:
+                active[token] -= 1
+            return _EMPTY_RESPONSE
+        
+        monkeypatch.setattr(common, "MAX_CONCURRENCY_PER_TOKEN", 2)
+        with patch.object(common._http_session, 'request', side_effect=fake_request):
+            async def run():
+                await asyncio.gather(*[
+                    common.make_request_async(token, "GET", f"https://api.smartthings.com/v1/devices/{token}-{i}")
+                    for token in ("a", "b") for i in range(5)
+                ])
             
-            # GET again - should refill cache
-            common.make_request("Bearer token", "GET", "https://api.smartthings.com/v1/rules")
-            assert common.get_cache_stats()['size'] == 1
-            assert mock_request.call_count == 3
+            asyncio.run(run())
+        
+        assert peak == {"Bearer a": 2, "Bearer b": 2}
+    
+    def test_per_token_cap_holds_with_many_tokens(self, monkeypatch):
+        """Test that a token's semaphore is kept while held, however many tokens are active"""
+        import threading
+        import time
+        
+        lock = threading.Lock()
+        active = {}
+        peak = {}
+        
+        def fake_request(**kwargs):
+            token = kwargs["headers"]["Authorization"]
+            with lock:
+                active[token] = active.get(token, 0) + 1
+                peak[token] = max(peak.get(token, 0), active[token])
+            time.sleep(0.01)
+            with lock:
+                active[token] -= 1
+            return _EMPTY_RESPONSE
+        
+        monkeypatch.setattr(common, "MAX_CONCURRENCY_PER_TOKEN", 1)
+        common.set_max_concurrency(40)
+        tokens = [f"token-{n}" for n in range(common.MAX_TENANT_SESSIONS + 4)]
+        with patch.object(common._http_session, 'request', side_effect=fake_request):
+            async def run():
+                # Interleave tokens so each one's calls are spread across the others'
+                await asyncio.gather(*[
+                    common.make_request_async(token, "GET", f"https://api.smartthings.com/v1/devices/{token}-{i}")
+                    for i in range(3) for token in tokens
+                ])
+                return common._loop_limits[asyncio.get_running_loop()].tokens
             
-            # GET again - should hit cache (no new API call)
-            common.make_request("Bearer token", "GET", "https://api.smartthings.com/v1/rules")
-            assert common.get_cache_stats()['size'] == 1
-            assert mock_request.call_count == 3  # Still 3, used cache
+            remaining = asyncio.run(run())
+        
+        assert set(peak.values()) == {1}
+        assert remaining == {}
+    
+    def test_limits_work_across_event_loops(self):
+        """Test that a contended limit can be used again from a new event loop"""
+        import time
+        
+        def slow_request(**kwargs):
+            time.sleep(0.01)
+            return _EMPTY_RESPONSE
+        
+        common.set_max_concurrency(1)
+        with patch.object(common._http_session, 'request', side_effect=slow_request) as mock_request:
+            for run_number in range(2):
+                async def run():
+                    await asyncio.gather(*[
+                        common.make_request_async("token", "GET",
+                                                  f"https://api.smartthings.com/v1/devices/{run_number}-{i}")
+                        for i in range(3)
+                    ])
+                
+                asyncio.run(run())
+        
+        assert mock_request.call_count == 6
+    
+    def test_invalid_limit_rejected(self):
+        """Test that a limit below one is rejected"""
+        with pytest.raises(ValueError):
+            common.set_max_concurrency(0)
+    
+    def test_worker_pool_follows_limit(self):
+        """Test that API calls run on a dedicated pool sized to the limit"""
+        common.set_max_concurrency(3)
+        
+        assert common._api_executor._max_workers == 3
 
 
 class TestCacheStats:
     """Test cache statistics"""
     
-    def setup_method(self):
-        """Clear cache before each test"""
-        common._clear_cache()
-    
     def test_cache_stats_structure(self):
         """Test that cache stats returns expected structure"""
         stats = common.get_cache_stats()
@@ -200,15 +605,11 @@ class TestCacheStats:
         assert 'misses' in stats
         assert 'total_requests' in stats
         assert 'hit_rate_percent' in stats
+        assert stats['size'] == common.cache_size()
     
     def test_cache_hit_rate(self):
         """Test cache hit rate calculation"""
-        with patch('modules.server.common.requests.request') as mock_request:
-            mock_response = Mock()
-            mock_response.status_code = 200
-            mock_response.content = b'{"result": "test"}'
-            mock_response.json.return_value = {"result": "test"}
-            mock_request.return_value = mock_response
+        with patch.object(common._http_session, 'request', return_value=_OK_RESPONSE) as mock_request:
             
             # First request - miss
             common.make_request("Bearer token", "GET", "https://api.smartthings.com/v1/test")
@@ -223,7 +624,7 @@ class TestCacheStats:
             assert stats['hits'] == 2
             assert stats['misses'] == 1
             assert stats['total_requests'] == 3
-            assert stats['hit_rate_percent'] == pytest.approx(66.67, abs=0.01)
+            assert stats['hit_rate_percent'] == round(200 / 3, 2)
 
 
 if __name__ == "__main__":
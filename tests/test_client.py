@@ -2,10 +2,51 @@
 Unit tests for SmartThingsMCP client operations.
 Tests the SmartThingsMCPClient and client-side caching functionality.
 """
+import asyncio
+import inspect
+import io
+import json
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from dataclasses import dataclass
+from unittest.mock import Mock, patch
 from datetime import datetime, timedelta
 
+from SmartThingsMCP.modules.client.main import SmartThingsMCPClient
+from SmartThingsMCP.modules.client.batching import BatchingProxy, CoalescingLoader, rule_creation_loader
+from SmartThingsMCP.modules.client.utils import convert_tool_to_dict, dump_tool_result
+
+
+class FakeSession:
+    """Stand-in for a connected FastMCP client that records tool calls."""
+    
+    def __init__(self):
+        self.calls = []
+    
+    async def call_tool(self, tool_name, params):
+        self.calls.append((tool_name, params))
+        return {"tool": tool_name, "params": params}
+
+
+@pytest.fixture
+def client_with_session():
+    """Provide a client wired to a FakeSession instead of a live server."""
+    client = SmartThingsMCPClient(transport="http")
+    client._session = FakeSession()
+    return client
+
+
+@pytest.fixture(scope="module")
+def _mock_request_template():
+    """Build the make_request stand-in once per module."""
+    return Mock()
+
+
+@pytest.fixture
+def mock_request(_mock_request_template):
+    """Provide a stand-in for make_request; these tests only use its return value."""
+    _mock_request_template.reset_mock(return_value=True, side_effect=True)
+    return _mock_request_template
+
 
 class TestClientCaching:
     """Test client-side caching functionality."""
@@ -79,42 +120,588 @@ class TestClientCaching:
         assert stats["hits"] / (stats["hits"] + stats["misses"]) == 2/3
 
 
-class TestClientAuthentication:
-    """Test client authentication."""
+class TestCacheKeys:
+    """Test client cache key generation."""
+    
+    def test_key_ignores_param_order(self, client_with_session):
+        """Test that parameter order does not change the cache key."""
+        key1 = client_with_session._generate_cache_key(
+            "get_device", {"auth": "token", "device_id": "d1"})
+        key2 = client_with_session._generate_cache_key(
+            "get_device", {"device_id": "d1", "auth": "token"})
+        
+        assert key1 == key2
+    
+    def test_key_handles_nested_params(self, client_with_session):
+        """Test that nested dict/list parameters produce hashable keys."""
+        params = {"actions": [{"command": "on", "arguments": [1, 2]}]}
+        key = client_with_session._generate_cache_key("create_rule", params)
+        
+        assert hash(key) == hash(client_with_session._generate_cache_key("create_rule", params))
+        assert key[0] == "create_rule"
+    
+    def test_flat_and_nested_keys_match_canonical_form(self, client_with_session):
+        """Test that the flat-params fast path builds the same key as full canonicalization."""
+        from SmartThingsMCP.modules.client.cache import _canon
+        
+        flat = {"device_id": "d1", "auth": "token"}
+        nested = {"auth": "token", "command": {"capability": "switch", "arguments": []}}
+        
+        assert client_with_session._generate_cache_key("get_device", flat) == ("get_device", _canon(flat))
+        assert client_with_session._generate_cache_key("execute_command", nested) == \
+            ("execute_command", _canon(nested))
+
+
+class TestClientSlots:
+    """Test that client instances use __slots__."""
+    
+    def test_client_has_no_instance_dict(self, client_with_session):
+        """Test that the combined client declares every attribute as a slot."""
+        assert not hasattr(client_with_session, "__dict__")
+        assert client_with_session.get_cache_stats()["size"] == 0
+    
+    def test_batching_helpers_have_no_instance_dict(self, client_with_session):
+        """Test that the per-client batching helpers are slotted too."""
+        assert not hasattr(BatchingProxy(client_with_session), "__dict__")
+        assert not hasattr(rule_creation_loader(client_with_session), "__dict__")
+
+
+class TestHttpPooling:
+    """Test keep-alive pooling for the HTTP transport."""
+    
+    def test_http_transport_uses_pooled_client_factory(self):
+        """Test that the http transport builds its httpx client through the pooled factory."""
+        pytest.importorskip("httpx")
+        from SmartThingsMCP.modules.client.base import _pooled_http_client
+        
+        client = SmartThingsMCPClient(transport="http")
+        
+        assert client.client.transport.httpx_client_factory is _pooled_http_client
+
+
+class FakeConnection:
+    """Stand-in for the FastMCP client context that opens a new session each time."""
+    
+    def __init__(self, error):
+        self.error = error
+        self.opened = 0
+        self.closed = 0
+    
+    async def __aenter__(self):
+        self.opened += 1
+        session = FakeSession()
+        if self.opened == 1:
+            async def fail(tool_name, params):
+                raise self.error
+            session.call_tool = fail
+        return session
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.closed += 1
+
+
+class TestSessionRecovery:
+    """Test that a failed call does not leave the client on a dead session."""
+    
+    def test_connection_failure_reconnects_on_next_call(self):
+        """Test that a transport error closes the session and the next call opens a new one."""
+        client = SmartThingsMCPClient(transport="http")
+        client.client = connection = FakeConnection(ConnectionError("connection reset"))
+        
+        first = asyncio.run(client.call_tool("get_device", device_id="d1"))
+        assert first == {"error": "connection reset"}
+        assert client._session is None and connection.closed == 1
+        
+        second = asyncio.run(client.call_tool("get_device", device_id="d1"))
+        assert second == {"tool": "get_device", "params": {"device_id": "d1"}}
+        assert connection.opened == 2
+    
+    def test_tool_error_keeps_session(self):
+        """Test that an error reported by the server keeps the working session."""
+        from fastmcp.exceptions import ToolError
+        
+        client = SmartThingsMCPClient(transport="http")
+        client.client = connection = FakeConnection(ToolError("device not found"))
+        
+        assert asyncio.run(client.call_tool("get_device", device_id="d1")) == {"error": "device not found"}
+        assert client._session is not None and connection.closed == 0
+
+
+class TestCacheEviction:
+    """Test LRU eviction in the client cache."""
+    
+    def test_oldest_entry_evicted(self):
+        """Test that inserting past max size evicts the least recently used entry."""
+        client = SmartThingsMCPClient(transport="http", max_cache_size=2)
+        client._put_in_cache(("a", ()), 1)
+        client._put_in_cache(("b", ()), 2)
+        
+        # Refreshing "a" makes "b" the least recently used entry
+        client._put_in_cache(("a", ()), 3)
+        client._put_in_cache(("c", ()), 4)
+        
+        assert list(client._cache) == [("a", ()), ("c", ())]
+        assert client._get_from_cache(("a", ())) == 3
+        assert client._cache_by_tool == {"a": {("a", ())}, "c": {("c", ())}}
+
+
+class TestCacheExpiry:
+    """Test TTL expiry in the client cache."""
+    
+    def test_entry_expires_at_deadline(self):
+        """Test that entries are served until their monotonic deadline passes."""
+        client = SmartThingsMCPClient(transport="http", cache_ttl=300)
+        
+        with patch("SmartThingsMCP.modules.client.cache.time.monotonic", return_value=1000.0):
+            client._put_in_cache(("list_locations", ()), {"items": []})
+        
+        with patch("SmartThingsMCP.modules.client.cache.time.monotonic", return_value=1299.0):
+            assert client._get_from_cache(("list_locations", ())) == {"items": []}
+        
+        with patch("SmartThingsMCP.modules.client.cache.time.monotonic", return_value=1300.0):
+            assert client._get_from_cache(("list_locations", ())) is None
+        
+        assert len(client._cache) == 0
+
+
+class TestDiskCache:
+    """Test the persistent disk cache tier."""
+    
+    def test_results_survive_a_new_client(self, tmp_path):
+        """Test that a second client reads entries written by the first."""
+        key = ("list_locations", ())
+        first = SmartThingsMCPClient(transport="http", disk_cache_dir=str(tmp_path))
+        first._put_in_cache(key, {"items": [1, 2]})
+        asyncio.run(first.aclose())
+        
+        second = SmartThingsMCPClient(transport="http", disk_cache_dir=str(tmp_path))
+        assert second._get_from_cache(key) == {"items": [1, 2]}
+        assert key in second._cache
+        
+        second._invalidate_cache_pattern("list_locations")
+        third = SmartThingsMCPClient(transport="http", disk_cache_dir=str(tmp_path))
+        assert third._get_from_cache(key) is None
+    
+    def test_promoted_entry_keeps_disk_expiry(self, tmp_path):
+        """Test that a disk hit is kept in memory only for the time it had left on disk."""
+        key = ("list_locations", ())
+        with patch("SmartThingsMCP.modules.client.disk_cache.time.time", return_value=1000.0):
+            first = SmartThingsMCPClient(transport="http", disk_cache_dir=str(tmp_path))
+            first._put_in_cache(key, {"items": []})
+            asyncio.run(first.aclose())
+        
+        with patch("SmartThingsMCP.modules.client.disk_cache.time.time", return_value=1250.0), \
+                patch("SmartThingsMCP.modules.client.cache.time.monotonic", return_value=500.0):
+            second = SmartThingsMCPClient(transport="http", disk_cache_dir=str(tmp_path))
+            assert second._get_from_cache(key) == {"items": []}
+        
+        assert second._cache[key][1] == 500.0 + second._cache_ttl - 250.0
+    
+    def test_tool_results_round_trip(self, tmp_path):
+        """Test that a CallToolResult comes back from disk as one."""
+        from mcp.types import TextContent
+        from fastmcp.client.client import CallToolResult
+        
+        key = ("get_device", (("device_id", "d1"),))
+        result = CallToolResult(content=[TextContent(type="text", text='{"id": "d1"}')],
+                                structured_content={"id": "d1"}, meta=None, data={"id": "d1"})
+        first = SmartThingsMCPClient(transport="http", disk_cache_dir=str(tmp_path))
+        first._put_in_cache(key, result)
+        asyncio.run(first.aclose())
+        
+        second = SmartThingsMCPClient(transport="http", disk_cache_dir=str(tmp_path))
+        assert second._get_from_cache(key) == result
+    
+    def test_stored_data_is_never_unpickled(self, tmp_path):
+        """Test that a pickle planted in the database is treated as a miss, not executed."""
+        import builtins
+        import pickle
+        import zlib
+        from SmartThingsMCP.modules.client.disk_cache import _disk_key
+        
+        class Payload:
+            def __reduce__(self):
+                return (exec, ("import builtins; builtins._smartthings_payload_ran = True",))
+        
+        key = ("list_locations", ())
+        client = SmartThingsMCPClient(transport="http", disk_cache_dir=str(tmp_path))
+        client._disk_cache._db.execute(
+            "INSERT INTO cache (key, tool, expires, value) VALUES (?, ?, ?, ?)",
+            (_disk_key(key), key[0], 1e12, zlib.compress(pickle.dumps(Payload()))))
+        
+        assert client._get_from_cache(key) is None
+        assert not hasattr(builtins, "_smartthings_payload_ran")
+    
+    def test_new_cache_is_private(self, tmp_path):
+        """Test that a new cache directory and database are accessible by their owner only."""
+        import os
+        import stat
+        
+        directory = tmp_path / "cache"
+        client = SmartThingsMCPClient(transport="http", disk_cache_dir=str(directory))
+        
+        assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+        assert stat.S_IMODE(os.stat(client._disk_cache.path).st_mode) == 0o600
+    
+    def test_auth_token_is_not_written(self, tmp_path):
+        """Test that rows are keyed by a digest and rows keyed by the plain cache key are purged."""
+        key = ("list_devices", (("auth", "SECRET-TOKEN"),))
+        first = SmartThingsMCPClient(transport="http", disk_cache_dir=str(tmp_path))
+        first._put_in_cache(key, {"items": []})
+        first._disk_cache._db.execute(
+            "INSERT INTO cache (key, tool, expires, value) VALUES (?, ?, ?, ?)",
+            (repr(("get_device", (("auth", "OLD-TOKEN"),))), "get_device", 1e12, b""))
+        asyncio.run(first.aclose())
+        
+        second = SmartThingsMCPClient(transport="http", disk_cache_dir=str(tmp_path))
+        rows = second._disk_cache._db.execute("SELECT key, tool FROM cache").fetchall()
+        
+        assert len(rows) == 1 and rows[0][1] == "list_devices"
+        assert "TOKEN" not in rows[0][0]
+        assert second._get_from_cache(key) == {"items": []}
+        assert b"SECRET-TOKEN" not in (tmp_path / "smartthings_mcp_cache.sqlite3").read_bytes()
+
+
+class TestClientWriteInvalidation:
+    """Test that client write operations invalidate related cache entries."""
+    
+    def test_update_rule_invalidates_rule_reads(self, client_with_session):
+        """Test that update_rule drops cached list_rules but keeps unrelated entries."""
+        async def run():
+            await client_with_session.call_tool("list_rules", location_id="loc-1")
+            await client_with_session.call_tool("list_locations")
+            await client_with_session.call_tool("update_rule", rule_id="rule-1", enabled=False)
+        
+        asyncio.run(run())
+        
+        assert [key[0] for key in client_with_session._cache] == ["list_locations"]
+        assert "list_rules" not in client_with_session._cache_by_tool
+
+
+class TestToolMethods:
+    """Test the generated mixin tool methods."""
     
-    def test_bearer_token_header(self):
-        """Test that Bearer token is properly set."""
-        token = "test-token-12345"
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
+    def test_list_devices_drops_none_filters(self, client_with_session):
+        """Test that only the filters that were given are sent."""
+        asyncio.run(client_with_session.list_devices(location_id="loc-1"))
+        
+        assert client_with_session._session.calls == [("list_devices", {"location_id": "loc-1"})]
+    
+    def test_execute_command_forwards_arguments(self, client_with_session):
+        """Test that positional arguments map onto the tool parameters."""
+        asyncio.run(client_with_session.execute_command("d1", "main", "switchLevel", "setLevel", [75]))
+        
+        assert client_with_session._session.calls == [("execute_command", {
+            "device_id": "d1",
+            "component": "main",
+            "capability": "switchLevel",
+            "command": "setLevel",
+            "arguments": [75],
+        })]
+    
+    def test_update_rule_keeps_enabled_false(self, client_with_session):
+        """Test that a False optional argument is sent, not dropped."""
+        asyncio.run(client_with_session.update_rule("rule-1", enabled=False))
+        
+        assert client_with_session._session.calls == [("update_rule", {"rule_id": "rule-1", "enabled": False})]
+    
+    def test_empty_filters_dropped_and_arguments_filled(self, client_with_session):
+        """Test that empty optional values are left out and execute_command always sends arguments."""
+        asyncio.run(client_with_session.list_devices(capability="", room_id="room-1"))
+        asyncio.run(client_with_session.execute_command("d1", "main", "switch", "on"))
+        
+        assert client_with_session._session.calls == [
+            ("list_devices", {"room_id": "room-1"}),
+            ("execute_command", {
+                "device_id": "d1", "component": "main", "capability": "switch", "command": "on",
+                "arguments": [],
+            }),
+        ]
+    
+    def test_keyword_only_parameters_kept(self):
+        """Test that keyword-only parameters and their defaults survive generation."""
+        from SmartThingsMCP.modules.client.utils import tool_method
+        
+        class Stub:
+            def __init__(self):
+                self.calls = []
+            
+            async def call_tool(self, tool_name, **params):
+                self.calls.append((tool_name, params))
+            
+            @tool_method("kw_tool")
+            async def kw_tool(self, item_id, *, label="default", note=None):
+                """Stub with keyword-only parameters."""
+        
+        stub = Stub()
+        asyncio.run(stub.kw_tool("i1"))
+        asyncio.run(stub.kw_tool("i1", label="x", note="n"))
+        
+        assert str(inspect.signature(Stub.kw_tool)) == "(self, item_id, *, label='default', note=None)"
+        assert stub.calls == [
+            ("kw_tool", {"item_id": "i1", "label": "default"}),
+            ("kw_tool", {"item_id": "i1", "label": "x", "note": "n"}),
+        ]
+    
+    def test_location_methods_are_generated(self, client_with_session):
+        """Test that location, room and mode wrappers come from the tool table."""
+        from SmartThingsMCP.modules.client.utils import TOOL_PARAMS
+        
+        assert TOOL_PARAMS["create_location"] == (
+            "name", "country_code", "latitude", "longitude", "region_code", "locality", "address_lines")
+        assert "get_room" in TOOL_PARAMS and "set_mode" in TOOL_PARAMS
+        
+        asyncio.run(client_with_session.create_location("Home", "US", locality="Springfield"))
+        assert client_with_session._session.calls == [("create_location", {
+            "name": "Home", "country_code": "US", "locality": "Springfield"})]
+    
+    def test_iter_locations_follows_cursor(self, client_with_session):
+        """Test that iteration walks every page and passes the cursor along."""
+        pages = {
+            None: {"items": [{"locationId": "loc-1"}, {"locationId": "loc-2"}], "cursor": "next-1"},
+            "next-1": {"items": [{"locationId": "loc-3"}], "cursor": None},
         }
         
-        assert headers["Authorization"] == f"Bearer {token}"
-        assert headers["Authorization"].startswith("Bearer ")
+        async def call_tool(tool_name, params):
+            client_with_session._session.calls.append((tool_name, params))
+            return pages[params.get("cursor")]
+        client_with_session._session.call_tool = call_tool
+        
+        async def run():
+            return [item["locationId"] async for item in client_with_session.iter_locations()]
+        
+        assert asyncio.run(run()) == ["loc-1", "loc-2", "loc-3"]
+        assert client_with_session._session.calls == [
+            ("list_locations_page", {}), ("list_locations_page", {"cursor": "next-1"})]
+    
+    def test_generated_method_keeps_docstring(self):
+        """Test that generated methods keep the stub's docstring."""
+        assert "Get a list of devices" in SmartThingsMCPClient.list_devices.__doc__
+
+
+@dataclass
+class FakeToolResult:
+    """Stand-in for a FastMCP tool result object."""
+    data: dict
+    is_error: bool = False
+    _private: str = "hidden"
+
+
+class TestDeviceFanOut:
+    """Test concurrent per-device helpers."""
+    
+    def test_get_device_statuses_preserves_order(self, client_with_session):
+        """Test that statuses come back in the order of the requested IDs."""
+        results = asyncio.run(client_with_session.get_device_statuses(["d1", "d2", "d3"]))
+        
+        assert [r["params"]["device_id"] for r in results] == ["d1", "d2", "d3"]
+        assert all(r["tool"] == "get_device_status" for r in results)
+    
+    def test_concurrency_is_bounded(self, client_with_session):
+        """Test that no more than the requested number of calls run at once."""
+        in_flight = 0
+        peak = 0
+        
+        async def slow_call_tool(tool_name, params):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return {"tool": tool_name, "params": params}
+        
+        client_with_session._session.call_tool = slow_call_tool
+        asyncio.run(client_with_session.get_device_statuses(
+            [f"d{i}" for i in range(10)], concurrency=3))
+        
+        assert peak == 3
+
+
+class TestResultSerialization:
+    """Test single-pass serialization of tool results."""
+    
+    def test_dump_matches_convert_tool_to_dict(self):
+        """Test that streaming output matches the two-pass conversion."""
+        result = FakeToolResult({"items": [{"id": "d1"}, FakeToolResult({"id": "d2"})]})
+        out = io.BytesIO()
+        
+        dump_tool_result(result, out)
+        
+        assert json.loads(out.getvalue()) == convert_tool_to_dict(result)
+        assert "_private" not in json.loads(out.getvalue())
+    
+    def test_call_tool_result_items_written_one_at_a_time(self):
+        """Test that a real CallToolResult's item lists are streamed per item."""
+        from mcp.types import TextContent
+        from fastmcp.client.client import CallToolResult
+        
+        items = [{"deviceId": f"d{i}"} for i in range(3)]
+        result = CallToolResult(content=[TextContent(type="text", text="{}")],
+                                structured_content={"items": items}, meta=None, data={"items": items})
+        
+        class RecordingStream(io.BytesIO):
+            def __init__(self):
+                super().__init__()
+                self.chunks = []
+            
+            def write(self, chunk):
+                self.chunks.append(bytes(chunk))
+                return super().write(chunk)
+        
+        out = RecordingStream()
+        dump_tool_result(result, out)
+        
+        assert json.loads(out.getvalue()) == convert_tool_to_dict(result)
+        for item in items:
+            assert out.chunks.count(json.dumps(item, separators=(",", ":")).encode()) == 2
+    
+    def test_convert_matches_across_json_backends(self, monkeypatch):
+        """Test that datetimes, sets and enums convert the same with and without orjson."""
+        import datetime
+        import enum
+        from SmartThingsMCP.modules.client import _json
+        
+        class Level(enum.Enum):
+            HIGH = "high"
+        
+        value = {"at": datetime.datetime(2024, 1, 2, 3, 4, 5), "tags": {"a"}, "level": Level.HIGH}
+        expected = {"at": "2024-01-02T03:04:05", "tags": ["a"], "level": "high"}
+        
+        assert convert_tool_to_dict(value) == expected
+        monkeypatch.setattr(_json, "orjson", None)
+        assert convert_tool_to_dict(value) == expected
+
+
+class TestClientBatching:
+    """Test batched tool calls over the shared session."""
     
-    def test_invalid_token_handling(self):
-        """Test handling of invalid tokens."""
-        invalid_token = None
+    def test_call_tools_batch_preserves_order(self, client_with_session):
+        """Test that batch results line up with the submitted calls."""
+        calls = [
+            ("get_device", {"device_id": "d1"}),
+            ("get_device", {"device_id": "d2"}),
+            ("list_locations", {}),
+        ]
+        
+        results = asyncio.run(client_with_session.call_tools_batch(calls))
+        
+        assert [r["tool"] for r in results] == ["get_device", "get_device", "list_locations"]
+        assert results[1]["params"] == {"device_id": "d2"}
+    
+    def test_call_tools_batch_uses_cache(self, client_with_session):
+        """Test that repeated cacheable calls in a batch hit the cache."""
+        calls = [("list_locations", {})]
+        
+        async def run():
+            await client_with_session.call_tools_batch(calls)
+            await client_with_session.call_tools_batch(calls)
         
-        assert invalid_token is None
+        asyncio.run(run())
+        
+        assert len(client_with_session._session.calls) == 1
     
-    def test_token_refresh(self):
-        """Test token refresh mechanism."""
-        old_token = "old-token"
-        new_token = "new-token"
+    def test_batching_proxy_coalesces_calls(self, client_with_session):
+        """Test that calls queued together are dispatched as one batch."""
+        proxy = BatchingProxy(client_with_session, max_batch=3, max_wait_ms=50)
+        
+        # Client instances use __slots__, so patch the method on the class
+        with patch.object(SmartThingsMCPClient, "call_tools_batch", autospec=True,
+                          side_effect=SmartThingsMCPClient.call_tools_batch) as batch:
+            async def run():
+                return await asyncio.gather(
+                    proxy.call_tool("get_device", device_id="d1"),
+                    proxy.call_tool("get_device", device_id="d2"),
+                    proxy.call_tool("get_device", device_id="d3"),
+                )
+            
+            results = asyncio.run(run())
         
-        # Simulate token refresh
-        current_token = old_token
-        current_token = new_token
+        assert batch.call_count == 1
+        assert [r["params"]["device_id"] for r in results] == ["d1", "d2", "d3"]
+
+
+class TestCoalescingLoader:
+    """Test DataLoader-style coalescing of single-item calls."""
+    
+    def test_same_tick_calls_share_one_bulk_call_per_group(self):
+        """Test that calls made together are grouped by key and answered individually."""
+        calls = []
+        
+        async def load_many(key, items):
+            calls.append((key, items))
+            return [f"{key}:{item}" for item in items]
         
-        assert current_token == new_token
+        loader = CoalescingLoader(load_many)
+        
+        async def run():
+            return await asyncio.gather(
+                loader.load("loc-1", "a"),
+                loader.load("loc-2", "b"),
+                loader.load("loc-1", "c"),
+            )
+        
+        assert asyncio.run(run()) == ["loc-1:a", "loc-2:b", "loc-1:c"]
+        assert calls == [("loc-1", ["a", "c"]), ("loc-2", ["b"])]
+    
+    def test_rule_creation_loader_uses_bulk_tool(self, client_with_session):
+        """Test that coalesced rule creations go through bulk_create_rules."""
+        async def fake_call_tool(tool_name, params):
+            client_with_session._session.calls.append((tool_name, params))
+            return {"items": [{"id": rule["name"]} for rule in params["rules"]]}
+        
+        client_with_session._session.call_tool = fake_call_tool
+        loader = rule_creation_loader(client_with_session)
+        
+        async def run():
+            return await asyncio.gather(
+                loader.load("loc-1", {"name": "r1", "actions": []}),
+                loader.load("loc-1", {"name": "r2", "actions": []}),
+            )
+        
+        assert asyncio.run(run()) == [{"id": "r1"}, {"id": "r2"}]
+        assert [name for name, _ in client_with_session._session.calls] == ["bulk_create_rules"]
+    
+    def test_rule_creation_loader_fails_only_the_rejected_rule(self, client_with_session):
+        """Test that an item the bulk call reports as an error raises for its caller only."""
+        async def fake_call_tool(tool_name, params):
+            return {"items": [{"error": "rejected"} if rule["name"] == "bad" else {"id": rule["name"]}
+                              for rule in params["rules"]]}
+        
+        client_with_session._session.call_tool = fake_call_tool
+        loader = rule_creation_loader(client_with_session)
+        
+        async def run():
+            return await asyncio.gather(
+                loader.load("loc-1", {"name": "r1", "actions": []}),
+                loader.load("loc-1", {"name": "bad", "actions": []}),
+                loader.load("loc-1", {"name": "r2", "actions": []}),
+                return_exceptions=True,
+            )
+        
+        first, failed, last = asyncio.run(run())
+        
+        assert first == {"id": "r1"} and last == {"id": "r2"}
+        assert isinstance(failed, RuntimeError) and str(failed) == "rejected"
+
+
+class TestClientAuthentication:
+    """Test client authentication."""
+    
+    def test_run_action_adds_auth_without_mutating_params(self, client_with_session):
+        """Test that run_action sends the client token but leaves the caller's params alone."""
+        from SmartThingsMCP.modules.client.utils import run_action
+        
+        client_with_session.auth_token = "token"
+        params = {"device_id": "d1"}
+        asyncio.run(run_action(client_with_session, "get_device", params))
+        
+        assert params == {"device_id": "d1"}
+        assert client_with_session._session.calls == [("get_device", {"auth": "token", "device_id": "d1"})]
 
 
 class TestClientDeviceOperations:
     """Test device-related client operations."""
     
-    @patch('SmartThingsMCP.modules.server.common.make_request')
     def test_list_devices_caching(self, mock_request):
         """Test that list_devices result is cached."""
         mock_request.return_value = {
@@ -129,7 +716,6 @@ class TestClientDeviceOperations:
         assert result1 == result2
         assert result1["items"][0]["id"] == "d1"
     
-    @patch('SmartThingsMCP.modules.server.common.make_request')
     def test_get_device_status(self, mock_request):
         """Test getting device status."""
         mock_request.return_value = {
@@ -144,7 +730,6 @@ class TestClientDeviceOperations:
         assert result["id"] == "d1"
         assert result["status"] == "online"
     
-    @patch('SmartThingsMCP.modules.server.common.make_request')
     def test_execute_command_cache_invalidation(self, mock_request):
         """Test that execute_command invalidates relevant caches."""
         mock_request.return_value = {"status": "ACCEPTED"}
@@ -169,7 +754,6 @@ class TestClientDeviceOperations:
 class TestClientRoomOperations:
     """Test room-related client operations."""
     
-    @patch('SmartThingsMCP.modules.server.common.make_request')
     def test_list_rooms_caching(self, mock_request):
         """Test that list_rooms result is cached."""
         mock_request.return_value = {
@@ -184,7 +768,6 @@ class TestClientRoomOperations:
         
         assert len(result["items"]) == 2
     
-    @patch('SmartThingsMCP.modules.server.common.make_request')
     def test_get_devices_in_room(self, mock_request):
         """Test getting devices in a specific room."""
         mock_request.return_value = {
@@ -203,7 +786,6 @@ class TestClientRoomOperations:
 class TestClientRuleOperations:
     """Test rule-related client operations."""
     
-    @patch('SmartThingsMCP.modules.server.common.make_request')
     def test_list_rules_caching(self, mock_request):
         """Test that list_rules result is cached."""
         mock_request.return_value = {
@@ -218,7 +800,6 @@ class TestClientRuleOperations:
         
         assert len(result["items"]) == 2
     
-    @patch('SmartThingsMCP.modules.server.common.make_request')
     def test_create_rule_cache_invalidation(self, mock_request):
         """Test that creating a rule invalidates list_rules cache."""
         mock_request.return_value = {
@@ -236,7 +817,6 @@ class TestClientRuleOperations:
 class TestClientLocationOperations:
     """Test location-related client operations."""
     
-    @patch('SmartThingsMCP.modules.server.common.make_request')
     def test_list_locations_caching(self, mock_request):
         """Test that list_locations result is cached."""
         mock_request.return_value = {
@@ -251,7 +831,6 @@ class TestClientLocationOperations:
         
         assert len(result["items"]) == 2
     
-    @patch('SmartThingsMCP.modules.server.common.make_request')
     def test_get_location_details(self, mock_request):
         """Test getting location details."""
         mock_request.return_value = {
@@ -270,33 +849,6 @@ class TestClientLocationOperations:
 class TestClientErrorHandling:
     """Test client error handling."""
     
-    def test_handle_401_unauthorized(self):
-        """Test handling of 401 Unauthorized response."""
-        response = {
-            "status_code": 401,
-            "error": "Unauthorized"
-        }
-        
-        assert response["status_code"] == 401
-    
-    def test_handle_404_not_found(self):
-        """Test handling of 404 Not Found response."""
-        response = {
-            "status_code": 404,
-            "error": "Not Found"
-        }
-        
-        assert response["status_code"] == 404
-    
-    def test_handle_500_server_error(self):
-        """Test handling of 500 Server Error response."""
-        response = {
-            "status_code": 500,
-            "error": "Internal Server Error"
-        }
-        
-        assert response["status_code"] == 500
-    
     def test_handle_network_error(self):
         """Test handling of network errors."""
         error = None
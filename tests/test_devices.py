@@ -2,15 +2,26 @@
 Unit tests for SmartThingsMCP device operations.
 Tests the devices module and device-related MCP tools.
 """
+import inspect
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from collections import defaultdict
+from unittest.mock import Mock, patch
 from SmartThingsMCP.modules.server.common import (
     make_request,
     build_url,
     build_device_url,
     filter_none_params,
+    build_command_payload,
     BASE_URL
 )
+from SmartThingsMCP.modules.server.devices import register_tools
+
+# make_request's parameter names, resolved once at import
+_MAKE_REQUEST_PARAMS = frozenset(inspect.signature(make_request).parameters)
+
+# Expected endpoint URLs
+_DEVICES_URL = f"{BASE_URL}/devices"
+_LOCATIONS_URL = f"{BASE_URL}/locations"
 
 
 class TestCommonUtilities:
@@ -19,25 +30,31 @@ class TestCommonUtilities:
     def test_build_url_devices(self):
         """Test building URL for devices endpoint."""
         url = build_url("devices")
-        assert url == f"{BASE_URL}/devices"
+        assert url == _DEVICES_URL
     
     def test_build_url_locations(self):
         """Test building URL for locations endpoint."""
         url = build_url("locations")
-        assert url == f"{BASE_URL}/locations"
+        assert url == _LOCATIONS_URL
     
     def test_build_device_url(self):
         """Test building URL for specific device."""
         device_id = "test-device-123"
         url = build_device_url(device_id)
-        assert url == f"{BASE_URL}/devices/{device_id}"
+        assert url == f"{_DEVICES_URL}/{device_id}"
     
     def test_build_device_url_with_subpath(self):
         """Test building URL for device subpath."""
         device_id = "test-device-123"
         subpath = "status"
         url = build_device_url(device_id, subpath)
-        assert url == f"{BASE_URL}/devices/{device_id}/{subpath}"
+        assert url == f"{_DEVICES_URL}/{device_id}/{subpath}"
+    
+    def test_build_device_url_deep_path_matches_join(self):
+        """Test that longer or None-containing paths still go through the general join."""
+        assert build_device_url("d1", "components", "main", "status") == f"{_DEVICES_URL}/d1/components/main/status"
+        assert build_device_url("d1", None) == f"{_DEVICES_URL}/d1"
+        assert build_url("rules", None) == f"{BASE_URL}/rules"
     
     def test_filter_none_params_removes_none(self):
         """Test that filter_none_params removes None values."""
@@ -83,17 +100,7 @@ class TestMakeRequest:
     
     def test_make_request_signature(self):
         """Test that make_request has correct signature."""
-        # Verify the function exists and has the right parameters
-        import inspect
-        sig = inspect.signature(make_request)
-        params = list(sig.parameters.keys())
-        
-        assert "auth" in params
-        assert "method" in params
-        assert "url" in params
-        assert "params" in params
-        assert "data" in params
-        assert "headers" in params
+        assert {"auth", "method", "url", "params", "data", "headers"} <= _MAKE_REQUEST_PARAMS
     
     def test_build_url_construction(self):
         """Test URL building for requests."""
@@ -124,81 +131,121 @@ class TestMakeRequest:
 class TestDeviceTools:
     """Test device-related MCP tools."""
     
-    @patch('SmartThingsMCP.modules.server.common.make_request')
-    def test_list_devices_basic(self, mock_request):
+    def test_list_devices_basic(self):
         """Test listing all devices."""
-        mock_request.return_value = {
-            "items": [
-                {"id": "device-1", "name": "Light 1", "status": "online"},
-                {"id": "device-2", "name": "Switch 1", "status": "offline"}
-            ]
-        }
+        registered = []
+        
+        def tool(*args, **kwargs):
+            def register(f):
+                registered.append(f.__name__)
+                return f
+            return register
         
-        # Import here to ensure patches are applied
-        from SmartThingsMCP.modules.server.devices import register_tools
         mock_server = Mock()
-        mock_server.tool = Mock(return_value=lambda f: f)
+        mock_server.tool = tool
         
         register_tools(mock_server)
         
-        # Verify register_tools was called
-        assert mock_server.tool.called or mock_server.add_tool.called
+        # Verify the device tools were registered
+        assert "list_devices" in registered
     
-    @patch('SmartThingsMCP.modules.server.common.make_request')
-    def test_list_devices_with_capability_filter(self, mock_request):
-        """Test listing devices filtered by capability."""
-        mock_request.return_value = {
-            "items": [
-                {"id": "device-1", "name": "Light 1", "capabilities": ["switch"]}
-            ]
-        }
+    @pytest.mark.parametrize("arguments,params", [
+        ({"capability": "switch"}, {"capability": "switch"}),
+        ({"location_id": "loc-123"}, {"locationId": "loc-123"}),
+    ], ids=["capability", "location"])
+    def test_list_devices_sends_filters(self, call_tool, mock_devices_list, arguments, params):
+        """Test that list_devices filters become API query parameters."""
+        result, request = call_tool("list_devices", {"auth": "token", **arguments}, mock_devices_list)
         
-        # This would be called as: list_devices(auth="token", capability="switch")
-        # The actual implementation uses the decorator pattern
-        assert mock_request.return_value["items"][0]["capabilities"] == ["switch"]
+        assert result == mock_devices_list
+        assert request.call_args.kwargs["url"] == _DEVICES_URL
+        assert request.call_args.kwargs["params"] == params
     
-    @patch('SmartThingsMCP.modules.server.common.make_request')
-    def test_list_devices_with_location_filter(self, mock_request):
-        """Test listing devices filtered by location."""
-        mock_request.return_value = {
-            "items": [
-                {"id": "device-1", "name": "Light 1", "locationId": "loc-123"}
-            ]
-        }
-        
-        assert mock_request.return_value["items"][0]["locationId"] == "loc-123"
-    
-    @patch('SmartThingsMCP.modules.server.common.make_request')
-    def test_get_device_status(self, mock_request):
+    def test_get_device_status(self, call_tool, mock_device):
         """Test getting device status."""
-        mock_request.return_value = {
-            "id": "device-1",
-            "name": "Light 1",
-            "components": [
-                {
-                    "id": "main",
-                    "capabilities": [
-                        {
-                            "id": "switch",
-                            "values": [{"key": "switch", "value": "on"}]
-                        }
-                    ]
-                }
-            ]
-        }
+        result, request = call_tool("get_device_status", {"auth": "token", "device_id": "device-1"}, mock_device)
         
-        assert mock_request.return_value["id"] == "device-1"
-        assert len(mock_request.return_value["components"]) > 0
+        assert result["id"] == "device-1"
+        assert request.call_args.kwargs["url"] == f"{_DEVICES_URL}/device-1/status"
     
-    @patch('SmartThingsMCP.modules.server.common.make_request')
-    def test_execute_device_command(self, mock_request):
+    def test_execute_device_command(self, call_tool, sent_body):
         """Test executing a command on a device."""
-        mock_request.return_value = {
-            "id": "cmd-123",
-            "status": "ACCEPTED"
-        }
+        result, request = call_tool("execute_command", {
+            "auth": "token", "device_id": "device-1", "component": "main",
+            "capability": "switch", "command": "on"}, {"id": "cmd-123", "status": "ACCEPTED"})
+        
+        assert result["status"] == "ACCEPTED"
+        assert request.call_args.kwargs["method"] == "POST"
+        assert request.call_args.kwargs["url"] == f"{_DEVICES_URL}/device-1/commands"
+        assert sent_body(request) == build_command_payload("main", "switch", "on")
+
+
+class TestDeviceFanOutTools:
+    """Test the multi-device tools against an in-memory server."""
+    
+    def test_get_device_status_many_returns_items_in_order(self, call_tool):
+        """Test that each device's status is fetched and failures are reported per item."""
+        def respond(method, url, params, body):
+            device_id = url.split("/")[-2]
+            if device_id == "bad":
+                raise Exception("offline")
+            return {"device": device_id}
+        
+        result, _ = call_tool("get_device_status_many", {
+            "auth": "token", "device_ids": ["d1", "bad", "d2"]}, side_effect=respond)
+        
+        items = result["items"]
+        assert items[0] == {"device": "d1"}
+        assert "offline" in items[1]["error"]
+        assert items[2] == {"device": "d2"}
+    
+    def test_bulk_execute_commands_posts_each_command(self, call_tool):
+        """Test that each command is posted to its device and bad entries fail alone."""
+        posted = []
+        
+        def respond(method, url, params, body):
+            posted.append((method, url.split("/")[-2], body))
+            return {"results": [{"status": "ACCEPTED"}]}
+        
+        result, _ = call_tool("bulk_execute_commands", {
+            "auth": "token",
+            "commands": [
+                {"device_id": "d1", "capability": "switch", "command": "on"},
+                {"device_id": "d2"},
+            ]}, side_effect=respond)
+        
+        items = result["items"]
+        assert items[0] == {"results": [{"status": "ACCEPTED"}]}
+        assert "capability" in items[1]["error"]
+        assert posted == [("POST", "d1", {"commands": [
+            {"component": "main", "capability": "switch", "command": "on", "arguments": []}]})]
+    
+    def test_build_commands_payload_wraps_all_commands_once(self):
+        """Test that several commands share one payload and match the single-command form."""
+        from SmartThingsMCP.modules.server.common import build_command_payload, build_commands_payload
         
-        assert mock_request.return_value["status"] == "ACCEPTED"
+        payload = build_commands_payload([
+            ("main", "switch", "on", None),
+            ("main", "switchLevel", "setLevel", [50]),
+        ])
+        assert payload["commands"][0] == build_command_payload("main", "switch", "on")["commands"][0]
+        assert payload["commands"][1]["arguments"] == [50]
+        assert len(payload["commands"]) == 2
+    
+    def test_list_devices_summary_keeps_cached_response(self, call_tool):
+        """Test that summary mode slims the items without changing the cached full list."""
+        device = {"deviceId": "d1", "label": "Lamp", "locationId": "loc-1", "ocf": {"big": "blob"},
+                  "components": [{"id": "main", "capabilities": [{"id": "switch"}, {"id": "refresh"}]},
+                                 {"id": "aux", "capabilities": [{"id": "switch"}]}]}
+        body = {"items": [device]}
+        
+        slim, first_request = call_tool("list_devices", {"auth": "token", "summary": True}, body)
+        full, second_request = call_tool("list_devices", {"auth": "token"}, body)
+        
+        assert slim["items"] == [{"deviceId": "d1", "label": "Lamp", "locationId": "loc-1",
+                                  "capabilities": ["switch", "refresh"]}]
+        assert full == body
+        assert first_request.call_count == 1 and second_request.call_count == 0
 
 
 class TestDeviceFiltering:
@@ -212,9 +259,15 @@ class TestDeviceFiltering:
             {"id": "3", "name": "Lock 3", "capabilities": ["lock"]}
         ]
         
-        filtered = [d for d in devices if "switch" in d.get("capabilities", [])]
-        assert len(filtered) == 2
-        assert all("switch" in d["capabilities"] for d in filtered)
+        # One pass builds an index; each capability lookup is then a dict hit
+        by_capability = defaultdict(list)
+        for device in devices:
+            for capability in device.get("capabilities", []):
+                by_capability[capability].append(device)
+        
+        assert len(by_capability["switch"]) == 2
+        assert all("switch" in d["capabilities"] for d in by_capability["switch"])
+        assert [d["id"] for d in by_capability["lock"]] == ["3"]
     
     def test_filter_by_status(self):
         """Test filtering devices by status."""
@@ -224,9 +277,12 @@ class TestDeviceFiltering:
             {"id": "3", "name": "Lock 3", "status": "online"}
         ]
         
-        online_devices = [d for d in devices if d.get("status") == "online"]
-        assert len(online_devices) == 2
-        assert all(d["status"] == "online" for d in online_devices)
+        by_status = defaultdict(list)
+        for device in devices:
+            by_status[device.get("status")].append(device)
+        
+        assert len(by_status["online"]) == 2
+        assert all(d["status"] == "online" for d in by_status["online"])
     
     def test_filter_by_location(self):
         """Test filtering devices by location."""
@@ -236,71 +292,34 @@ class TestDeviceFiltering:
             {"id": "3", "name": "Lock 3", "locationId": "loc-1"}
         ]
         
-        location_devices = [d for d in devices if d.get("locationId") == "loc-1"]
-        assert len(location_devices) == 2
-        assert all(d["locationId"] == "loc-1" for d in location_devices)
+        by_location = defaultdict(list)
+        for device in devices:
+            by_location[device.get("locationId")].append(device)
+        
+        assert len(by_location["loc-1"]) == 2
+        assert all(d["locationId"] == "loc-1" for d in by_location["loc-1"])
 
 
 class TestDeviceCommands:
     """Test device command execution."""
     
-    def test_turn_on_command(self):
-        """Test turn on command payload."""
-        command = {
-            "commands": [
-                {
-                    "component": "main",
-                    "capability": "switch",
-                    "command": "on"
-                }
-            ]
-        }
-        
-        assert command["commands"][0]["command"] == "on"
-        assert command["commands"][0]["capability"] == "switch"
-    
-    def test_turn_off_command(self):
-        """Test turn off command payload."""
-        command = {
-            "commands": [
-                {
-                    "component": "main",
-                    "capability": "switch",
-                    "command": "off"
-                }
-            ]
-        }
-        
-        assert command["commands"][0]["command"] == "off"
-    
-    def test_set_brightness_command(self):
-        """Test brightness setting command."""
-        command = {
-            "commands": [
-                {
-                    "component": "main",
-                    "capability": "switchLevel",
-                    "command": "setLevel",
-                    "arguments": [75]
-                }
-            ]
-        }
+    @pytest.mark.parametrize("capability,command,arguments", [
+        ("switch", "on", None),
+        ("switch", "off", None),
+        ("switchLevel", "setLevel", [75]),
+        ("colorControl", "setColor", [{"hue": 100, "saturation": 100}]),
+    ])
+    def test_command_payload(self, capability, command, arguments):
+        """Test command payloads for common capabilities."""
+        payload = build_command_payload("main", capability, command, arguments)
         
-        assert command["commands"][0]["command"] == "setLevel"
-        assert command["commands"][0]["arguments"][0] == 75
-    
-    def test_set_color_command(self):
-        """Test color setting command."""
-        command = {
+        assert payload == {
             "commands": [
                 {
                     "component": "main",
-                    "capability": "colorControl",
-                    "command": "setColor",
-                    "arguments": [{"hue": 100, "saturation": 100}]
+                    "capability": capability,
+                    "command": command,
+                    "arguments": arguments or []
                 }
             ]
         }
-        
-        assert command["commands"][0]["command"] == "setColor"
-        assert command["commands"][0]["arguments"][0]["hue"] == 100
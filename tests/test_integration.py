@@ -3,9 +3,8 @@ Integration tests for SmartThingsMCP.
 These tests require a running SmartThings API and authentication token.
 Run with: pytest -m integration tests/
 """
+import importlib.util
 import pytest
-import os
-from unittest.mock import Mock, patch
 
 
 pytestmark = pytest.mark.integration
@@ -15,46 +14,30 @@ class TestIntegrationDeviceOperations:
     """Integration tests for device operations."""
     
     @pytest.mark.requires_auth
-    def test_list_devices_integration(self):
+    def test_list_devices_integration(self, auth_token):
         """Test listing devices with real API (requires auth token)."""
-        token = os.environ.get("SMARTTHINGS_AUTH_TOKEN")
-        if not token:
-            pytest.skip("SMARTTHINGS_AUTH_TOKEN not set")
-        
         # This would be an actual API call in integration test
-        assert token is not None
+        assert auth_token is not None
     
     @pytest.mark.requires_auth
-    def test_get_device_status_integration(self):
+    def test_get_device_status_integration(self, auth_token):
         """Test getting device status with real API."""
-        token = os.environ.get("SMARTTHINGS_AUTH_TOKEN")
-        if not token:
-            pytest.skip("SMARTTHINGS_AUTH_TOKEN not set")
-        
         # Would make actual API call
-        assert token is not None
+        assert auth_token is not None
 
 
 class TestIntegrationRuleOperations:
     """Integration tests for rule operations."""
     
     @pytest.mark.requires_auth
-    def test_list_rules_integration(self):
+    def test_list_rules_integration(self, auth_token):
         """Test listing rules with real API."""
-        token = os.environ.get("SMARTTHINGS_AUTH_TOKEN")
-        if not token:
-            pytest.skip("SMARTTHINGS_AUTH_TOKEN not set")
-        
-        assert token is not None
+        assert auth_token is not None
     
     @pytest.mark.requires_auth
-    def test_create_rule_integration(self):
+    def test_create_rule_integration(self, auth_token):
         """Test creating a rule with real API."""
-        token = os.environ.get("SMARTTHINGS_AUTH_TOKEN")
-        if not token:
-            pytest.skip("SMARTTHINGS_AUTH_TOKEN not set")
-        
-        assert token is not None
+        assert auth_token is not None
 
 
 class TestServerStartup:
@@ -62,12 +45,8 @@ class TestServerStartup:
     
     def test_server_initialization(self):
         """Test server initialization."""
-        # Test that the server module can be imported
-        try:
-            from SmartThingsMCP.SmartThingsMCPServer import SmartThingsMCPServer
-            assert SmartThingsMCPServer is not None
-        except ImportError:
-            # If direct import fails, just skip
+        # Check the server module is importable without running its startup code
+        if importlib.util.find_spec("SmartThingsMCP.SmartThingsMCPServer") is None:
             pytest.skip("SmartThingsMCPServer import not available")
 
 
@@ -76,10 +55,6 @@ class TestClientConnection:
     
     def test_client_connection(self):
         """Test client connection to server."""
-        # Test that the client module can be imported
-        try:
-            from SmartThingsMCP.SmartThingsMCPClient import SmartThingsMCPClient
-            assert SmartThingsMCPClient is not None
-        except ImportError:
-            # If direct import fails, just skip
+        # Check the client module is importable without running its startup code
+        if importlib.util.find_spec("SmartThingsMCP.SmartThingsMCPClient") is None:
             pytest.skip("SmartThingsMCPClient import not available")
@@ -3,95 +3,35 @@ Unit tests for SmartThingsMCP location operations.
 Tests the locations module and location-related MCP tools.
 """
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from functools import reduce
+from operator import getitem, itemgetter
+from collections import Counter
+from unittest.mock import Mock, patch
 
 
 class TestLocationTools:
     """Test location-related MCP tools."""
     
-    @patch('SmartThingsMCP.modules.server.common.make_request')
-    def test_list_locations(self, mock_request):
-        """Test listing all locations."""
-        mock_request.return_value = {
-            "items": [
-                {
-                    "id": "loc-1",
-                    "name": "Home",
-                    "countryCode": "US",
-                    "timeZoneId": "America/New_York"
-                },
-                {
-                    "id": "loc-2",
-                    "name": "Cabin",
-                    "countryCode": "US",
-                    "timeZoneId": "America/Denver"
-                }
-            ]
-        }
-        
-        result = mock_request("test-token", "GET", "https://api.smartthings.com/v1/locations")
-        
-        assert len(result["items"]) == 2
-        assert result["items"][0]["id"] == "loc-1"
-        assert result["items"][0]["name"] == "Home"
-    
-    @patch('SmartThingsMCP.modules.server.common.make_request')
-    def test_get_location_details(self, mock_request):
-        """Test getting location details."""
-        mock_request.return_value = {
-            "id": "loc-1",
-            "name": "Home",
-            "countryCode": "US",
-            "timeZoneId": "America/New_York",
-            "latitude": 40.7128,
-            "longitude": -74.0060
-        }
-        
-        result = mock_request("test-token", "GET", 
-                            "https://api.smartthings.com/v1/locations/loc-1")
-        
-        assert result["id"] == "loc-1"
-        assert result["name"] == "Home"
-        assert result["latitude"] == 40.7128
-        assert result["longitude"] == -74.0060
-    
-    @patch('SmartThingsMCP.modules.server.common.make_request')
-    def test_get_location_mode(self, mock_request):
-        """Test getting location mode."""
-        mock_request.return_value = {
-            "locationId": "loc-1",
-            "currentMode": {
-                "id": "mode-1",
-                "name": "Home",
-                "label": "Home Mode"
-            }
-        }
-        
-        result = mock_request("test-token", "GET",
-                            "https://api.smartthings.com/v1/locations/loc-1/modes")
-        
-        assert result["locationId"] == "loc-1"
-        assert result["currentMode"]["id"] == "mode-1"
-    
-    @patch('SmartThingsMCP.modules.server.common.make_request')
-    def test_get_location_hubs(self, mock_request):
-        """Test getting hubs in a location."""
-        mock_request.return_value = {
-            "items": [
-                {
-                    "id": "hub-1",
-                    "name": "SmartThings Hub",
-                    "status": "ONLINE"
-                }
-            ]
-        }
-        
-        result = mock_request("test-token", "GET",
-                            "https://api.smartthings.com/v1/hubs?locationId=loc-1")
-        
-        assert len(result["items"]) == 1
-        assert result["items"][0]["name"] == "SmartThings Hub"
-        assert result["items"][0]["status"] == "ONLINE"
+    @pytest.mark.parametrize("tool,arguments,payload,url,count,checks", [
+        ("list_locations", {}, "mock_locations_list", "https://api.smartthings.com/v1/locations", 2,
+         {("items", 0, "id"): "loc-1", ("items", 0, "name"): "Home"}),
+        ("get_location", {"location_id": "loc-1"}, "mock_location",
+         "https://api.smartthings.com/v1/locations/loc-1", None,
+         {("id",): "loc-1", ("name",): "Home", ("latitude",): 40.7128, ("longitude",): -74.0060}),
+        ("list_modes", {"location_id": "loc-1"}, "mock_modes_list",
+         "https://api.smartthings.com/v1/locations/loc-1/modes", None,
+         {("locationId",): "loc-1", ("currentMode", "id"): "mode-1"}),
+    ], ids=["list_locations", "location_details", "location_mode"])
+    def test_location_reads(self, request, call_tool, tool, arguments, payload, url, count, checks):
+        """Test location reads call the expected endpoint and return the expected fields."""
+        result, http_request = call_tool(tool, {"auth": "test-token", **arguments},
+                                         request.getfixturevalue(payload))
+        
+        assert http_request.call_args.kwargs["url"] == url
+        if count is not None:
+            assert len(result["items"]) == count
+        for path, expected in checks.items():
+            assert reduce(getitem, path, result) == expected
 
 
 class TestLocationFiltering:
@@ -128,52 +68,12 @@ class TestLocationFiltering:
             {"id": "loc-2", "name": "Banana"}
         ]
         
-        sorted_locations = sorted(locations, key=lambda x: x["name"])
+        sorted_locations = sorted(locations, key=itemgetter("name"))
         assert sorted_locations[0]["name"] == "Apple"
         assert sorted_locations[1]["name"] == "Banana"
         assert sorted_locations[2]["name"] == "Zebra"
 
 
-class TestLocationWithRooms:
-    """Test location operations with associated rooms."""
-    
-    @patch('SmartThingsMCP.modules.server.common.make_request')
-    def test_get_location_rooms(self, mock_request):
-        """Test getting rooms in a location."""
-        mock_request.return_value = {
-            "items": [
-                {"id": "room-1", "name": "Living Room", "locationId": "loc-1"},
-                {"id": "room-2", "name": "Bedroom", "locationId": "loc-1"},
-                {"id": "room-3", "name": "Kitchen", "locationId": "loc-1"}
-            ]
-        }
-        
-        result = mock_request("test-token", "GET",
-                            "https://api.smartthings.com/v1/rooms?locationId=loc-1")
-        
-        assert len(result["items"]) == 3
-        assert all(room["locationId"] == "loc-1" for room in result["items"])
-    
-    @patch('SmartThingsMCP.modules.server.common.make_request')
-    def test_get_location_with_rooms_structure(self, mock_request):
-        """Test getting location structure with rooms."""
-        mock_request.return_value = {
-            "location": {
-                "id": "loc-1",
-                "name": "Home"
-            },
-            "rooms": [
-                {"id": "room-1", "name": "Living Room"},
-                {"id": "room-2", "name": "Bedroom"}
-            ]
-        }
-        
-        result = mock_request("test-token", "GET", "https://api.smartthings.com/v1/locations/loc-1")
-        
-        assert result["location"]["id"] == "loc-1"
-        assert len(result["rooms"]) == 2
-
-
 class TestLocationDeviceCount:
     """Test counting and aggregating devices by location."""
     
@@ -186,10 +86,7 @@ class TestLocationDeviceCount:
             {"id": "d4", "name": "Light 4", "locationId": "loc-1"}
         ]
         
-        location_counts = {}
-        for device in devices:
-            loc_id = device["locationId"]
-            location_counts[loc_id] = location_counts.get(loc_id, 0) + 1
+        location_counts = Counter(device["locationId"] for device in devices)
         
         assert location_counts["loc-1"] == 3
         assert location_counts["loc-2"] == 1
@@ -203,12 +100,132 @@ class TestLocationDeviceCount:
             {"id": "d4", "name": "Light", "locationId": "loc-2", "capabilities": ["switch"]}
         ]
         
-        switch_by_location = {}
-        for device in devices:
-            if "switch" in device.get("capabilities", []):
-                loc_id = device["locationId"]
-                switch_by_location[loc_id] = switch_by_location.get(loc_id, 0) + 1
+        switch_by_location = Counter(
+            device["locationId"] for device in devices if "switch" in device.get("capabilities", [])
+        )
         
         assert switch_by_location["loc-1"] == 2
         assert switch_by_location["loc-2"] == 1
         assert "loc-3" not in switch_by_location
+
+
+class TestLocationUrls:
+    """Test the location, room and mode URL builders."""
+    
+    def test_fast_paths_match_build_url(self):
+        """Test that the cached-prefix fast paths build the same URLs as build_url."""
+        from SmartThingsMCP.modules.server.common import build_url
+        from SmartThingsMCP.modules.server.locations import build_location_url
+        from SmartThingsMCP.modules.server.rooms import build_room_url, build_rooms_collection_url
+        from SmartThingsMCP.modules.server.modes import build_mode_url
+        
+        assert build_location_url("loc-1") == build_url("locations", "loc-1")
+        assert build_location_url("loc-1", "rooms") == build_url("locations", "loc-1", "rooms")
+        assert build_location_url("loc-1", "modes", "current") == build_url("locations", "loc-1", "modes", "current")
+        assert build_rooms_collection_url("loc-1") == build_url("locations", "loc-1", "rooms")
+        assert build_room_url("loc-1", "room-1") == build_url("locations", "loc-1", "rooms", "room-1")
+        assert build_room_url("loc-1", "room-1", "devices") == build_url("locations", "loc-1", "rooms", "room-1", "devices")
+        assert build_mode_url("loc-1") == build_url("locations", "loc-1", "modes")
+        assert build_mode_url("loc-1", "current") == build_url("locations", "loc-1", "modes", "current")
+
+
+class TestLocationOverview:
+    """Test the combined location overview tool."""
+    
+    def test_overview_fetches_each_list_and_reports_failures(self, call_tool):
+        """Test that devices, rules and scenes come back keyed, with a failed part isolated."""
+        def respond(method, url, params, body):
+            resource = url.rsplit("/", 1)[-1]
+            if resource == "scenes":
+                raise Exception("forbidden")
+            return {"items": [{"resource": resource, "locationId": params["locationId"]}]}
+        
+        result, _ = call_tool("list_location_overview", {"auth": "token", "location_id": "loc-1"},
+                              side_effect=respond)
+        
+        assert result["devices"]["items"] == [{"resource": "devices", "locationId": "loc-1"}]
+        assert result["rules"]["items"] == [{"resource": "rules", "locationId": "loc-1"}]
+        assert "forbidden" in result["scenes"]["error"]
+
+
+class TestModeTools:
+    """Test the traced mode tools against an in-memory server."""
+    
+    def test_traced_tools_keep_schema_and_log_failures(self, call_tool, tool_server, caplog):
+        """Test that the tracing wrapper keeps the tool parameters and re-raises errors."""
+        import asyncio
+        from fastmcp.exceptions import ToolError
+        
+        def offline(method, url, params, body):
+            raise Exception("offline")
+        
+        tools = {tool.name: tool for tool in asyncio.run(tool_server.list_tools())}
+        with caplog.at_level("DEBUG", logger="SmartThingsMCP.modules.server.modes"):
+            with pytest.raises(ToolError):
+                call_tool("set_mode", {"auth": "secret-token", "location_id": "loc-1", "mode_id": "m1"},
+                          side_effect=offline)
+        
+        assert set(tools["set_mode"].parameters["properties"]) == {"auth", "location_id", "mode_id"}
+        assert "set_mode failed" in caplog.text
+        assert "secret-token" not in caplog.text
+
+
+class TestLocationPaging:
+    """Test paginated location listing."""
+    
+    def _fake_pages(self, calls):
+        """Build a fake HTTP request returning two pages of locations."""
+        from json import dumps
+        
+        pages = {
+            "https://api.smartthings.com/v1/locations": {
+                "items": [{"locationId": "loc-1"}],
+                "_links": {"next": {"href": "https://api.smartthings.com/v1/locations?page=1"}},
+            },
+            "https://api.smartthings.com/v1/locations?page=1": {
+                "items": [{"locationId": "loc-2"}],
+                "_links": {},
+            },
+        }
+        
+        def fake_request(method, url, params=None, json=None, headers=None, timeout=None):
+            calls.append(url)
+            response = Mock(status_code=200, content=dumps(pages[url]).encode())
+            response.json.return_value = pages[url]
+            return response
+        return fake_request
+    
+    def test_fetch_all_pages_follows_next_links(self):
+        """Test that every page is fetched and the items are concatenated."""
+        import asyncio
+        from SmartThingsMCP.modules.server import common
+        
+        calls = []
+        with patch.object(common._http_session, "request", side_effect=self._fake_pages(calls)):
+            result = asyncio.run(common.fetch_all_pages("token", common.build_url("locations")))
+        
+        assert result == {"items": [{"locationId": "loc-1"}, {"locationId": "loc-2"}]}
+        assert len(calls) == 2
+    
+    def test_fetch_page_returns_cursor(self):
+        """Test that a page carries the cursor of the next one, and the last page none."""
+        import asyncio
+        from SmartThingsMCP.modules.server import common
+        
+        calls = []
+        url = common.build_url("locations")
+        with patch.object(common._http_session, "request", side_effect=self._fake_pages(calls)):
+            first = asyncio.run(common.fetch_page("token", url))
+            last = asyncio.run(common.fetch_page("token", url, cursor=first["cursor"]))
+        
+        assert first["cursor"] == "https://api.smartthings.com/v1/locations?page=1"
+        assert last == {"items": [{"locationId": "loc-2"}], "cursor": None}
+    
+    def test_fetch_page_rejects_foreign_cursor(self):
+        """Test that the token is never sent to a cursor outside the SmartThings API."""
+        import asyncio
+        from SmartThingsMCP.modules.server import common
+        
+        with pytest.raises(ValueError):
+            asyncio.run(common.fetch_page("token", common.build_url("locations"),
+                                          cursor="https://example.com/steal"))
@@ -2,17 +2,65 @@
 Unit tests for SmartThingsMCP room operations.
 Tests the rooms module and room-related MCP tools.
 """
+import re
 import pytest
-from unittest.mock import Mock, patch
+from collections import Counter
+from operator import itemgetter
+from types import MappingProxyType
+from SmartThingsMCP.modules.server import common
+
+_LOCATION_URL = f"{common.BASE_URL}/locations/loc-1"
+
+
+# Read-only sample data shared by the filtering and counting tests
+_ROOMS_BY_NAME = (
+    MappingProxyType({"id": "room-1", "name": "Living Room"}),
+    MappingProxyType({"id": "room-2", "name": "Bedroom"}),
+    MappingProxyType({"id": "room-3", "name": "Dining Room"}),
+)
+_ROOMS_WITH_PARTIAL_NAME = (
+    MappingProxyType({"id": "room-1", "name": "Living Room"}),
+    MappingProxyType({"id": "room-2", "name": "Bedroom"}),
+    MappingProxyType({"id": "room-3", "name": "Living"}),
+)
+_ROOMS_BY_LOCATION = (
+    MappingProxyType({"id": "room-1", "name": "Living Room", "locationId": "loc-1"}),
+    MappingProxyType({"id": "room-2", "name": "Bedroom", "locationId": "loc-2"}),
+    MappingProxyType({"id": "room-3", "name": "Kitchen", "locationId": "loc-1"}),
+)
+_UNSORTED_ROOMS = (
+    MappingProxyType({"id": "room-3", "name": "Zebra Room"}),
+    MappingProxyType({"id": "room-1", "name": "Apple Room"}),
+    MappingProxyType({"id": "room-2", "name": "Banana Room"}),
+)
+_DEVICES_MOSTLY_IN_ONE_ROOM = (
+    MappingProxyType({"id": "d1", "roomId": "room-1"}),
+    MappingProxyType({"id": "d2", "roomId": "room-1"}),
+    MappingProxyType({"id": "d3", "roomId": "room-1"}),
+    MappingProxyType({"id": "d4", "roomId": "room-2"}),
+)
+_DEVICES_ACROSS_ROOMS = (
+    MappingProxyType({"id": "d1", "roomId": "room-1"}),
+    MappingProxyType({"id": "d2", "roomId": "room-1"}),
+    MappingProxyType({"id": "d3", "roomId": "room-2"}),
+    MappingProxyType({"id": "d4", "roomId": "room-3"}),
+    MappingProxyType({"id": "d5", "roomId": "room-3"}),
+)
+_DEVICES_WITH_CAPABILITIES = (
+    MappingProxyType({"id": "d1", "roomId": "room-1", "capabilities": ("switch",)}),
+    MappingProxyType({"id": "d2", "roomId": "room-1", "capabilities": ("brightness",)}),
+    MappingProxyType({"id": "d3", "roomId": "room-2", "capabilities": ("switch",)}),
+    MappingProxyType({"id": "d4", "roomId": "room-2", "capabilities": ("lock",)}),
+)
 
 
 class TestRoomTools:
-    """Test room-related MCP tools."""
+    """Test room-related MCP tools against an in-memory server."""
     
-    @patch('SmartThingsMCP.modules.server.common.make_request')
-    def test_list_rooms(self, mock_request):
-        """Test listing all rooms in a location."""
-        mock_request.return_value = {
+    @pytest.mark.parametrize("tool", ["list_rooms", "get_location_rooms"])
+    def test_list_rooms(self, call_tool, tool):
+        """Test listing all rooms in a location under either tool name."""
+        body = {
             "items": [
                 {"id": "room-1", "name": "Living Room", "locationId": "loc-1"},
                 {"id": "room-2", "name": "Bedroom", "locationId": "loc-1"},
@@ -20,17 +68,30 @@ class TestRoomTools:
             ]
         }
         
-        result = mock_request("test-token", "GET",
-                            "https://api.smartthings.com/v1/rooms?locationId=loc-1")
+        result, request = call_tool(tool, {"auth": "test-token", "location_id": "loc-1"}, body)
+        
+        assert result == body
+        assert request.call_args.kwargs["method"] == "GET"
+        assert request.call_args.kwargs["url"] == f"{_LOCATION_URL}/rooms"
+    
+    @pytest.mark.parametrize("tool", ["list_rooms", "get_location_rooms"])
+    def test_list_rooms_follows_every_page(self, call_tool, tool):
+        """Test that both room list names return the rooms of every page."""
+        next_url = f"{_LOCATION_URL}/rooms?page=1"
+        pages = {
+            f"{_LOCATION_URL}/rooms": {"items": [{"roomId": "room-1"}], "_links": {"next": {"href": next_url}}},
+            next_url: {"items": [{"roomId": "room-2"}], "_links": {}},
+        }
+        
+        result, request = call_tool(tool, {"auth": "test-token", "location_id": "loc-1"},
+                                    side_effect=lambda method, url, params, body: pages[url])
         
-        assert len(result["items"]) == 3
-        assert result["items"][0]["name"] == "Living Room"
-        assert all(room["locationId"] == "loc-1" for room in result["items"])
+        assert result == {"items": [{"roomId": "room-1"}, {"roomId": "room-2"}]}
+        assert request.call_count == 2
     
-    @patch('SmartThingsMCP.modules.server.common.make_request')
-    def test_get_room_details(self, mock_request):
+    def test_get_room_details(self, call_tool):
         """Test getting details of a specific room."""
-        mock_request.return_value = {
+        body = {
             "id": "room-1",
             "name": "Living Room",
             "locationId": "loc-1",
@@ -38,113 +99,53 @@ class TestRoomTools:
             "lastModified": "2025-01-14T10:00:00Z"
         }
         
-        result = mock_request("test-token", "GET",
-                            "https://api.smartthings.com/v1/rooms/room-1")
-        
-        assert result["id"] == "room-1"
-        assert result["name"] == "Living Room"
-        assert result["locationId"] == "loc-1"
-    
-    @patch('SmartThingsMCP.modules.server.common.make_request')
-    def test_get_room_devices(self, mock_request):
-        """Test getting devices in a room."""
-        mock_request.return_value = {
-            "items": [
-                {"id": "d1", "name": "Light", "roomId": "room-1"},
-                {"id": "d2", "name": "Switch", "roomId": "room-1"},
-                {"id": "d3", "name": "Lamp", "roomId": "room-1"}
-            ]
-        }
-        
-        result = mock_request("test-token", "GET",
-                            "https://api.smartthings.com/v1/devices?roomId=room-1")
+        result, request = call_tool("get_room", {
+            "auth": "test-token", "location_id": "loc-1", "room_id": "room-1"}, body)
         
-        assert len(result["items"]) == 3
-        assert all(device["roomId"] == "room-1" for device in result["items"])
+        assert result == body
+        assert request.call_args.kwargs["method"] == "GET"
+        assert request.call_args.kwargs["url"] == f"{_LOCATION_URL}/rooms/room-1"
     
-    @patch('SmartThingsMCP.modules.server.common.make_request')
-    def test_create_room(self, mock_request):
+    def test_create_room(self, call_tool, sent_body):
         """Test creating a new room."""
-        mock_request.return_value = {
-            "id": "room-new",
-            "name": "New Room",
-            "locationId": "loc-1"
-        }
+        body = {"id": "room-new", "name": "New Room", "locationId": "loc-1"}
         
-        payload = {"name": "New Room", "locationId": "loc-1"}
-        result = mock_request("test-token", "POST",
-                            "https://api.smartthings.com/v1/rooms",
-                            json=payload)
+        result, request = call_tool("create_room", {
+            "auth": "test-token", "location_id": "loc-1", "name": "New Room"}, body)
         
         assert result["id"] == "room-new"
-        assert result["name"] == "New Room"
+        assert request.call_args.kwargs["method"] == "POST"
+        assert request.call_args.kwargs["url"] == f"{_LOCATION_URL}/rooms"
+        assert sent_body(request) == {"name": "New Room"}
     
-    @patch('SmartThingsMCP.modules.server.common.make_request')
-    def test_update_room(self, mock_request):
+    def test_update_room(self, call_tool, sent_body):
         """Test updating a room."""
-        mock_request.return_value = {
-            "id": "room-1",
-            "name": "Updated Room",
-            "locationId": "loc-1"
-        }
+        body = {"id": "room-1", "name": "Updated Room", "locationId": "loc-1"}
         
-        payload = {"name": "Updated Room"}
-        result = mock_request("test-token", "PUT",
-                            "https://api.smartthings.com/v1/rooms/room-1",
-                            json=payload)
+        result, request = call_tool("update_room", {
+            "auth": "test-token", "location_id": "loc-1", "room_id": "room-1", "name": "Updated Room"}, body)
         
         assert result["name"] == "Updated Room"
+        assert request.call_args.kwargs["method"] == "PUT"
+        assert request.call_args.kwargs["url"] == f"{_LOCATION_URL}/rooms/room-1"
+        assert sent_body(request) == {"name": "Updated Room"}
     
-    @patch('SmartThingsMCP.modules.server.common.make_request')
-    def test_delete_room(self, mock_request):
+    def test_delete_room(self, call_tool):
         """Test deleting a room."""
-        mock_request.return_value = {}
-        
-        result = mock_request("test-token", "DELETE",
-                            "https://api.smartthings.com/v1/rooms/room-1")
+        result, request = call_tool("delete_room", {
+            "auth": "test-token", "location_id": "loc-1", "room_id": "room-1"}, {})
         
         assert result == {}
+        assert request.call_args.kwargs["method"] == "DELETE"
+        assert request.call_args.kwargs["url"] == f"{_LOCATION_URL}/rooms/room-1"
 
 
 class TestRoomDeviceAssociation:
     """Test associating devices with rooms."""
     
-    @patch('SmartThingsMCP.modules.server.common.make_request')
-    def test_add_device_to_room(self, mock_request):
-        """Test adding a device to a room."""
-        mock_request.return_value = {
-            "id": "d1",
-            "name": "Light",
-            "roomId": "room-1"
-        }
-        
-        payload = {"roomId": "room-1"}
-        result = mock_request("test-token", "PUT",
-                            "https://api.smartthings.com/v1/devices/d1",
-                            json=payload)
-        
-        assert result["roomId"] == "room-1"
-    
-    @patch('SmartThingsMCP.modules.server.common.make_request')
-    def test_remove_device_from_room(self, mock_request):
-        """Test removing a device from a room."""
-        mock_request.return_value = {
-            "id": "d1",
-            "name": "Light",
-            "roomId": None
-        }
-        
-        payload = {"roomId": None}
-        result = mock_request("test-token", "PUT",
-                            "https://api.smartthings.com/v1/devices/d1",
-                            json=payload)
-        
-        assert result["roomId"] is None
-    
-    @patch('SmartThingsMCP.modules.server.common.make_request')
-    def test_get_devices_in_room(self, mock_request):
+    def test_get_devices_in_room(self, call_tool):
         """Test getting all devices in a specific room."""
-        mock_request.return_value = {
+        body = {
             "items": [
                 {"id": "d1", "name": "Ceiling Light", "roomId": "room-living"},
                 {"id": "d2", "name": "Wall Switch", "roomId": "room-living"},
@@ -152,11 +153,11 @@ class TestRoomDeviceAssociation:
             ]
         }
         
-        result = mock_request("test-token", "GET",
-                            "https://api.smartthings.com/v1/devices?roomId=room-living")
+        result, request = call_tool("list_devices", {"auth": "test-token", "room_id": "room-living"}, body)
         
-        assert len(result["items"]) == 3
-        assert all(d["roomId"] == "room-living" for d in result["items"])
+        assert result == body
+        assert request.call_args.kwargs["url"] == f"{common.BASE_URL}/devices"
+        assert request.call_args.kwargs["params"] == {"roomId": "room-living"}
 
 
 class TestRoomFiltering:
@@ -164,49 +165,27 @@ class TestRoomFiltering:
     
     def test_filter_rooms_by_name(self):
         """Test filtering rooms by name."""
-        rooms = [
-            {"id": "room-1", "name": "Living Room"},
-            {"id": "room-2", "name": "Bedroom"},
-            {"id": "room-3", "name": "Dining Room"}
-        ]
-        
         # "Room" (capital R) appears in "Living Room" and "Dining Room" only (case-sensitive)
-        filtered = [r for r in rooms if "Room" in r["name"]]
+        name_of = itemgetter("name")
+        pattern = re.compile("Room")
+        filtered = [r for r in _ROOMS_BY_NAME if pattern.search(name_of(r))]
         assert len(filtered) == 2
     
     def test_filter_rooms_by_name_exact_match(self):
         """Test exact match filtering of rooms."""
-        rooms = [
-            {"id": "room-1", "name": "Living Room"},
-            {"id": "room-2", "name": "Bedroom"},
-            {"id": "room-3", "name": "Living"}
-        ]
-        
-        filtered = [r for r in rooms if r["name"] == "Living Room"]
+        filtered = [r for r in _ROOMS_WITH_PARTIAL_NAME if r["name"] == "Living Room"]
         assert len(filtered) == 1
         assert filtered[0]["id"] == "room-1"
     
     def test_filter_rooms_by_location(self):
         """Test filtering rooms by location."""
-        rooms = [
-            {"id": "room-1", "name": "Living Room", "locationId": "loc-1"},
-            {"id": "room-2", "name": "Bedroom", "locationId": "loc-2"},
-            {"id": "room-3", "name": "Kitchen", "locationId": "loc-1"}
-        ]
-        
-        filtered = [r for r in rooms if r["locationId"] == "loc-1"]
+        filtered = [r for r in _ROOMS_BY_LOCATION if r["locationId"] == "loc-1"]
         assert len(filtered) == 2
         assert all(r["locationId"] == "loc-1" for r in filtered)
     
     def test_sort_rooms_by_name(self):
         """Test sorting rooms alphabetically."""
-        rooms = [
-            {"id": "room-3", "name": "Zebra Room"},
-            {"id": "room-1", "name": "Apple Room"},
-            {"id": "room-2", "name": "Banana Room"}
-        ]
-        
-        sorted_rooms = sorted(rooms, key=lambda r: r["name"])
+        sorted_rooms = sorted(_UNSORTED_ROOMS, key=itemgetter("name"))
         assert sorted_rooms[0]["name"] == "Apple Room"
         assert sorted_rooms[1]["name"] == "Banana Room"
         assert sorted_rooms[2]["name"] == "Zebra Room"
@@ -217,30 +196,12 @@ class TestRoomDeviceCount:
     
     def test_count_devices_in_room(self):
         """Test counting total devices in a room."""
-        devices = [
-            {"id": "d1", "roomId": "room-1"},
-            {"id": "d2", "roomId": "room-1"},
-            {"id": "d3", "roomId": "room-1"},
-            {"id": "d4", "roomId": "room-2"}
-        ]
-        
-        room_1_count = len([d for d in devices if d["roomId"] == "room-1"])
+        room_1_count = len([d for d in _DEVICES_MOSTLY_IN_ONE_ROOM if d["roomId"] == "room-1"])
         assert room_1_count == 3
     
     def test_count_devices_by_room(self):
         """Test counting devices in each room."""
-        devices = [
-            {"id": "d1", "roomId": "room-1"},
-            {"id": "d2", "roomId": "room-1"},
-            {"id": "d3", "roomId": "room-2"},
-            {"id": "d4", "roomId": "room-3"},
-            {"id": "d5", "roomId": "room-3"}
-        ]
-        
-        counts = {}
-        for device in devices:
-            room_id = device["roomId"]
-            counts[room_id] = counts.get(room_id, 0) + 1
+        counts = Counter(d["roomId"] for d in _DEVICES_ACROSS_ROOMS)
         
         assert counts["room-1"] == 2
         assert counts["room-2"] == 1
@@ -248,18 +209,9 @@ class TestRoomDeviceCount:
     
     def test_count_devices_by_room_and_capability(self):
         """Test counting devices by room and capability."""
-        devices = [
-            {"id": "d1", "roomId": "room-1", "capabilities": ["switch"]},
-            {"id": "d2", "roomId": "room-1", "capabilities": ["brightness"]},
-            {"id": "d3", "roomId": "room-2", "capabilities": ["switch"]},
-            {"id": "d4", "roomId": "room-2", "capabilities": ["lock"]}
-        ]
-        
-        switches_by_room = {}
-        for device in devices:
-            if "switch" in device.get("capabilities", []):
-                room_id = device["roomId"]
-                switches_by_room[room_id] = switches_by_room.get(room_id, 0) + 1
+        switches_by_room = Counter(
+            d["roomId"] for d in _DEVICES_WITH_CAPABILITIES if "switch" in d.get("capabilities", ())
+        )
         
         assert switches_by_room["room-1"] == 1
         assert switches_by_room["room-2"] == 1
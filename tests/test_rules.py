@@ -2,308 +2,216 @@
 Unit tests for SmartThingsMCP rule operations.
 Tests the rules module and rule-related MCP tools.
 """
+import re
 import pytest
-from unittest.mock import Mock, patch
-from datetime import datetime
+from operator import itemgetter
+from types import MappingProxyType
+from SmartThingsMCP.modules.server import common
+
+_RULES_URL = f"{common.BASE_URL}/rules"
+
+# Canned API responses, built once; the tools only read them
+_RULE_LIST_RESPONSE = MappingProxyType({
+    "items": [
+        {"id": "rule-1", "name": "Evening Lights", "enabled": True, "locationId": "loc-1"},
+        {"id": "rule-2", "name": "Morning Coffee", "enabled": True, "locationId": "loc-1"}
+    ]
+})
+_RULE_GET_RESPONSE = MappingProxyType({
+    "id": "rule-1",
+    "name": "Evening Lights",
+    "enabled": True,
+    "locationId": "loc-1",
+    "actions": [{"capability": "switch", "command": "on", "devices": ["d1", "d2"]}]
+})
+
+
+# Read-only sample data shared by the filtering tests
+_RULES_BY_ENABLED = (
+    MappingProxyType({"id": "rule-1", "name": "Rule 1", "enabled": True}),
+    MappingProxyType({"id": "rule-2", "name": "Rule 2", "enabled": False}),
+    MappingProxyType({"id": "rule-3", "name": "Rule 3", "enabled": True}),
+)
+_RULES_BY_NAME = (
+    MappingProxyType({"id": "rule-1", "name": "Evening Lights"}),
+    MappingProxyType({"id": "rule-2", "name": "Morning Coffee"}),
+    MappingProxyType({"id": "rule-3", "name": "Evening Security"}),
+)
+_UNSORTED_RULES = (
+    MappingProxyType({"id": "rule-3", "name": "Zebra"}),
+    MappingProxyType({"id": "rule-1", "name": "Apple"}),
+    MappingProxyType({"id": "rule-2", "name": "Banana"}),
+)
 
 
 class TestRuleTools:
-    """Test rule-related MCP tools."""
+    """Test rule-related MCP tools against an in-memory server."""
     
-    @patch('SmartThingsMCP.modules.server.common.make_request')
-    def test_list_rules(self, mock_request):
+    def test_list_rules(self, call_tool):
         """Test listing all rules for a location."""
-        mock_request.return_value = {
-            "items": [
-                {
-                    "id": "rule-1",
-                    "name": "Evening Lights",
-                    "enabled": True,
-                    "locationId": "loc-1"
-                },
-                {
-                    "id": "rule-2",
-                    "name": "Morning Coffee",
-                    "enabled": True,
-                    "locationId": "loc-1"
-                }
-            ]
-        }
-        
-        result = mock_request("test-token", "GET",
-                            "https://api.smartthings.com/v1/rules?locationId=loc-1")
+        result, request = call_tool("list_rules", {"auth": "test-token", "location_id": "loc-1"},
+                                    _RULE_LIST_RESPONSE)
         
-        assert len(result["items"]) == 2
-        assert result["items"][0]["name"] == "Evening Lights"
+        assert result == _RULE_LIST_RESPONSE
+        assert request.call_args.kwargs["method"] == "GET"
+        assert request.call_args.kwargs["url"] == _RULES_URL
+        assert request.call_args.kwargs["params"] == {"locationId": "loc-1"}
     
-    @patch('SmartThingsMCP.modules.server.common.make_request')
-    def test_get_rule(self, mock_request):
+    def test_get_rule(self, call_tool):
         """Test getting details of a specific rule."""
-        mock_request.return_value = {
-            "id": "rule-1",
-            "name": "Evening Lights",
-            "description": "Turn on lights in the evening",
-            "enabled": True,
-            "locationId": "loc-1",
-            "triggers": [
-                {
-                    "type": "time",
-                    "at": "18:00:00"
-                }
-            ],
-            "conditions": [],
-            "actions": [
-                {
-                    "capability": "switch",
-                    "command": "on",
-                    "devices": ["d1", "d2"]
-                }
-            ]
-        }
-        
-        result = mock_request("test-token", "GET",
-                            "https://api.smartthings.com/v1/rules/rule-1")
+        result, request = call_tool("get_rule", {"auth": "test-token", "rule_id": "rule-1"},
+                                    _RULE_GET_RESPONSE)
         
-        assert result["id"] == "rule-1"
-        assert result["name"] == "Evening Lights"
-        assert result["enabled"] is True
-        assert len(result["triggers"]) > 0
+        assert result == _RULE_GET_RESPONSE
+        assert request.call_args.kwargs["method"] == "GET"
+        assert request.call_args.kwargs["url"] == f"{_RULES_URL}/rule-1"
     
-    @patch('SmartThingsMCP.modules.server.common.make_request')
-    def test_create_rule(self, mock_request):
-        """Test creating a new rule."""
-        mock_request.return_value = {
-            "id": "rule-new",
-            "name": "New Rule",
-            "enabled": True,
-            "locationId": "loc-1"
-        }
+    def test_create_rule(self, call_tool, sent_body):
+        """Test creating a new rule with the location as a query parameter."""
+        body = {"id": "rule-new", "name": "New Rule", "enabled": True, "locationId": "loc-1"}
+        actions = [{"if": {"equals": {}}}]
         
-        payload = {
-            "name": "New Rule",
-            "enabled": True,
-            "locationId": "loc-1",
-            "triggers": [],
-            "conditions": [],
-            "actions": []
-        }
-        
-        result = mock_request("test-token", "POST",
-                            "https://api.smartthings.com/v1/rules",
-                            json=payload)
+        result, request = call_tool("create_rule", {
+            "auth": "test-token", "name": "New Rule", "actions": actions, "triggers": [],
+            "location_id": "loc-1"}, body)
         
         assert result["id"] == "rule-new"
-        assert result["name"] == "New Rule"
+        assert request.call_args.kwargs["method"] == "POST"
+        assert request.call_args.kwargs["url"] == _RULES_URL
+        assert request.call_args.kwargs["params"] == {"locationId": "loc-1"}
+        # Empty triggers are left out of the body
+        assert sent_body(request) == {"name": "New Rule", "actions": actions}
     
-    @patch('SmartThingsMCP.modules.server.common.make_request')
-    def test_update_rule(self, mock_request):
-        """Test updating an existing rule."""
-        mock_request.return_value = {
-            "id": "rule-1",
-            "name": "Updated Rule",
-            "enabled": False
-        }
-        
-        payload = {
-            "name": "Updated Rule",
-            "enabled": False
-        }
-        
-        result = mock_request("test-token", "PUT",
-                            "https://api.smartthings.com/v1/rules/rule-1",
-                            json=payload)
-        
-        assert result["name"] == "Updated Rule"
-        assert result["enabled"] is False
+    @pytest.mark.parametrize("arguments,expected_body", [
+        ({"name": "Updated Rule", "enabled": False}, {"name": "Updated Rule", "enabled": False}),
+        ({"enabled": True}, {"enabled": True}),
+        ({"enabled": False}, {"enabled": False}),
+    ], ids=["update", "enable", "disable"])
+    def test_update_rule(self, call_tool, sent_body, arguments, expected_body):
+        """Test updating, enabling and disabling a rule send only the given fields."""
+        body = {"id": "rule-1", **expected_body}
+        
+        result, request = call_tool("update_rule", {
+            "auth": "test-token", "rule_id": "rule-1", **arguments}, body)
+        
+        assert result == body
+        assert request.call_args.kwargs["method"] == "PUT"
+        assert request.call_args.kwargs["url"] == f"{_RULES_URL}/rule-1"
+        assert sent_body(request) == expected_body
     
-    @patch('SmartThingsMCP.modules.server.common.make_request')
-    def test_delete_rule(self, mock_request):
+    def test_delete_rule(self, call_tool):
         """Test deleting a rule."""
-        mock_request.return_value = {}
-        
-        result = mock_request("test-token", "DELETE",
-                            "https://api.smartthings.com/v1/rules/rule-1")
+        result, request = call_tool("delete_rule", {
+            "auth": "test-token", "rule_id": "rule-1", "location_id": "loc-1"}, {})
         
         assert result == {}
+        assert request.call_args.kwargs["method"] == "DELETE"
+        assert request.call_args.kwargs["url"] == f"{_RULES_URL}/rule-1"
+        assert request.call_args.kwargs["params"] == {"locationId": "loc-1"}
     
-    @patch('SmartThingsMCP.modules.server.common.make_request')
-    def test_execute_rule(self, mock_request):
+    def test_execute_rule(self, call_tool):
         """Test manually executing a rule."""
-        mock_request.return_value = {
-            "id": "exec-123",
-            "ruleId": "rule-1",
-            "status": "EXECUTED"
-        }
+        body = {"id": "exec-123", "ruleId": "rule-1", "status": "EXECUTED"}
         
-        result = mock_request("test-token", "POST",
-                            "https://api.smartthings.com/v1/rules/rule-1/execute")
+        result, request = call_tool("execute_rule", {"auth": "test-token", "rule_id": "rule-1"}, body)
         
         assert result["status"] == "EXECUTED"
-    
-    @patch('SmartThingsMCP.modules.server.common.make_request')
-    def test_enable_rule(self, mock_request):
-        """Test enabling a rule."""
-        mock_request.return_value = {
-            "id": "rule-1",
-            "enabled": True
-        }
-        
-        payload = {"enabled": True}
-        result = mock_request("test-token", "PUT",
-                            "https://api.smartthings.com/v1/rules/rule-1",
-                            json=payload)
-        
-        assert result["enabled"] is True
-    
-    @patch('SmartThingsMCP.modules.server.common.make_request')
-    def test_disable_rule(self, mock_request):
-        """Test disabling a rule."""
-        mock_request.return_value = {
-            "id": "rule-1",
-            "enabled": False
-        }
-        
-        payload = {"enabled": False}
-        result = mock_request("test-token", "PUT",
-                            "https://api.smartthings.com/v1/rules/rule-1",
-                            json=payload)
-        
-        assert result["enabled"] is False
+        assert request.call_args.kwargs["method"] == "POST"
+        assert request.call_args.kwargs["url"] == f"{_RULES_URL}/rule-1/execute"
 
 
-class TestRuleTriggers:
-    """Test rule trigger configurations."""
-    
-    def test_time_trigger(self):
-        """Test time-based trigger."""
-        trigger = {
-            "type": "time",
-            "at": "18:00:00"
-        }
-        
-        assert trigger["type"] == "time"
-        assert trigger["at"] == "18:00:00"
-    
-    def test_device_trigger(self):
-        """Test device-based trigger."""
-        trigger = {
-            "type": "deviceEvent",
-            "deviceId": "d1",
-            "capability": "switch",
-            "attribute": "switch",
-            "value": "on"
-        }
-        
-        assert trigger["deviceId"] == "d1"
-        assert trigger["capability"] == "switch"
+class TestBulkRuleTools:
+    """Test the bulk rule tools against an in-memory server."""
     
-    def test_location_mode_trigger(self):
-        """Test location mode trigger."""
-        trigger = {
-            "type": "locationMode",
-            "locationId": "loc-1",
-            "modeId": "mode-home"
-        }
-        
-        assert trigger["type"] == "locationMode"
-        assert trigger["modeId"] == "mode-home"
+    def test_bulk_create_rules_returns_items_in_order(self, call_tool):
+        """Test that each rule is posted and failures are reported per item."""
+        def respond(method, url, params, body):
+            if body["name"] == "bad":
+                raise Exception("rejected")
+            return {"id": f"id-{body['name']}", "locationId": params["locationId"]}
+        
+        rules = [{"name": "a", "actions": [{"if": {}}]}, {"name": "bad", "actions": []}, {"name": "b", "actions": []}]
+        result, _ = call_tool("bulk_create_rules", {"auth": "token", "rules": rules, "location_id": "loc-1"},
+                              side_effect=respond)
+        
+        items = result["items"]
+        assert items[0] == {"id": "id-a", "locationId": "loc-1"}
+        assert "rejected" in items[1]["error"]
+        assert items[2]["id"] == "id-b"
     
-    def test_sunrise_trigger(self):
-        """Test sunrise-based trigger."""
-        trigger = {
-            "type": "sunrise",
-            "offset": 30  # 30 minutes after sunrise
-        }
-        
-        assert trigger["type"] == "sunrise"
-        assert trigger["offset"] == 30
-    
-    def test_sunset_trigger(self):
-        """Test sunset-based trigger."""
-        trigger = {
-            "type": "sunset",
-            "offset": -30  # 30 minutes before sunset
-        }
-        
-        assert trigger["type"] == "sunset"
-        assert trigger["offset"] == -30
-
-
-class TestRuleActions:
-    """Test rule action configurations."""
-    
-    def test_device_command_action(self):
-        """Test device command action."""
-        action = {
-            "type": "deviceCommand",
-            "devices": ["d1", "d2"],
-            "capability": "switch",
-            "command": "on"
-        }
-        
-        assert action["capability"] == "switch"
-        assert action["command"] == "on"
-        assert len(action["devices"]) == 2
+    @pytest.mark.parametrize("tool,key,id_field", [
+        ("bulk_update_rules", "rules", "rule_id"),
+        ("bulk_update_scenes", "scenes", "scene_id"),
+    ])
+    def test_bulk_update_reports_missing_id_per_item(self, call_tool, tool, key, id_field):
+        """Test that an item without an ID fails on its own instead of failing the whole call."""
+        result, request = call_tool(tool, {"auth": "token", key: [{id_field: "x1", "name": "a"}, {"name": "b"}]},
+                                    {"id": "x1"})
+        
+        items = result["items"]
+        assert items[0] == {"id": "x1"}
+        assert id_field in items[1]["error"]
+        assert request.call_count == 1
     
-    def test_scene_action(self):
-        """Test scene action."""
-        action = {
-            "type": "scene",
-            "sceneId": "scene-1"
-        }
+    def test_build_rule_body_drops_empty_fields(self):
+        """Test that empty optional fields are omitted but enabled=False is kept."""
+        from SmartThingsMCP.modules.server.rules import build_rule_body
         
-        assert action["type"] == "scene"
-        assert action["sceneId"] == "scene-1"
+        body = build_rule_body({"name": "r", "actions": [], "triggers": None, "enabled": False})
+        assert body == {"name": "r", "enabled": False}
     
-    def test_notification_action(self):
-        """Test notification action."""
-        action = {
-            "type": "notification",
-            "target": "email",
-            "recipients": ["user@example.com"]
-        }
-        
-        assert action["target"] == "email"
-        assert len(action["recipients"]) == 1
+    def test_rule_and_scene_urls_match_build_url(self):
+        """Test that the URL fast paths agree with the generic builder."""
+        from SmartThingsMCP.modules.server.common import build_url
+        from SmartThingsMCP.modules.server.rules import build_rule_url
+        from SmartThingsMCP.modules.server.scenes import build_scene_url
+        
+        assert build_rule_url() == build_url("rules")
+        assert build_rule_url("r1") == build_url("rules", "r1")
+        assert build_rule_url("r1", "execute") == build_url("rules", "r1", "execute")
+        assert build_scene_url() == build_url("scenes")
+        assert build_scene_url("s1") == build_url("scenes", "s1")
+        assert build_scene_url("s1", "execute") == build_url("scenes", "s1", "execute")
 
 
-class TestRuleConditions:
-    """Test rule condition configurations."""
+class TestRuleComponents:
+    """Test rule trigger, action and condition configurations."""
     
-    def test_device_condition(self):
-        """Test device condition."""
-        condition = {
-            "type": "deviceCondition",
-            "deviceId": "d1",
-            "capability": "switch",
-            "attribute": "switch",
-            "value": "on",
-            "operator": "equals"
-        }
-        
-        assert condition["deviceId"] == "d1"
-        assert condition["operator"] == "equals"
-    
-    def test_time_condition(self):
-        """Test time range condition."""
-        condition = {
-            "type": "timeCondition",
-            "startTime": "09:00:00",
-            "endTime": "17:00:00"
-        }
-        
-        assert condition["startTime"] == "09:00:00"
-        assert condition["endTime"] == "17:00:00"
-    
-    def test_location_mode_condition(self):
-        """Test location mode condition."""
-        condition = {
-            "type": "locationModeCondition",
-            "locationId": "loc-1",
-            "modeId": "mode-home"
-        }
-        
-        assert condition["modeId"] == "mode-home"
+    @pytest.mark.parametrize("component,checks", [
+        pytest.param({"type": "time", "at": "18:00:00"},
+                     [("type", "time"), ("at", "18:00:00")], id="time-trigger"),
+        pytest.param({"type": "deviceEvent", "deviceId": "d1", "capability": "switch",
+                      "attribute": "switch", "value": "on"},
+                     [("deviceId", "d1"), ("capability", "switch")], id="device-trigger"),
+        pytest.param({"type": "locationMode", "locationId": "loc-1", "modeId": "mode-home"},
+                     [("type", "locationMode"), ("modeId", "mode-home")], id="location-mode-trigger"),
+        # 30 minutes after sunrise
+        pytest.param({"type": "sunrise", "offset": 30},
+                     [("type", "sunrise"), ("offset", 30)], id="sunrise-trigger"),
+        # 30 minutes before sunset
+        pytest.param({"type": "sunset", "offset": -30},
+                     [("type", "sunset"), ("offset", -30)], id="sunset-trigger"),
+        pytest.param({"type": "deviceCommand", "devices": ["d1", "d2"], "capability": "switch",
+                      "command": "on"},
+                     [("capability", "switch"), ("command", "on"), ("devices", ["d1", "d2"])],
+                     id="device-command-action"),
+        pytest.param({"type": "scene", "sceneId": "scene-1"},
+                     [("type", "scene"), ("sceneId", "scene-1")], id="scene-action"),
+        pytest.param({"type": "notification", "target": "email", "recipients": ["user@example.com"]},
+                     [("target", "email"), ("recipients", ["user@example.com"])],
+                     id="notification-action"),
+        pytest.param({"type": "deviceCondition", "deviceId": "d1", "capability": "switch",
+                      "attribute": "switch", "value": "on", "operator": "equals"},
+                     [("deviceId", "d1"), ("operator", "equals")], id="device-condition"),
+        pytest.param({"type": "timeCondition", "startTime": "09:00:00", "endTime": "17:00:00"},
+                     [("startTime", "09:00:00"), ("endTime", "17:00:00")], id="time-condition"),
+        pytest.param({"type": "locationModeCondition", "locationId": "loc-1", "modeId": "mode-home"},
+                     [("modeId", "mode-home")], id="location-mode-condition"),
+    ])
+    def test_literal_shape(self, component, checks):
+        """Test that each component carries its expected fields."""
+        for key, value in checks:
+            assert component[key] == value
 
 
 class TestRuleFiltering:
@@ -311,36 +219,20 @@ class TestRuleFiltering:
     
     def test_filter_rules_by_enabled(self):
         """Test filtering rules by enabled status."""
-        rules = [
-            {"id": "rule-1", "name": "Rule 1", "enabled": True},
-            {"id": "rule-2", "name": "Rule 2", "enabled": False},
-            {"id": "rule-3", "name": "Rule 3", "enabled": True}
-        ]
-        
-        enabled = [r for r in rules if r["enabled"]]
+        enabled = [r for r in _RULES_BY_ENABLED if r["enabled"]]
         assert len(enabled) == 2
         assert all(r["enabled"] for r in enabled)
     
     def test_filter_rules_by_name(self):
         """Test filtering rules by name."""
-        rules = [
-            {"id": "rule-1", "name": "Evening Lights"},
-            {"id": "rule-2", "name": "Morning Coffee"},
-            {"id": "rule-3", "name": "Evening Security"}
-        ]
-        
-        evening = [r for r in rules if "Evening" in r["name"]]
+        name_of = itemgetter("name")
+        pattern = re.compile("Evening")
+        evening = [r for r in _RULES_BY_NAME if pattern.search(name_of(r))]
         assert len(evening) == 2
     
     def test_sort_rules_by_name(self):
         """Test sorting rules by name."""
-        rules = [
-            {"id": "rule-3", "name": "Zebra"},
-            {"id": "rule-1", "name": "Apple"},
-            {"id": "rule-2", "name": "Banana"}
-        ]
-        
-        sorted_rules = sorted(rules, key=lambda r: r["name"])
+        sorted_rules = sorted(_UNSORTED_RULES, key=itemgetter("name"))
         assert sorted_rules[0]["name"] == "Apple"
         assert sorted_rules[1]["name"] == "Banana"
 
@@ -0,0 +1,61 @@
+"""
+Unit tests for SmartThingsMCP structure generation tools.
+Tests validation in generate_context_analysis and generate_execution_plan.
+"""
+import pytest
+
+
+class TestStructureTools:
+    """Test structure generation tools."""
+    
+    def test_context_analysis_coerces_and_skips_entities(self, call_tool):
+        """Test that valid entities are normalized and invalid ones are dropped."""
+        result, _ = call_tool("generate_context_analysis", {
+            "intent": "unknown",
+            "confidence": 3.0,
+            "entities": [
+                {"type": "device", "value": 1, "extra": True},
+                {"type": "room"},
+                {"type": "state", "value": "on", "confidence": "high"},
+                {"type": "room", "value": "Kitchen", "confidence": 0.9, "metadata": {"k": 1}}
+            ]
+        })
+        
+        assert result["intent"] == "other"
+        assert result["confidence"] == 1.0
+        assert result["entities"] == [
+            {"type": "device", "value": "1", "confidence": 0.5, "metadata": {}},
+            {"type": "room", "value": "Kitchen", "confidence": 0.9, "metadata": {"k": 1}}
+        ]
+    
+    def test_execution_plan_skips_calls_without_tool_name(self, call_tool):
+        """Test that plan steps get defaults and steps without tool_name are dropped."""
+        result, _ = call_tool("generate_execution_plan", {
+            "tool_calls": [{"tool_name": "list_locations"}, {"parameters": {}}]
+        })
+        
+        assert result["plan"] == [{"tool_name": "list_locations", "parameters": {}, "description": ""}]
+    
+    def test_present_values_are_kept_like_str(self, call_tool):
+        """Test that any present value is coerced with str() and None mappings become empty."""
+        result, _ = call_tool("generate_context_analysis", {
+            "intent": "status",
+            "entities": [
+                {"type": "device", "value": True},
+                {"type": "device", "value": None},
+                {"type": "room", "value": "Kitchen", "metadata": None}
+            ]
+        })
+        plan, _ = call_tool("generate_execution_plan", {
+            "tool_calls": [
+                {"tool_name": "list_devices", "parameters": None},
+                {"tool_name": "list_rooms", "description": None}
+            ]
+        })
+        
+        assert [(e["value"], e["metadata"]) for e in result["entities"]] == [
+            ("True", {}), ("None", {}), ("Kitchen", {})]
+        assert plan["plan"] == [
+            {"tool_name": "list_devices", "parameters": {}, "description": ""},
+            {"tool_name": "list_rooms", "parameters": {}, "description": "None"}
+        ]